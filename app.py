@@ -17,6 +17,7 @@ from routes.transcripts import transcripts_bp  # <-- 1. ADD THIS LINE
 import logging
 import sys
 from flask_mail import Mail, Message
+from utils.json_provider import OrjsonProvider
 
 # Initialize mail and scheduler with error handling
 mail = Mail()
@@ -36,6 +37,13 @@ except Exception as e:
     print("ℹ️ Scheduler functionality will be disabled")
     scheduler = None
 
+# Flask-Compress is optional; without it responses are sent uncompressed
+try:
+    from flask_compress import Compress
+except ImportError as e:
+    print(f"⚠️ Warning: Flask-Compress not available, responses will not be compressed: {e}")
+    Compress = None
+
 # Fix Unicode encoding for Windows
 if sys.platform.startswith('win'):
     import codecs
@@ -54,6 +62,9 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# The log format doesn't use thread/process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
 
 from models.database import get_supabase_client
 from datetime import datetime, timedelta
@@ -180,6 +191,15 @@ def check_and_send_observer_reminders():
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = OrjsonProvider(app)
+
+    # Compress text-heavy responses (reports, transcripts, JSON) for clients that accept it.
+    # Streamed responses (SSE, NDJSON) are left alone so events still arrive as they're sent.
+    if Compress is not None:
+        app.config.setdefault('COMPRESS_ALGORITHM', ['br', 'gzip'])
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_STREAMS', False)
+        Compress(app)
 
     mail.init_app(app)
     scheduler.init_app(app)
@@ -279,6 +299,16 @@ def create_app():
     app.config['SESSION_KEY_PREFIX'] = 'learning_observer:'
     app.config['SESSION_FILE_DIR'] = os.path.join(os.getcwd(), 'flask_session')
 
+    # Share sessions across gunicorn workers via Redis when available
+    if Config.REDIS_URL:
+        try:
+            import redis
+            app.config['SESSION_TYPE'] = 'redis'
+            app.config['SESSION_REDIS'] = redis.from_url(Config.REDIS_URL)
+            print("✅ Using Redis session backend")
+        except ImportError as e:
+            print(f"⚠️ Warning: redis package not available, using filesystem sessions: {e}")
+
     # Initialize server-side session
     Session(app)
 
@@ -27,11 +27,14 @@ class Config:
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
     OCR_API_KEY = os.environ.get('OCR_API_KEY')
+    CHATBOT_MODEL = os.environ.get('CHATBOT_MODEL', 'gemini-1.5-pro')  # Gemini model behind /api/chatbot
     ASSEMBLYAI_API_KEY = os.environ.get('ASSEMBLYAI_API_KEY')
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD')
     EMAIL_USER = os.environ.get('EMAIL_USER')
     ADMIN_USER = os.environ.get('ADMIN_USER')
     ADMIN_PASS = os.environ.get('ADMIN_PASS')
+    REDIS_URL = os.environ.get('REDIS_URL')  # Enables the shared Redis session backend
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')  # Enables background chatbot generation (needs a Celery worker)
     MAIL_SERVER = 'smtp.gmail.com'
     MAIL_PORT = 587
     MAIL_USE_TLS = True
@@ -0,0 +1,22 @@
+# extensions.py
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Celery is optional: chatbot generation, observation AI reviews and report/suggestion
+# generation only move to a worker when a broker is configured
+celery = None
+if Config.CELERY_BROKER_URL:
+    try:
+        from celery import Celery
+        celery = Celery(
+            "sanjaya",
+            broker=Config.CELERY_BROKER_URL,
+            backend=Config.CELERY_BROKER_URL,
+            include=["routes.chatbot", "routes.observer", "routes.transcripts"],
+        )
+        celery.conf.result_expires = 3600
+    except ImportError as e:
+        logger.warning(f"Celery not available, chatbot and AI reviews will run in-process: {e}")
+        celery = None
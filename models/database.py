@@ -1,4 +1,10 @@
-from supabase import create_client
+from supabase import Client as SupabaseClient
+from supabase.lib.client_options import ClientOptions
+from gotrue import SyncMemoryStorage
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient as PostgrestSession
+from storage3 import SyncStorageClient
+from storage3.utils import SyncClient as StorageSession
 from config import Config
 import logging
 from flask_login import UserMixin
@@ -6,29 +12,52 @@ from datetime import datetime, timedelta, time
 import pytz
 import uuid
 import re
+import io
 import base64
 from werkzeug.security import generate_password_hash
 import secrets
 import time as time_module
 import socket
+import threading
+import queue
+import atexit
+import importlib.util
 import requests
-from urllib.parse import urlparse
+import httpx
+from urllib.parse import urlparse, quote
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
 logger = logging.getLogger(__name__)
 
-# Global supabase client
+# Global supabase client, shared by every request and worker thread
 supabase = None
+_supabase_lock = threading.Lock()
+
+# Service-role client (bypasses RLS), built on first use and reused like the global one
+_service_client = None
+_service_client_lock = threading.Lock()
+
+# PostgREST and storage live on the same host; one keep-alive pool serves both, for
+# the anon and service-role clients alike. HTTP/2 (multiplexing the concurrent
+# lookups over fewer connections) needs httpx's optional h2 package.
+SUPABASE_HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=64, keepalive_expiry=60
+)
+SUPABASE_HTTP2 = importlib.util.find_spec("h2") is not None
+_supabase_transport = None
+_supabase_transport_lock = threading.Lock()
 
 
 def get_observer_suggestion_data(observer_id, child_id=None, limit=10):
-    """Get recent observations for generating topic suggestions"""
+    """Get recent observations for generating topic suggestions (without full_data, which the prompt never reads)"""
     try:
         client = get_supabase_client()
 
         # Get recent observations by this observer
         query = client.table('observations').select("""
-            id, student_id, student_name, date, observations, 
-            theme_of_day, curiosity_seed, full_data,
+            id, student_id, student_name, date, observations,
+            theme_of_day, curiosity_seed,
             strengths, areas_of_development, recommendations
         """).eq('username', observer_id).order('date', desc=True)
 
@@ -53,7 +82,7 @@ def get_child_learning_history(child_id, limit=15):
 
         response = client.table('observations').select("""
             id, date, observations, theme_of_day, curiosity_seed,
-            strengths, areas_of_development, recommendations, full_data
+            strengths, areas_of_development, recommendations
         """).eq('student_id', child_id).order('date', desc=True).limit(limit).execute()
 
         return response.data if response.data else []
@@ -153,15 +182,87 @@ def init_supabase():
                 raise Exception(f"Failed to initialize Supabase after {max_retries} attempts: {str(e)}")
 
 
+def _get_supabase_transport():
+    """The pooled HTTP transport shared by every Supabase client in this process"""
+    global _supabase_transport
+    if _supabase_transport is None:
+        with _supabase_transport_lock:
+            if _supabase_transport is None:
+                _supabase_transport = httpx.HTTPTransport(
+                    limits=SUPABASE_HTTP_LIMITS, http2=SUPABASE_HTTP2
+                )
+    return _supabase_transport
+
+
+# supabase 2.3.4's ClientOptions can't take an HTTP client or transport, so the pooled
+# transport is wired in through the session factories instead: postgrest's
+# create_session, storage3's _create_session, and the client's _init_postgrest_client /
+# _init_storage_client. The client calls these again whenever an auth event resets its
+# PostgREST or storage client, so the pooled sessions survive resets. The hooks
+# are checked against supabase==2.3.4, postgrest==0.10.8 and storage3==0.5.4 (pinned
+# in requirements.txt); recheck them when upgrading any of the three.
+class _PooledPostgrestClient(SyncPostgrestClient):
+    def create_session(self, base_url, headers, timeout):
+        return PostgrestSession(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=_get_supabase_transport(),
+        )
+
+
+class _PooledStorageClient(SyncStorageClient):
+    def _create_session(self, base_url, headers, timeout):
+        return StorageSession(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=_get_supabase_transport(),
+        )
+
+
+class _PooledSupabaseClient(SupabaseClient):
+    @staticmethod
+    def _init_postgrest_client(rest_url, headers, schema, timeout):
+        return _PooledPostgrestClient(rest_url, headers=headers, schema=schema, timeout=timeout)
+
+    @staticmethod
+    def _init_storage_client(storage_url, headers, storage_client_timeout):
+        return _PooledStorageClient(storage_url, headers, storage_client_timeout)
+
+
+def create_client(supabase_url, supabase_key):
+    """A supabase client whose PostgREST and storage requests use the shared pooled transport"""
+    return _PooledSupabaseClient.create(
+        supabase_url, supabase_key, ClientOptions(storage=SyncMemoryStorage())
+    )
+
+
 def get_supabase_client():
     """Get the initialized supabase client with retry logic"""
     global supabase
     if supabase is None:
-        logger.info("Supabase client not initialized, attempting initialization...")
-        init_supabase()
+        # Double-checked so concurrent first requests don't each build a client
+        with _supabase_lock:
+            if supabase is None:
+                logger.info("Supabase client not initialized, attempting initialization...")
+                init_supabase()
     return supabase
 
 
+def get_service_client():
+    """Get the shared service-role supabase client, or None if no service key is configured"""
+    global _service_client
+    service_key = getattr(Config, "SUPABASE_SERVICE_KEY", None)
+    if not service_key:
+        return None
+    if _service_client is None:
+        with _service_client_lock:
+            if _service_client is None:
+                _service_client = create_client(Config.SUPABASE_URL, service_key)
+    return _service_client
+
+
 # Test function to verify connection
 def test_supabase_connection():
     """Test Supabase connection and return status"""
@@ -243,6 +344,48 @@ def get_children():
         return []
 
 
+def _ilike_any_literal(values):
+    """Build a PostgREST ilike(any) array literal that matches each value exactly, ignoring case"""
+    quoted = []
+    for value in values:
+        # Escape LIKE wildcards, then quote the element for the Postgres array literal
+        pattern = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        quoted.append('"' + pattern.replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(quoted) + '}'
+
+
+def _select_by_names(table, names, active_only=False, batch_size=100):
+    """Fetch id/name rows whose name case-insensitively matches one of names, in URL-sized batches"""
+    client = get_supabase_client()
+    names = list(names)
+    rows = []
+    for i in range(0, len(names), batch_size):
+        query = client.table(table).select('id, name').filter('name', 'ilike(any)', _ilike_any_literal(names[i:i + batch_size]))
+        if active_only:
+            query = query.eq('is_active', True)
+        response = query.execute()
+        rows.extend(response.data or [])
+    return rows
+
+
+def get_children_by_names(names):
+    """Get children whose names match any of names (case-insensitive)"""
+    try:
+        return _select_by_names('children', names)
+    except Exception as e:
+        logger.error(f"Error getting children by names: {str(e)}")
+        return []
+
+
+def get_organizations_by_names(names):
+    """Get active organizations whose names match any of names (case-insensitive)"""
+    try:
+        return _select_by_names('organizations', names, active_only=True)
+    except Exception as e:
+        logger.error(f"Error getting organizations by names: {str(e)}")
+        return []
+
+
 def get_child_by_id(child_id):
     """Get child by ID with gender information"""
     try:
@@ -256,6 +399,25 @@ def get_child_by_id(child_id):
         return None
 
 
+# child_id -> name; child rows are renamed rarely and deleted through invalidate_child
+_child_name_cache = TTLCache(maxsize=4096, ttl=600)
+_child_name_cache_lock = threading.RLock()
+
+
+@cached(_child_name_cache, key=hashkey, lock=_child_name_cache_lock)
+def get_child_name_cached(child_id):
+    """Get a child's name (None if the child doesn't exist), cached for ten minutes"""
+    client = get_supabase_client()
+    result = client.table('children').select('name').eq('id', child_id).limit(1).execute()
+    return result.data[0]['name'] if result.data else None
+
+
+def invalidate_child(child_id):
+    """Drop a child's cached name after it is edited or deleted"""
+    with _child_name_cache_lock:
+        _child_name_cache.pop(hashkey(child_id), None)
+
+
 def get_observers():
     try:
         client = get_supabase_client()
@@ -311,6 +473,17 @@ def save_processed_data(processed_data):
         return None
 
 
+def save_transcript(transcript_data):
+    """Insert a transcript row holding both the conversational transcript and the daily report"""
+    try:
+        client = get_supabase_client()
+        response = client.table('transcripts').insert(transcript_data).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        logger.error(f"Error saving transcript: {str(e)}")
+        return None
+
+
 def get_observations_by_child(child_id, limit=None):
     try:
         client = get_supabase_client()
@@ -388,11 +561,45 @@ def get_signed_audio_url(file_path, bucket_name="audio-files"):
         return None
 
 
+def get_signed_audio_urls(file_paths, bucket_name="audio-files"):
+    """Sign several audio files in one storage request; returns {path: signed_url}"""
+    paths = list(dict.fromkeys(p for p in file_paths if p))
+    if not paths:
+        return {}
+    try:
+        client = get_supabase_client()
+        response = client.storage.from_(bucket_name).create_signed_urls(
+            paths,
+            expires_in=3600  # 1 hour
+        )
+        return {
+            item['path']: item['signedURL']
+            for item in response
+            if not item.get('error') and item.get('signedURL')
+        }
+    except Exception as e:
+        logger.warning(f"Batch signed URL creation failed, signing individually: {e}")
+        signed = {}
+        for path in paths:
+            url = get_signed_audio_url(path, bucket_name)
+            if url:
+                signed[path] = url
+        return signed
+
+
 def upload_file_to_storage(file_data, file_name, file_type):
-    """Upload file to Supabase storage with enhanced audio compatibility"""
+    """Upload file to Supabase storage with enhanced audio compatibility.
+
+    file_data may be bytes or a binary file object; open files are streamed
+    to storage in chunks instead of being read into memory first.
+    """
     try:
         client = get_supabase_client()
 
+        # storage3 streams BufferedReader/FileIO handles; other file-likes are read once
+        if hasattr(file_data, 'read') and not isinstance(file_data, (io.BufferedReader, io.FileIO)):
+            file_data = file_data.read()
+
         # Clean filename to avoid issues with spaces and special characters
         clean_filename = re.sub(r'[^\w\s.-]', '', file_name)
         clean_filename = clean_filename.replace(' ', '_')
@@ -446,6 +653,40 @@ def upload_file_to_storage(file_data, file_name, file_type):
         return None
 
 
+# Generated report documents, kept so repeat downloads skip rebuilding them
+REPORTS_BUCKET = "reports"
+
+
+def get_stored_report_url(path, download_name, expires_in=3600):
+    """Signed download URL for a stored report document, or None if it isn't stored yet"""
+    try:
+        client = get_supabase_client()
+        response = client.storage.from_(REPORTS_BUCKET).create_signed_url(path, expires_in)
+        signed_url = response.get('signedURL')
+        if not signed_url:
+            return None
+        # Storage serves signed objects as attachments named by the download parameter
+        return f"{signed_url}&download={quote(download_name)}"
+    except Exception as e:
+        logger.debug(f"No stored report at {path}: {e}")
+        return None
+
+
+def store_report_file(path, data, content_type):
+    """Save a generated report document for later downloads; returns True on success"""
+    try:
+        client = get_supabase_client()
+        client.storage.from_(REPORTS_BUCKET).upload(
+            path,
+            data,
+            file_options={"content-type": content_type, "x-upsert": "true"}
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Could not store report {path}: {e}")
+        return False
+
+
 # SCHEDULED REPORTING SYSTEM FUNCTIONS
 def get_scheduled_reports_for_observer(observer_id):
     """Get all scheduled reports for an observer with child details"""
@@ -600,8 +841,12 @@ def log_report_processing(child_id, observer_id, observation_id=None, report_typ
         return None
 
 
-def get_child_schedule_status(observer_id):
-    """Get schedule status for all children assigned to observer"""
+def get_child_schedule_status(observer_id, iso_times=False):
+    """Get schedule status for all children assigned to observer.
+
+    With iso_times=True, next_scheduled_time is returned as an ISO string for JSON
+    responses instead of a datetime.
+    """
     try:
         # Get all children for observer
         children = get_observer_children(observer_id)
@@ -624,7 +869,7 @@ def get_child_schedule_status(observer_id):
 
             schedule_status.append({
                 'child': child,
-                'next_scheduled_time': next_time,
+                'next_scheduled_time': next_time.isoformat() if iso_times and next_time else next_time,
                 'processed_today': processed_today,
                 'is_due': is_due,
                 'can_process': is_due and not processed_today
@@ -654,23 +899,44 @@ def create_organization(name, description=None, contact_email=None, contact_phon
 
         result = client.table('organizations').insert(org_data).execute()
         logger.info(f"Created organization: {name}")
+        invalidate_organizations()
         return result.data[0] if result.data else None
     except Exception as e:
         logger.error(f"Error creating organization: {e}")
         return None
 
 
+# Active organizations for the signup and admin dropdowns; dropped by create_organization
+_organizations_cache = TTLCache(maxsize=1, ttl=300)
+_organizations_cache_lock = threading.RLock()
+
+
 def get_organizations():
-    """Get all active organizations"""
+    """Get all active organizations, cached for five minutes"""
+    with _organizations_cache_lock:
+        organizations = _organizations_cache.get('active')
+    if organizations is not None:
+        return organizations
+
     try:
         client = get_supabase_client()
         result = client.table('organizations').select('*').eq('is_active', True).order('name').execute()
         logger.info(f"Found {len(result.data)} organizations")
-        return result.data if result.data else []
+        organizations = result.data if result.data else []
     except Exception as e:
         logger.error(f"Error fetching organizations: {e}")
         return []
 
+    with _organizations_cache_lock:
+        _organizations_cache['active'] = organizations
+    return organizations
+
+
+def invalidate_organizations():
+    """Drop the cached organization list after an organization is added or changed"""
+    with _organizations_cache_lock:
+        _organizations_cache.clear()
+
 
 def get_organization_by_id(org_id):
     """Get organization by ID"""
@@ -886,6 +1152,53 @@ def submit_peer_review(reviewer_id, observation_id, review_score, review_comment
         return None
 
 
+# Peer review page lookups. The reviewed-ID set is updated in place when a review is
+# recorded; report counts are dropped when the observer saves a new observation.
+REVIEWED_IDS_WINDOW_DAYS = 8
+_reviewed_ids_cache = TTLCache(maxsize=1, ttl=60)
+_reviewed_ids_cache_lock = threading.RLock()
+_report_count_cache = TTLCache(maxsize=4096, ttl=300)
+_report_count_cache_lock = threading.RLock()
+
+
+def get_recently_reviewed_observation_ids():
+    """IDs of observations peer-reviewed in the last REVIEWED_IDS_WINDOW_DAYS days, cached for a minute"""
+    with _reviewed_ids_cache_lock:
+        ids = _reviewed_ids_cache.get('ids')
+    if ids is not None:
+        return ids
+
+    cutoff = (datetime.now() - timedelta(days=REVIEWED_IDS_WINDOW_DAYS)).isoformat()
+    client = get_supabase_client()
+    result = client.table('peer_reviews').select('observation_id').gte('created_at', cutoff).execute()
+    ids = frozenset(review['observation_id'] for review in result.data or [])
+    with _reviewed_ids_cache_lock:
+        _reviewed_ids_cache['ids'] = ids
+    return ids
+
+
+def record_peer_review(observation_id):
+    """Add a newly reviewed observation to the cached reviewed-ID set (restarting its TTL)"""
+    with _reviewed_ids_cache_lock:
+        ids = _reviewed_ids_cache.get('ids')
+        if ids is not None:
+            _reviewed_ids_cache['ids'] = ids | {observation_id}
+
+
+@cached(_report_count_cache, key=hashkey, lock=_report_count_cache_lock)
+def get_observer_report_count(observer_id):
+    """Number of observations an observer has saved, cached for five minutes"""
+    client = get_supabase_client()
+    result = client.table('observations').select('id', count='exact').eq('username', observer_id).limit(1).execute()
+    return result.count or 0
+
+
+def invalidate_observer_report_count(observer_id):
+    """Drop an observer's cached report count after they save an observation"""
+    with _report_count_cache_lock:
+        _report_count_cache.pop(hashkey(observer_id), None)
+
+
 def get_users_by_organization(organization_id, role=None):
     """Get users by organization and optionally by role - FIXED"""
     try:
@@ -941,6 +1254,48 @@ def get_principal_feedback_for_observer(observer_id):
         return []
 
 
+def get_principal_for_observer(observer_id):
+    """Get the principal (id, name, organization_id) for an observer's organization"""
+    client = get_supabase_client()
+    try:
+        result = client.rpc('principal_for_observer', {'observer_id': observer_id}).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        logger.warning(f"principal_for_observer RPC unavailable, falling back to two queries: {e}")
+
+    try:
+        observer = client.table('users').select('organization_id').eq('id', observer_id).execute()
+        if not observer.data or not observer.data[0].get('organization_id'):
+            return None
+        org_id = observer.data[0]['organization_id']
+        principal = client.table('users').select('id, name, organization_id') \
+            .eq('organization_id', org_id).eq('role', 'Principal').limit(1).execute()
+        return principal.data[0] if principal.data else None
+    except Exception as e:
+        logger.error(f"Error fetching principal for observer: {e}")
+        return None
+
+
+# observer_id -> principal row; entries are dropped on role/organization changes
+_principal_cache = TTLCache(maxsize=2048, ttl=300)
+_principal_cache_lock = threading.RLock()
+
+
+@cached(_principal_cache, key=hashkey, lock=_principal_cache_lock)
+def get_cached_principal_for_observer(observer_id):
+    """Cached get_principal_for_observer; the mapping rarely changes between uploads"""
+    return get_principal_for_observer(observer_id)
+
+
+def invalidate_principal_cache(observer_id=None):
+    """Drop one observer's cached principal, or every entry when observer_id is None"""
+    with _principal_cache_lock:
+        if observer_id is None:
+            _principal_cache.clear()
+        else:
+            _principal_cache.pop(hashkey(observer_id), None)
+
+
 def get_peer_reviews_for_organization(organization_id):
     """Get all feedback for observers in an organization - FIXED"""
     try:
@@ -1082,6 +1437,106 @@ def auto_assign_parent_to_organization(child_id, organization_id):
         return False
 
 
+# AUDIT LOG BATCHING
+# Audit rows are queued by request handlers and written by a daemon thread in batched inserts,
+# so admin actions don't wait on an extra Supabase round-trip per log entry.
+AUDIT_BATCH_MAX = 100
+AUDIT_FLUSH_INTERVAL = 0.2  # seconds to wait for more rows before flushing a batch
+AUDIT_QUEUE_MAX = 10000
+AUDIT_SHUTDOWN_TIMEOUT = 10  # seconds to wait at exit for the writer's last flush
+
+# Queued at exit: the writer flushes the batch it is holding and stops
+_AUDIT_STOP = object()
+
+_audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_MAX)
+_audit_worker = None
+_audit_worker_lock = threading.Lock()
+
+
+def enqueue_audit_log(table, row):
+    """Queue an audit row for a batched background insert into table"""
+    _ensure_audit_worker()
+    try:
+        _audit_queue.put((table, row), timeout=1)
+    except queue.Full:
+        # Back-pressure: the writer is behind, so write this row inline rather than drop it
+        logger.warning(f"Audit queue full, writing {table} row inline")
+        _flush_audit_batch({table: [row]})
+
+
+def _ensure_audit_worker():
+    global _audit_worker
+    if _audit_worker is None or not _audit_worker.is_alive():
+        with _audit_worker_lock:
+            if _audit_worker is None or not _audit_worker.is_alive():
+                _audit_worker = threading.Thread(target=_run_audit_worker, name='audit-log-writer', daemon=True)
+                _audit_worker.start()
+
+
+def _run_audit_worker():
+    while True:
+        item = _audit_queue.get()
+        if item is _AUDIT_STOP:
+            return
+        table, row = item
+        batch = {table: [row]}
+        queued = 1
+        deadline = time_module.monotonic() + AUDIT_FLUSH_INTERVAL
+
+        # Collect whatever else arrives within the flush window, up to AUDIT_BATCH_MAX rows
+        while queued < AUDIT_BATCH_MAX:
+            remaining = deadline - time_module.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = _audit_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _AUDIT_STOP:
+                _flush_audit_batch(batch)
+                return
+            table, row = item
+            batch.setdefault(table, []).append(row)
+            queued += 1
+
+        _flush_audit_batch(batch)
+
+
+def _flush_audit_batch(batch):
+    """Insert queued audit rows with one request per table"""
+    for table, rows in batch.items():
+        try:
+            client = get_supabase_client()
+            client.table(table).insert(rows).execute()
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} audit rows to {table}: {e}")
+
+
+@atexit.register
+def _drain_audit_queue():
+    """Let the writer flush the batch it is holding, then write any still-queued audit rows"""
+    worker = _audit_worker
+    if worker is not None and worker.is_alive():
+        try:
+            _audit_queue.put(_AUDIT_STOP, timeout=AUDIT_SHUTDOWN_TIMEOUT)
+            worker.join(AUDIT_SHUTDOWN_TIMEOUT)
+        except queue.Full:
+            logger.warning("Audit queue full at exit, writing the remaining rows inline")
+
+    batch = {}
+    while True:
+        try:
+            item = _audit_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is _AUDIT_STOP:
+            continue
+        table, row = item
+        batch.setdefault(table, []).append(row)
+    if batch:
+        _flush_audit_batch(batch)
+
+
 # UTILITY FUNCTIONS
 def check_database_health():
     """Check database connection health"""
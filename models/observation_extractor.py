@@ -18,12 +18,153 @@ from matplotlib.ticker import MaxNLocator
 from docx2pdf import convert
 import tempfile
 import calendar
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Section markers for generate_transcript_and_report, which asks for the dialogue
+# and the Daily Insights report in one response
+TRANSCRIPT_MARKER = "=====CONVERSATIONAL TRANSCRIPT====="
+REPORT_MARKER = "=====DAILY INSIGHTS REPORT====="
+
+# When the combined call can't be used, the transcript is generated here while the
+# calling thread generates the report
+_generation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="extractor-generate")
+
+# Fixed instructions of the transcript and Daily Insights prompts. Each prompt puts
+# these first and the per-request text and student details last, so repeated calls
+# share the longest possible prompt prefix for Gemini's implicit caching.
+_TRANSCRIPT_INSTRUCTIONS = """
+            Convert the observation text given at the end into a conversational format between an Observer and a Child. 
+
+CRITICAL INSTRUCTIONS:
+- The text may contain Regional Languages (Hindi, Punjabi, etc.). Preserve the original language in the dialogue but add [English translation in brackets] if it helps context.
+- NEVER use any names that appear in the raw text or audio
+- Always refer to the child as "Child" in the dialogue labels
+- Do not assume gender - avoid using he/his, she/her pronouns
+- Use gender-neutral language throughout the conversation
+
+Format it as a natural dialogue where:
+            - Observer speaks first with questions, instructions, or observations
+            - Child responds naturally based on the context
+            - Use "Observer:" and "Child:" labels for each speaker
+            - Make it realistic and age-appropriate
+            - If the text is already conversational, just format it properly
+            - If it's narrative observations, convert them into likely dialogue
+            - Create a natural flow of conversation that would lead to the observations described
+            - Include educational moments and learning interactions
+            - NEVER use names from the original text - always use "Child:" as the label
+            - Avoid gender assumptions in the dialogue content
+
+            Please format as a realistic conversation:
+            Observer: [what the observer might have said or asked]
+            Child: [how the child might have responded based on the context]
+            Observer: [follow-up from observer]
+            Child: [child's response]
+
+            Keep it natural, educational, and age-appropriate. Make sure the conversation flows logically and would realistically result in the observations described in the original text. Remember to never use names from the original text and avoid gender-specific language.
+            """
+
+_REPORT_INSTRUCTIONS = """
+        You are an educational observer tasked with generating a comprehensive and accurate Daily Insights based on the observational notes from a student session given at the end. Pay special attention to any achievements, learning moments, and areas for growth. The report should be structured, insightful, and easy to understand for parents. Add postives and negatives based on the text content provided.
+
+        CRITICAL INSTRUCTIONS FOR MULTILINGUAL CONTENT:
+        - The text content may contain inputs in regional languages (like Punjabi, Marathi, Hindi). 
+        - You MUST translate the core meaning and insights of any non-English text into English for the final report.
+        - Do not ignore the parts where the student speaks in their native language; often the most authentic expression happens there.
+        - If the student shows fluency or confidence in their native language, mention this positively in the 'Social' or 'Communication' section.
+        - Ensure the final report is fully in English, but captures the essence of what was said in the regional language.
+
+        CRITICAL INSTRUCTIONS FOR NAME AND GENDER USAGE:
+        - NEVER extract or use any name from the audio transcription or text content
+        - ALWAYS use the exact name given under STUDENT DETAILS
+        - Use the pronouns given under STUDENT DETAILS for the student throughout the report
+        - When referring to the student, use that name or those pronouns
+        - Make sure the report is grammatically correct and adheres to proper English syntax and semantics.
+        Please carefully analyze the given text and complete the report using the exact format, emojis, section titles, and scoring rubrics as described below. The student should be referred to consistently using their provided name and pronouns - never use names from the audio/text content.
+
+        📌 Important Instructions for the Report:
+        - Follow the format exactly as shown below.
+        - Make reasonable inferences for items not explicitly stated in the text.
+        - Ensure that the final Overall Growth Score and category (🟢/💚/⚠️/📈) accurately reflects the number of active areas, according to:
+        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
+        💚 Good (5-6 areas) – Solid engagement with positive trends
+        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement
+        📈 Needs Work (1-2 areas) – Area not activated or underperforming today
+        - Include the new Communication Skills & Thought Clarity section.
+        - The tone should be professional, warm, and insightful — aimed at helping parents understand their child's daily growth.
+        - REMEMBER: Always use the name given under STUDENT DETAILS instead of any pronouns or names from the content
+
+        Instructions for Report Generation
+        Assign scores based on clear, evidence-backed observations for each area.
+
+        Explain each score with a specific reason—avoid generalizations or repeated points. Every score must be justified individually and precisely.
+
+        Use the following rating scale consistently:
+
+        Ratings Scale:
+         Excellent (7/7 areas) – Clear growth with strong evidence
+         Good (5-6 areas) – Solid engagement with positive trends
+         Fair (3-4 areas) – Some engagement, needs encouragement
+         Needs Work (1-2 areas) – Area not activated or underperforming today
+        Always include the complete legend in every report so the evaluator or reader can cross-check scores against the criteria.
+
+        Ensure the entire report strictly follows the legend and that scoring aligns accurately with the defined scale.
+
+        Do not use tables for the "Growth Metrics & Observations" section. Present the content in a well-spaced, structured paragraph format to preserve formatting integrity across platforms.
+
+        🧾 Daily Insights Format for Parents
+
+        🧒 Child's Name: [Name from STUDENT DETAILS]
+        📅 Date: [Session date from STUDENT DETAILS]
+        🌱 Curiosity Seed Explored: [Extract from text]
+
+        📊 Growth Metrics & Observations
+        Growth Area | Rating | Observation Summary
+        🧠 Intellectual | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        😊 Emotional | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        🤝 Social | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        🎨 Creative | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        🏃 Physical | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        🚀 Planning/Independence | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        🧭 Character | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
+        
+        🌈 Curiosity Response Index: [1-10] / 10
+        [Brief explanation of the student's engagement with the curiosity seed]
+
+        🧠 Overall Growth Score:  
+        [🔵 Balanced Growth / 🟡 Moderate Growth / 🔴 Limited Growth] – [X/7] Areas Active 
+        [Brief recommendation for next steps or continued development for the student]
+
+        📣 Note for Parent:  
+        [Comprehensive summary for parents with actionable insights and encouragement based on today's session for the student]
+
+        🟢 Legend
+
+        ✅ Performance by Area
+        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
+        💚 Good (5-6 areas) – Solid engagement with positive trends        
+        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement        
+        📈 Needs Work (1-2 areas) – Area not activated or underperforming today
+
+        give the entire report such that its a direct send worthy item, so all things should always be there and no other unecessary words in the response. No repetation.
+        Also make sure each and every report generated always has the legend "🟢 Legend
+
+        ✅ Performance by Area
+        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
+        💚 Good (5-6 areas) – Solid engagement with positive trends        
+        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement        
+        📈 Needs Work (1-2 areas) – Area not activated or underperforming today" at the bottom of each report as the format of the report specifies. 
+        """
+
 
 class ObservationExtractor:
-    def __init__(self):
+    def __init__(self, transcript_model="gemini-2.0-flash-lite", report_model="gemini-2.0-flash"):
+        # Turning raw text into dialogue is a formatting task, so it runs on the smaller,
+        # faster model; the Daily Insights report keeps the full model
+        self.transcript_model = transcript_model
+        self.report_model = report_model
         self.ocr_api_key = Config.OCR_API_KEY
         self.groq_api_key = Config.GROQ_API_KEY
         self.gemini_api_key = Config.GOOGLE_API_KEY
@@ -181,12 +322,13 @@ IMPORTANT: Never use gender-specific language or names from the observation text
         }
 
         try:
-            # Upload the audio file
+            # Upload the audio file, streamed from the file object rather than
+            # copied into a second bytes buffer
             audio_file.seek(0)
             upload_response = requests.post(
                 "https://api.assemblyai.com/v2/upload",
                 headers={"authorization": Config.ASSEMBLYAI_API_KEY},
-                data=audio_file.read(),
+                data=audio_file,
             )
 
             if upload_response.status_code != 200:
@@ -243,46 +385,24 @@ IMPORTANT: Never use gender-specific language or names from the observation text
         except Exception as e:
             return f"Error during transcription: {str(e)}"
 
-    def generate_conversational_transcript(self, raw_text):
-        """Convert raw observations/transcript into conversational format using Gemini API"""
-        try:
-            prompt = f"""
-            Convert the following observation text into a conversational format between an Observer and a Child. 
-
-CRITICAL INSTRUCTIONS:
-- The text may contain Regional Languages (Hindi, Punjabi, etc.). Preserve the original language in the dialogue but add [English translation in brackets] if it helps context.
-- NEVER use any names that appear in the raw text or audio
-- Always refer to the child as "Child" in the dialogue labels
-- Do not assume gender - avoid using he/his, she/her pronouns
-- Use gender-neutral language throughout the conversation
-
-Format it as a natural dialogue where:
-            - Observer speaks first with questions, instructions, or observations
-            - Child responds naturally based on the context
-            - Use "Observer:" and "Child:" labels for each speaker
-            - Make it realistic and age-appropriate
-            - If the text is already conversational, just format it properly
-            - If it's narrative observations, convert them into likely dialogue
-            - Create a natural flow of conversation that would lead to the observations described
-            - Include educational moments and learning interactions
-            - NEVER use names from the original text - always use "Child:" as the label
-            - Avoid gender assumptions in the dialogue content
-
+    def _transcript_prompt(self, raw_text):
+        """Prompt asking Gemini to turn raw observation text into an Observer/Child dialogue"""
+        return f"""{_TRANSCRIPT_INSTRUCTIONS}
             Original observation text:
             {raw_text}
+            """
 
-            Please format as a realistic conversation:
-            Observer: [what the observer might have said or asked]
-            Child: [how the child might have responded based on the context]
-            Observer: [follow-up from observer]
-            Child: [child's response]
+    def generate_conversational_transcript(self, raw_text, prompt=None):
+        """Convert raw observations/transcript into conversational format using Gemini API.
 
-            Keep it natural, educational, and age-appropriate. Make sure the conversation flows logically and would realistically result in the observations described in the original text. Remember to never use names from the original text and avoid gender-specific language.
-            """
+        ``prompt`` is the prebuilt _transcript_prompt(raw_text), when the caller already has it.
+        """
+        try:
+            prompt = prompt or self._transcript_prompt(raw_text)
 
             # Use the same Gemini API pattern as your existing methods
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            config = genai.types.GenerationConfig(temperature=0.2)
+            model = genai.GenerativeModel(self.transcript_model)
+            config = genai.types.GenerationConfig(temperature=0)
             response = model.generate_content(
                 [{"role": "user", "parts": [{"text": prompt}]}],
                 generation_config=config,
@@ -323,8 +443,8 @@ Format it as a natural dialogue where:
 
         return "\n".join(formatted_lines)
 
-    def generate_report_from_text(self, text_content, user_info):
-        """Generate a structured report from text using Google Gemini"""
+    def _report_details(self, user_info):
+        """STUDENT DETAILS block of the report prompt: the child's database name, pronouns and session date"""
         # Get child information with gender
         from models.database import get_child_by_id
 
@@ -363,111 +483,107 @@ Format it as a natural dialogue where:
         if not student_name or student_name == "Student":
             student_name = child["name"] if child and child.get("name") else "Student"
 
-        prompt = f"""
-        You are an educational observer tasked with generating a comprehensive and accurate Daily Insights based on the following observational notes from a student session. Pay special attention to any achievements, learning moments, and areas for growth. The report should be structured, insightful, and easy to understand for parents. Add postives and negatives based on the text content provided.
+        return f"""
+        STUDENT DETAILS:
+        - Name: {student_name}
+        - Pronouns: subject = {pronouns["subject"]}, object = {pronouns["object"]}, possessive = {pronouns["possessive"]}
+        - Session date: {user_info.get("session_date", "Today")}
+        """
 
+    def _report_prompt(self, text_content, user_info, details=None):
+        """Daily Insights prompt for text_content, using the child's database name and pronouns.
+
+        ``details`` is the prebuilt _report_details(user_info), when the caller already has it.
+        """
+        details = details or self._report_details(user_info)
+        return f"""{_REPORT_INSTRUCTIONS}{details}
         📝 TEXT CONTENT (May include English, Punjabi, Hindi or other regional languages):
         {text_content}
+        """
 
-        CRITICAL INSTRUCTIONS FOR MULTILINGUAL CONTENT:
-        - The text content may contain inputs in regional languages (like Punjabi, Marathi, Hindi). 
-        - You MUST translate the core meaning and insights of any non-English text into English for the final report.
-        - Do not ignore the parts where the student speaks in their native language; often the most authentic expression happens there.
-        - If the student shows fluency or confidence in their native language, mention this positively in the 'Social' or 'Communication' section.
-        - Ensure the final report is fully in English, but captures the essence of what was said in the regional language.
-
-        CRITICAL INSTRUCTIONS FOR NAME AND GENDER USAGE:
-        - NEVER extract or use any name from the audio transcription or text content
-        - ALWAYS use the exact name provided: {student_name}
-        - Use these pronouns for the student throughout the report: subject = {pronouns["subject"]}, object = {pronouns["object"]}, possessive = {pronouns["possessive"]}
-        - When referring to the student, use "{student_name}" or the appropriate pronouns ({pronouns["subject"]}/{pronouns["object"]}/{pronouns["possessive"]})
-        - Make sure the report is grammatically correct and adheres to proper English syntax and semantics.
-        Please carefully analyze the given text and complete the report using the exact format, emojis, section titles, and scoring rubrics as described below. The student should be referred to consistently using their provided name "{student_name}" and the appropriate pronouns - never use names from the audio/text content.
-
-        📌 Important Instructions for the Report:
-        - Follow the format exactly as shown below.
-        - Make reasonable inferences for items not explicitly stated in the text.
-        - Ensure that the final Overall Growth Score and category (🟢/💚/⚠️/📈) accurately reflects the number of active areas, according to:
-        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
-        💚 Good (5-6 areas) – Solid engagement with positive trends
-        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement
-        📈 Needs Work (1-2 areas) – Area not activated or underperforming today
-        - Include the new Communication Skills & Thought Clarity section.
-        - The tone should be professional, warm, and insightful — aimed at helping parents understand their child's daily growth.
-        - REMEMBER: Always use "{user_info["student_name"]}" instead of any pronouns or names from the content
-
-        Instructions for Report Generation
-        Assign scores based on clear, evidence-backed observations for each area.
-
-        Explain each score with a specific reason—avoid generalizations or repeated points. Every score must be justified individually and precisely.
-
-        Use the following rating scale consistently:
-
-        Ratings Scale:
-         Excellent (7/7 areas) – Clear growth with strong evidence
-         Good (5-6 areas) – Solid engagement with positive trends
-         Fair (3-4 areas) – Some engagement, needs encouragement
-         Needs Work (1-2 areas) – Area not activated or underperforming today
-        Always include the complete legend in every report so the evaluator or reader can cross-check scores against the criteria.
-
-        Ensure the entire report strictly follows the legend and that scoring aligns accurately with the defined scale.
-
-        Do not use tables for the "Growth Metrics & Observations" section. Present the content in a well-spaced, structured paragraph format to preserve formatting integrity across platforms.
-
-        🧾 Daily Insights Format for Parents
-
-        🧒 Child's Name: {student_name}
-        📅 Date: [{user_info.get("session_date", "Today")}]
-        🌱 Curiosity Seed Explored: [Extract from text]
+    def generate_report_from_text(self, text_content, user_info, prompt=None):
+        """Generate a structured report from text using Google Gemini.
 
-        📊 Growth Metrics & Observations
-        Growth Area | Rating | Observation Summary
-        🧠 Intellectual | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        😊 Emotional | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        🤝 Social | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        🎨 Creative | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        🏃 Physical | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        🚀 Planning/Independence | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        🧭 Character | [✅ Excellent/✅ Good/⚠️ Fair/📈 Needs Work] | [Brief summary]
-        
-        🌈 Curiosity Response Index: [1-10] / 10
-        [Brief explanation of {student_name}'s engagement with the curiosity seed]
-
-        🧠 Overall Growth Score:  
-        [🔵 Balanced Growth / 🟡 Moderate Growth / 🔴 Limited Growth] – [X/7] Areas Active 
-        [Brief recommendation for next steps or continued development for {student_name}]
+        ``prompt`` is the prebuilt _report_prompt(text_content, user_info), when the caller already has it.
+        """
+        prompt = prompt or self._report_prompt(text_content, user_info)
 
-        📣 Note for Parent:  
-        [Comprehensive summary for parents with actionable insights and encouragement based on today's session for {student_name}]
+        try:
+            model = genai.GenerativeModel(self.report_model)
+            config = genai.types.GenerationConfig(temperature=0.2)
+            response = model.generate_content(
+                [{"role": "user", "parts": [{"text": prompt}]}],
+                generation_config=config,
+            )
+            return response.text
+        except Exception as e:
+            return f"Error generating report: {str(e)}"
 
-        🟢 Legend
+    def stream_report_from_text(self, text_content, user_info):
+        """Yield the Daily Insights report for text_content in pieces as Gemini generates it"""
+        prompt = self._report_prompt(text_content, user_info)
+        model = genai.GenerativeModel(self.report_model)
+        config = genai.types.GenerationConfig(temperature=0.2)
+        for chunk in model.generate_content(
+            [{"role": "user", "parts": [{"text": prompt}]}],
+            generation_config=config,
+            stream=True,
+        ):
+            if chunk.text:
+                yield chunk.text
+
+    def generate_transcript_and_report(self, raw_text, user_info):
+        """Generate the conversational transcript and the Daily Insights report in one Gemini call.
+
+        Returns (transcript, report). If the response doesn't contain both marked
+        sections, falls back to the separate generate_* calls, run side by side.
+        The observation text and student details are sent once, after both tasks'
+        fixed instructions; each task's prompt (including the report's child lookup)
+        is built once and reused by the fallback.
+        """
+        details = self._report_details(user_info)
+        transcript_prompt = self._transcript_prompt(raw_text)
+        report_prompt = self._report_prompt(raw_text, user_info, details)
+        prompt = f"""
+        Complete the two tasks below for the same observation text and return both results.
 
-        ✅ Performance by Area
-        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
-        💚 Good (5-6 areas) – Solid engagement with positive trends        
-        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement        
-        📈 Needs Work (1-2 areas) – Area not activated or underperforming today
+        TASK 1 - CONVERSATIONAL TRANSCRIPT:
+        {_TRANSCRIPT_INSTRUCTIONS}
 
-        give the entire report such that its a direct send worthy item, so all things should always be there and no other unecessary words in the response. No repetation.
-        Also make sure each and every report generated always has the legend "🟢 Legend
+        TASK 2 - DAILY INSIGHTS REPORT:
+        {_REPORT_INSTRUCTIONS}
 
-        ✅ Performance by Area
-        🟢 Excellent (7/7 areas) – Clear growth with strong evidence
-        💚 Good (5-6 areas) – Solid engagement with positive trends        
-        ⚠️ Fair (3-4 areas) – Some engagement, needs encouragement        
-        📈 Needs Work (1-2 areas) – Area not activated or underperforming today" at the bottom of each report as the format of the report specifies. 
+        OUTPUT FORMAT:
+        Write the line {TRANSCRIPT_MARKER} followed by the full result of task 1, then the
+        line {REPORT_MARKER} followed by the full result of task 2. Write nothing before the
+        first marker and never repeat a marker inside a result.
+        {details}
+        📝 OBSERVATION TEXT, used by both tasks (May include English, Punjabi, Hindi or other regional languages):
+        {raw_text}
         """
 
         try:
-            model = genai.GenerativeModel("gemini-2.0-flash")
+            # Both results come from one response, so it needs the report's model
+            model = genai.GenerativeModel(self.report_model)
             config = genai.types.GenerationConfig(temperature=0.2)
             response = model.generate_content(
                 [{"role": "user", "parts": [{"text": prompt}]}],
                 generation_config=config,
             )
-            return response.text
+            _, found_transcript, rest = response.text.partition(TRANSCRIPT_MARKER)
+            transcript, found_report, report = rest.partition(REPORT_MARKER)
+            transcript, report = transcript.strip(), report.strip()
+            if found_transcript and found_report and transcript and report:
+                return transcript, report
+            logger.warning("Combined transcript/report response was missing a section, generating separately")
         except Exception as e:
-            return f"Error generating report: {str(e)}"
+            logger.warning(f"Combined transcript/report generation failed, generating separately: {e}")
+
+        transcript_future = _generation_executor.submit(
+            self.generate_conversational_transcript, raw_text, transcript_prompt
+        )
+        report = self.generate_report_from_text(raw_text, user_info, report_prompt)
+        return transcript_future.result(), report
 
     def generate_ai_communication_review(self, transcript, user_info):
         """Generate AI communication review for peer review system"""
@@ -551,8 +667,11 @@ Format it as a natural dialogue where:
         except Exception as e:
             return f"Error generating AI communication review: {str(e)}"
 
-    def create_word_document_with_emojis(self, report_content):
-        """Create a Word document from the report content with emoji support"""
+    def create_word_document_with_emojis(self, report_content, output=None):
+        """Create a Word document from the report content with emoji support.
+
+        Writes into ``output`` (any binary file-like object) when given, otherwise a new BytesIO.
+        """
         doc = docx.Document()
 
         # Set document encoding and font for emoji support
@@ -610,15 +729,18 @@ Format it as a natural dialogue where:
                 run.font.name = "Segoe UI Emoji"
                 run.font.size = docx.shared.Pt(10)
 
-        # Save to BytesIO object
-        docx_bytes = io.BytesIO()
+        # Save to the caller's sink or a BytesIO object
+        docx_bytes = output if output is not None else io.BytesIO()
         doc.save(docx_bytes)
         docx_bytes.seek(0)
 
         return docx_bytes
 
-    def create_pdf_alternative(self, report_content):
-        """Create PDF using reportlab instead of WeasyPrint"""
+    def create_pdf_alternative(self, report_content, output=None):
+        """Create PDF using reportlab instead of WeasyPrint.
+
+        Writes into ``output`` (any binary file-like object) when given, otherwise a new BytesIO.
+        """
         from reportlab.lib.pagesizes import letter, A4
         from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
         from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -656,7 +778,7 @@ Format it as a natural dialogue where:
         for emoji, replacement in emoji_map.items():
             pdf_content = pdf_content.replace(emoji, replacement)
 
-        buffer = io.BytesIO()
+        buffer = output if output is not None else io.BytesIO()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=A4,
@@ -759,9 +881,9 @@ Format it as a natural dialogue where:
 
         return buffer
 
-    def create_pdf_with_emojis(self, report_content):
+    def create_pdf_with_emojis(self, report_content, output=None):
         """Alias for create_pdf_alternative for backward compatibility"""
-        return self.create_pdf_alternative(report_content)
+        return self.create_pdf_alternative(report_content, output=output)
 
     def create_word_document(self, report_content):
         """Legacy method - calls the emoji version"""
@@ -896,12 +1018,11 @@ CRITICAL INSTRUCTIONS FOR NAME AND GENDER USAGE:
                 response_text = response.text.strip()
 
                 # Remove markdown code blocks if present
-                if response_text.startswith("```json"):
-                    response_text = response_text[7:]  # Remove ```json
-                if response_text.startswith("```"):
-                    response_text = response_text[3:]  # Remove ```
-                if response_text.endswith("```"):
-                    response_text = response_text[:-3]  # Remove trailing ```
+                response_text = (
+                    response_text.removeprefix("```json")
+                    .removeprefix("```")
+                    .removesuffix("```")
+                )
 
                 # Find JSON object in the text
                 start_idx = response_text.find("{")
@@ -1399,7 +1520,11 @@ CRITICAL INSTRUCTIONS FOR NAME AND GENDER USAGE:
     def generate_topic_suggestions(
         self, observer_data, child_data, child_name, child_id=None
     ):
-        """Generate topic suggestions using Gemini AI based on observation history"""
+        """Generate topic suggestions using Gemini AI based on observation history.
+
+        Returns (suggestions, generated); generated is False when Gemini failed and
+        the canned _fallback_suggestions were used instead.
+        """
         try:
             # Get child information with gender
             from models.database import get_child_by_id
@@ -1520,13 +1645,13 @@ Please provide suggestions in this exact format:
             )
 
             if response and response.text:
-                return response.text.strip()
+                return response.text.strip(), True
             else:
-                return self._fallback_suggestions(child_name)
+                return self._fallback_suggestions(child_name), False
 
         except Exception as e:
             logger.error(f"Error generating topic suggestions: {str(e)}")
-            return self._fallback_suggestions(child_name)
+            return self._fallback_suggestions(child_name), False
 
     def _fallback_suggestions(self, child_name, child_id=None):
         """Fallback suggestions when AI fails"""
@@ -1553,4 +1678,19 @@ Please provide suggestions in this exact format:
 - Build confidence through hands-on activities
 - Develop communication and expression skills
 
-🌟 **SESSION TIP:** Start with what interests {child_name} most and build the lesson around {pronouns["possessive"]} natural curiosity!"""
\ No newline at end of file
+🌟 **SESSION TIP:** Start with what interests {child_name} most and build the lesson around {pronouns["possessive"]} natural curiosity!"""
+
+
+# The extractor only holds API configuration, so requests share one instance
+_shared_extractor = None
+_shared_extractor_lock = threading.Lock()
+
+
+def get_observation_extractor():
+    """Get the shared ObservationExtractor, creating it on first use"""
+    global _shared_extractor
+    if _shared_extractor is None:
+        with _shared_extractor_lock:
+            if _shared_extractor is None:
+                _shared_extractor = ObservationExtractor()
+    return _shared_extractor
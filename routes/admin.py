@@ -6,25 +6,79 @@ from models.database import (
     get_organizations, create_organization, get_pending_observer_applications,
     review_observer_application, get_users_by_organization, get_organization_by_id,
     auto_assign_parent_to_organization, get_children_by_organization,
-    get_observer_child_mappings_by_organization
+    get_observer_child_mappings_by_organization, get_children_by_names, get_organizations_by_names,
+    enqueue_audit_log, invalidate_principal_cache
 )
 from models.observation_extractor import ObservationExtractor
 from utils.decorators import admin_required
+from utils.downloads import new_document_spool, send_spooled_document
 import pandas as pd
 import uuid
+import secrets
 import json
-from datetime import datetime
-import io
+from datetime import datetime, timezone
+import hashlib
+import itertools
 import re
 import urllib.parse
 import logging
 import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 # Set up logging to replace print statements
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__)
 
+# Shared pool for overlapping independent Supabase reads within a request
+_lookup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='admin-lookup')
+
+# Static bulk-upload CSV templates, encoded once at import: template_type -> (body, download name)
+CSV_TEMPLATES = {
+    'children': (b"name,birth_date,grade\nJohn Doe,2015-01-01,Grade 1\nJane Smith,2016-02-15,Grade 2",
+                 "children_template.csv"),
+    'parents': (b"name,email,password\nJohn Parent,john.parent@example.com,password123\nJane Parent,jane.parent@example.com,password456",
+                "parents_template.csv"),
+    'observers': (b"name,email,password\nJohn Observer,john.observer@example.com,password123\nJane Observer,jane.observer@example.com,password456",
+                  "observers_template.csv"),
+    'principals': (b"name,email,password\nJohn Principal,john.principal@example.com,password123\nJane Principal,jane.principal@example.com,password456",
+                   "principals_template.csv"),
+}
+CSV_TEMPLATE_ETAGS = {key: hashlib.sha1(body).hexdigest() for key, (body, _) in CSV_TEMPLATES.items()}
+
+# Principal applications listed per page (stats still cover every application)
+PRINCIPAL_APPLICATIONS_PAGE_SIZE = 50
+
+# Bulk child->organization CSV: columns read and rows parsed per chunk
+BULK_ASSIGN_COLUMNS = ('child_name', 'organization_name')
+BULK_ASSIGN_CHUNK_SIZE = 50_000
+
+# Canonical 8-4-4-4-12 hex form, as returned by Supabase
+_UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+
+
+def _is_uuid(value):
+    """Check whether value is a UUID string, without exceptions on the common canonical form"""
+    if not isinstance(value, str):
+        return False
+    if _UUID_RE.fullmatch(value):
+        return True
+    # Other spellings uuid.UUID accepts (no dashes, braces, urn:uuid:)
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def parallel_fetch(tasks):
+    """Run independent zero-argument lookups concurrently; returns {name: result}"""
+    futures = {name: _lookup_executor.submit(fn) for name, fn in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
 
 @admin_bp.route('/dashboard')
 @admin_required
@@ -131,7 +185,7 @@ def dashboard():
             'pending_principal': pending_principal_apps.count if pending_principal_apps.count else 0
         }
 
-        logger.info(f"Admin dashboard loaded with {analytics['total_users']} users and {analytics['organizations_count']} organizations")
+        logger.info("Admin dashboard loaded with %s users and %s organizations", analytics['total_users'], analytics['organizations_count'])
 
     except Exception as e:
         logger.error(f"Error in admin dashboard: {e}")
@@ -368,6 +422,8 @@ def add_user():
 
             result = supabase.table('users').insert(user_data).execute()
             if result.data:
+                if role == 'Principal':
+                    invalidate_principal_cache()
                 flash(f'{role} added successfully!', 'success')
             else:
                 flash(f'Error adding {role.lower()}.', 'error')
@@ -398,6 +454,8 @@ def bulk_upload_users():
     try:
         df = pd.read_csv(file)
         supabase = get_supabase_client()
+        # One timestamp for the whole upload rather than one per row
+        created_at = datetime.now(timezone.utc).isoformat()
 
         if upload_type == 'children':
             if 'name' not in df.columns:
@@ -405,14 +463,14 @@ def bulk_upload_users():
                 return redirect(url_for('admin.user_management'))
 
             children_data = []
-            for _, row in df.iterrows():
+            for row in df.to_dict('records'):
                 child_data = {
                     "id": str(uuid.uuid4()),
                     "name": row['name'],
                     "birth_date": row.get('birth_date', None) if pd.notna(row.get('birth_date')) else None,
                     "grade": row.get('grade', None) if pd.notna(row.get('grade')) else None,
                     "organization_id": organization_id,
-                    "created_at": datetime.now().isoformat()
+                    "created_at": created_at
                 }
                 children_data.append(child_data)
 
@@ -430,7 +488,7 @@ def bulk_upload_users():
                 return redirect(url_for('admin.user_management'))
 
             users_data = []
-            for _, row in df.iterrows():
+            for row in df.to_dict('records'):
                 user_data = {
                     "id": str(uuid.uuid4()),
                     "name": row['name'],
@@ -438,7 +496,7 @@ def bulk_upload_users():
                     "password": row['password'],
                     "role": upload_type[:-1].capitalize(),  # 'parents' -> 'Parent'
                     "organization_id": organization_id,
-                    "created_at": datetime.now().isoformat()
+                    "created_at": created_at
                 }
                 users_data.append(user_data)
 
@@ -447,6 +505,8 @@ def bulk_upload_users():
                 batch = users_data[i:i + batch_size]
                 supabase.table('users').insert(batch).execute()
 
+            if upload_type == 'principals':
+                invalidate_principal_cache()
             flash(f'Successfully added {len(users_data)} {upload_type}!', 'success')
 
     except Exception as e:
@@ -529,6 +589,8 @@ def bulk_upload_mappings():
     try:
         df = pd.read_csv(file)
         supabase = get_supabase_client()
+        # One timestamp for the whole upload rather than one per row
+        created_at = datetime.now(timezone.utc).isoformat()
 
         if mapping_type == 'observer_child':
             if not all(col in df.columns for col in ['observer_id', 'child_id']):
@@ -536,12 +598,12 @@ def bulk_upload_mappings():
                 return redirect(url_for('admin.mappings'))
 
             mappings_data = []
-            for _, row in df.iterrows():
+            for observer_id, child_id in df[['observer_id', 'child_id']].itertuples(index=False, name=None):
                 mapping_data = {
                     "id": str(uuid.uuid4()),
-                    "observer_id": row['observer_id'],
-                    "child_id": row['child_id'],
-                    "created_at": datetime.now().isoformat()
+                    "observer_id": observer_id,
+                    "child_id": child_id,
+                    "created_at": created_at
                 }
                 mappings_data.append(mapping_data)
 
@@ -559,9 +621,9 @@ def bulk_upload_mappings():
             parent_email_to_id = {p['email'].lower(): p['id'] for p in parents}
 
             success_count = 0
-            for _, row in df.iterrows():
-                parent_email = row['parent_email'].strip().lower()
-                child_name = row['child_name'].strip().lower()
+            for parent_email, child_name in df[['parent_email', 'child_name']].itertuples(index=False, name=None):
+                parent_email = parent_email.strip().lower()
+                child_name = child_name.strip().lower()
 
                 parent_id = parent_email_to_id.get(parent_email)
                 child_id = child_name_to_id.get(child_name)
@@ -815,7 +877,8 @@ def download_admin_report():
 
         # Create Word document
         extractor = ObservationExtractor()
-        doc_buffer = extractor.create_word_document_with_emojis(formatted_report)
+        doc_buffer = new_document_spool()
+        extractor.create_word_document_with_emojis(formatted_report, output=doc_buffer)
 
         # Create filename
         student_name = report['student_name']
@@ -828,11 +891,10 @@ def download_admin_report():
         date = report['date'] if report['date'] else datetime.now().strftime('%Y-%m-%d')
         filename = f"admin_report_{clean_name}_{date}.docx"
 
-        return send_file(
+        return send_spooled_document(
             doc_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            filename,
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
         )
 
     except Exception as e:
@@ -874,7 +936,8 @@ def download_admin_pdf():
 
         # Create PDF
         extractor = ObservationExtractor()
-        pdf_buffer = extractor.create_pdf_with_emojis(formatted_report)
+        pdf_buffer = new_document_spool()
+        extractor.create_pdf_with_emojis(formatted_report, output=pdf_buffer)
 
         # Create filename
         student_name = report['student_name']
@@ -887,12 +950,7 @@ def download_admin_pdf():
         date = report['date'] if report['date'] else datetime.now().strftime('%Y-%m-%d')
         filename = f"admin_report_{clean_name}_{date}.pdf"
 
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
-        )
+        return send_spooled_document(pdf_buffer, filename, 'application/pdf')
 
     except Exception as e:
         flash(f'Error downloading PDF: {str(e)}', 'error')
@@ -958,6 +1016,7 @@ def delete_user(user_id):
     try:
         supabase = get_supabase_client()
         supabase.table('users').delete().eq('id', user_id).execute()
+        invalidate_principal_cache()
         flash('User deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting user: {str(e)}', 'error')
@@ -1029,16 +1088,20 @@ def observer_applications():
         organizations_response = supabase.table('organizations').select('*').order('name').execute()
         organizations = organizations_response.data if organizations_response.data else []
         
-        # FIXED: Calculate statistics using application_status column
-        pending_count = len([app for app in applications if app.get('application_status') == 'pending'])
-        approved_count = len([app for app in applications if app.get('application_status') == 'approved'])
-        rejected_count = len([app for app in applications if app.get('application_status') == 'rejected'])
+        # FIXED: Calculate statistics using application_status column, aggregated in Postgres
+        try:
+            counts_response = supabase.table('observer_application_status_counts').select('application_status, count').execute()
+            status_counts = Counter({row['application_status']: row['count'] for row in counts_response.data or []})
+        except Exception as e:
+            # View not deployed yet (see sql/observer_application_status_counts.sql) - count locally
+            logger.warning(f"Status count view unavailable, counting locally: {e}")
+            status_counts = Counter(app.get('application_status') for app in applications)
         
         stats = {
-            'total': len(applications),
-            'pending': pending_count,
-            'approved': approved_count,
-            'rejected': rejected_count
+            'total': sum(status_counts.values()),
+            'pending': status_counts.get('pending', 0),
+            'approved': status_counts.get('approved', 0),
+            'rejected': status_counts.get('rejected', 0)
         }
         
         return render_template('admin/observer_applications.html', 
@@ -1076,57 +1139,32 @@ def review_observer_application(application_id):
 
         app_data = application.data[0]
 
+        # Handle admin_id properly
+        if admin_id == 'admin' or not admin_id:
+            admin_uuid = str(uuid.uuid4())
+        else:
+            admin_uuid = admin_id
+
         if action == 'approve':
             if not organization_id:
                 flash('Please select an organization for the observer', 'error')
                 return redirect(url_for('admin.view_observer_application', application_id=application_id))
 
             # Generate temporary password
-            temp_password = f"Observer{uuid.uuid4().hex[:8]}"
-
-            # Handle admin_id properly
-            if admin_id == 'admin' or not admin_id:
-                admin_uuid = str(uuid.uuid4())
-            else:
-                admin_uuid = admin_id
+            temp_password = f"Observer{secrets.token_urlsafe(6)}"
+
+            # Create the observer account and mark the application approved in one transaction
+            # (see sql/approve_observer_application.sql)
+            result = supabase.rpc('approve_observer_application', {
+                'app_id': application_id,
+                'org_id': organization_id,
+                'temp_pw': temp_password,
+                'admin_id': admin_uuid,
+                'comments': admin_comments
+            }).execute()
 
-            # Create observer user account
-            observer_data = {
-                'id': str(uuid.uuid4()),
-                'email': app_data['applicant_email'],
-                'name': app_data['applicant_name'],
-                'password': temp_password,
-                'role': 'Observer',
-                'organization_id': organization_id,
-                'phone': app_data.get('applicant_phone'),
-                'created_at': datetime.now().isoformat(),
-                'created_by': admin_uuid
-            }
-
-            # Insert observer user
-            user_result = supabase.table('users').insert(observer_data).execute()
-
-            if user_result.data:
-                # FIXED: Update using correct column names
-                update_data = {
-                    'application_status': 'approved',  # Use application_status instead of status
-                    'status': 'approved',  # Also update status for consistency
-                    'reviewed_at': datetime.now().isoformat(),
-                    'reviewed_by': admin_uuid,
-                    'organization_id': organization_id,
-                    'temp_password': temp_password,
-                    'admin_comments': admin_comments,
-                    'review_notes': admin_comments  # Also update review_notes
-                }
-
-                supabase.table('observer_applications').update(update_data).eq('id', application_id).execute()
-
-                # Get organization name
-                try:
-                    org_response = supabase.table('organizations').select('name').eq('id', organization_id).execute()
-                    org_name = org_response.data[0]['name'] if org_response.data else 'Unknown Organization'
-                except:
-                    org_name = 'Unknown Organization'
+            if result.data:
+                org_name = result.data[0].get('org_name') or 'Unknown Organization'
 
                 flash(
                     f'Observer application approved! {app_data["applicant_name"]} has been created as an observer for {org_name}.',
@@ -1141,12 +1179,6 @@ def review_observer_application(application_id):
                 flash('Please provide a reason for rejection', 'error')
                 return redirect(url_for('admin.view_observer_application', application_id=application_id))
 
-            # Handle admin_id for rejection
-            if admin_id == 'admin' or not admin_id:
-                admin_uuid = str(uuid.uuid4())
-            else:
-                admin_uuid = admin_id
-
             # FIXED: Update using correct column names
             update_data = {
                 'application_status': 'rejected',  # Use application_status instead of status
@@ -1184,21 +1216,26 @@ def view_observer_application(application_id):
 
         app_data = application.data[0]
 
+        # Reviewer, organization and dropdown lookups are independent - run them concurrently
+        lookups = {'organizations': lambda: supabase.table('organizations').select('*').order('name').execute()}
+        if app_data.get('reviewed_by'):
+            lookups['reviewer'] = lambda: supabase.table('users').select('name').eq('id', app_data['reviewed_by']).execute()
+        if app_data.get('organization_id'):
+            lookups['organization'] = lambda: supabase.table('organizations').select('name').eq('id', app_data['organization_id']).execute()
+        results = parallel_fetch(lookups)
+
         # Get reviewer info if reviewed
         reviewer_info = None
-        if app_data.get('reviewed_by'):
-            reviewer = supabase.table('users').select('name').eq('id', app_data['reviewed_by']).execute()
-            reviewer_info = reviewer.data[0] if reviewer.data else None
+        if 'reviewer' in results:
+            reviewer_info = results['reviewer'].data[0] if results['reviewer'].data else None
 
         # Get organization info if assigned
         organization_info = None
-        if app_data.get('organization_id'):
-            org = supabase.table('organizations').select('name').eq('id', app_data['organization_id']).execute()
-            organization_info = org.data[0] if org.data else None
+        if 'organization' in results:
+            organization_info = results['organization'].data[0] if results['organization'].data else None
 
         # Get organizations for assignment dropdown
-        organizations_response = supabase.table('organizations').select('*').order('name').execute()
-        organizations = organizations_response.data if organizations_response.data else []
+        organizations = results['organizations'].data if results['organizations'].data else []
 
         return render_template('admin/view_observer_application.html',
                                application=app_data,
@@ -1225,7 +1262,7 @@ def send_observer_decision_notification(app_data, organization_id, org_name, app
             
             Admin Comments: {admin_comments or 'None'}
             """
-            logger.info(f"Observer application approved for {app_data['applicant_email']} - assigned to {org_name}")
+            logger.info("Observer application approved for %s - assigned to %s", app_data['applicant_email'], org_name)
         else:
             message = f"""
             We regret to inform you that your observer application has been rejected.
@@ -1235,7 +1272,7 @@ def send_observer_decision_notification(app_data, organization_id, org_name, app
             
             You may reapply in the future if circumstances change.
             """
-            logger.info(f"Observer application rejected for {app_data['applicant_email']} - reason: {rejection_reason}")
+            logger.info("Observer application rejected for %s - reason: %s", app_data['applicant_email'], rejection_reason)
             
         # TODO: Implement actual email sending here
         # send_email(app_data['applicant_email'], subject, message)
@@ -1257,6 +1294,7 @@ def assign_observer_organization():
         supabase.table('users').update({
             'organization_id': organization_id
         }).eq('id', observer_id).execute()
+        invalidate_principal_cache(observer_id)
 
         flash('Observer assigned to organization successfully!', 'success')
     except Exception as e:
@@ -1382,6 +1420,8 @@ def fix_organization_assignments():
             supabase.table('users').update({
                 'organization_id': default_org_id
             }).eq('id', user['id']).execute()
+        if unassigned_users:
+            invalidate_principal_cache()
 
         # Update children without organization_id
         unassigned_children = supabase.table('children').select('*').is_('organization_id', 'null').execute().data
@@ -1407,7 +1447,7 @@ def assign_child_organization():
         child_id = request.form.get('child_id')
         organization_id = request.form.get('organization_id')
 
-        logger.info(f"Assigning child to org: child_id={child_id}, organization_id={organization_id}")
+        logger.info("Assigning child to org: child_id=%s, organization_id=%s", child_id, organization_id)
 
         if not child_id or not organization_id:
             flash('Please select both child and organization.', 'error')
@@ -1416,13 +1456,13 @@ def assign_child_organization():
         supabase = get_supabase_client()
 
         # Verify child exists
-        child_check = supabase.table('children').select('*').eq('id', child_id).execute()
+        child_check = supabase.table('children').select('id').eq('id', child_id).limit(1).execute()
         if not child_check.data:
             flash('Child not found.', 'error')
             return redirect(url_for('admin.user_management'))
 
         # Verify organization exists
-        org_check = supabase.table('organizations').select('*').eq('id', organization_id).execute()
+        org_check = supabase.table('organizations').select('id').eq('id', organization_id).limit(1).execute()
         if not org_check.data:
             flash('Organization not found.', 'error')
             return redirect(url_for('admin.user_management'))
@@ -1433,12 +1473,12 @@ def assign_child_organization():
         }).eq('id', child_id).execute()
 
         if result.data:
-            logger.info(f"Successfully assigned child {child_id} to organization {organization_id}")
+            logger.info("Successfully assigned child %s to organization %s", child_id, organization_id)
 
             # Auto-assign associated parent to same organization
             try:
                 auto_assign_parent_to_organization(child_id, organization_id)
-                logger.info(f"Auto-assigned parent for child {child_id}")
+                logger.info("Auto-assigned parent for child %s", child_id)
 
                 # Log the assignment for audit trail (with proper admin_id)
                 admin_id = session.get('user_id')
@@ -1470,40 +1510,20 @@ def bulk_assign_children_organization():
     file = request.files['file']
 
     try:
-        df = pd.read_csv(file)
-        supabase = get_supabase_client()
+        # Only parse the two columns we use, as strings, a chunk at a time
+        reader = pd.read_csv(file, usecols=lambda col: col in BULK_ASSIGN_COLUMNS, dtype=str,
+                             chunksize=BULK_ASSIGN_CHUNK_SIZE)
+        first_chunk = next(reader, None)
 
-        if not all(col in df.columns for col in ['child_name', 'organization_name']):
+        if first_chunk is None or not all(col in first_chunk.columns for col in BULK_ASSIGN_COLUMNS):
             flash('CSV must contain "child_name" and "organization_name" columns', 'error')
             return redirect(url_for('admin.user_management'))
 
-        # Get all children and organizations for mapping
-        children = get_children()
-        organizations = get_organizations()
-
-        child_name_to_id = {child['name'].lower(): child['id'] for child in children}
-        org_name_to_id = {org['name'].lower(): org['id'] for org in organizations}
+        supabase = get_supabase_client()
 
         success_count = 0
-        for _, row in df.iterrows():
-            child_name = row['child_name'].strip().lower()
-            org_name = row['organization_name'].strip().lower()
-
-            child_id = child_name_to_id.get(child_name)
-            org_id = org_name_to_id.get(org_name)
-
-            if child_id and org_id:
-                # Update child's organization
-                result = supabase.table('children').update({
-                    'organization_id': org_id
-                }).eq('id', child_id).execute()
-
-                if result.data:
-                    # Auto-assign parent
-                    auto_assign_parent_to_organization(child_id, org_id)
-                    # Log the assignment
-                    log_organization_change(child_id, 'child', org_id, 'bulk_assigned')
-                    success_count += 1
+        for chunk in itertools.chain([first_chunk], reader):
+            success_count += _assign_children_chunk(supabase, chunk)
 
         flash(f'Successfully assigned {success_count} children to organizations!', 'success')
 
@@ -1514,6 +1534,51 @@ def bulk_assign_children_organization():
     return redirect(url_for('admin.user_management'))
 
 
+def _lowercase_name_to_id(rows):
+    """Map lowercased name -> id for rows fetched with name and id columns"""
+    if not rows:
+        return {}
+    frame = pd.DataFrame(rows, columns=['name', 'id'])
+    return dict(zip(frame['name'].str.lower().to_numpy(), frame['id'].to_numpy()))
+
+
+def _assign_children_chunk(supabase, chunk):
+    """Apply one CSV chunk of child->organization assignments; returns the number of children updated"""
+    child_keys = chunk['child_name'].str.strip().str.lower()
+    org_keys = chunk['organization_name'].str.strip().str.lower()
+
+    # Only fetch the children and organizations this chunk actually names
+    children = get_children_by_names(child_keys.dropna().unique().tolist())
+    organizations = get_organizations_by_names(org_keys.dropna().unique().tolist())
+
+    child_name_to_id = _lowercase_name_to_id(children)
+    org_name_to_id = _lowercase_name_to_id(organizations)
+
+    # Resolve rows first with vectorized string ops (last row wins for a repeated child)
+    resolved = pd.DataFrame({
+        'child_id': child_keys.map(child_name_to_id),
+        'org_id': org_keys.map(org_name_to_id)
+    }).dropna()
+    child_to_org = dict(resolved.to_records(index=False).tolist())
+    if not child_to_org:
+        return 0
+
+    # Only log if we have a valid admin_id
+    admin_id = session.get('user_id')
+    if not _is_uuid(admin_id):
+        logger.warning(f"Skipping audit log - invalid admin_id: {admin_id}")
+        admin_id = None
+
+    # Children, their parents and the audit rows are updated in one transaction
+    # (see sql/bulk_assign_children.sql)
+    result = supabase.rpc('bulk_assign_children', {
+        'pairs': [{'child_id': child_id, 'organization_id': org_id} for child_id, org_id in child_to_org.items()],
+        'acting_admin': admin_id
+    }).execute()
+
+    return result.data or 0
+
+
 @admin_bp.route('/organization_audit_log')
 @admin_required
 def organization_audit_log():
@@ -1535,28 +1600,27 @@ def organization_audit_log():
 def log_organization_change(entity_id, entity_type, organization_id, action, admin_id=None):
     """Log organization assignment changes for audit trail - FIXED"""
     try:
-        supabase = get_supabase_client()
-
         # Get admin_id from session if not provided
         if not admin_id:
             admin_id = session.get('user_id')
 
+        # Only log if we have a valid admin_id
+        if not admin_id or admin_id == 'admin':  # Avoid the string 'admin' that was causing UUID errors
+            logger.warning(f"Skipping audit log - invalid admin_id: {admin_id}")
+            return
+
+        # id is generated by Postgres (see sql/organization_audit_log_id_default.sql)
         log_data = {
-            'id': str(uuid.uuid4()),
             'entity_id': entity_id,
             'entity_type': entity_type,
             'organization_id': organization_id,
             'action': action,
             'admin_id': admin_id,  # This should be a proper UUID
-            'created_at': datetime.now().isoformat()
+            'created_at': datetime.now(timezone.utc).isoformat()
         }
 
-        # Only log if we have a valid admin_id
-        if admin_id and admin_id != 'admin':  # Avoid the string 'admin' that was causing UUID errors
-            supabase.table('organization_audit_log').insert(log_data).execute()
-            logger.info(f"Logged organization change: {entity_type} {entity_id} {action} to org {organization_id}")
-        else:
-            logger.warning(f"Skipping audit log - invalid admin_id: {admin_id}")
+        enqueue_audit_log('organization_audit_log', log_data)
+        logger.info("Queued organization change log: %s %s %s to org %s", entity_type, entity_id, action, organization_id)
 
     except Exception as e:
         logger.error(f'Error logging organization change: {e}')
@@ -1565,8 +1629,6 @@ def log_organization_change(entity_id, entity_type, organization_id, action, adm
 def log_mapping_change(entity1_id, entity2_id, mapping_type, action):
     """Log mapping changes for audit trail"""
     try:
-        supabase = get_supabase_client()
-
         log_data = {
             'id': str(uuid.uuid4()),
             'entity1_id': entity1_id,
@@ -1574,10 +1636,10 @@ def log_mapping_change(entity1_id, entity2_id, mapping_type, action):
             'mapping_type': mapping_type,
             'action': action,
             'admin_id': session.get('user_id'),
-            'created_at': datetime.now().isoformat()
+            'created_at': datetime.now(timezone.utc).isoformat()
         }
 
-        supabase.table('mapping_audit_log').insert(log_data).execute()
+        enqueue_audit_log('mapping_audit_log', log_data)
     except Exception as e:
         logger.error(f'Error logging mapping change: {e}')
 
@@ -1590,7 +1652,7 @@ def assign_user_organization():
         user_id = request.form.get('user_id')
         organization_id = request.form.get('organization_id')
 
-        logger.info(f"Assigning user to org: user_id={user_id}, organization_id={organization_id}")
+        logger.info("Assigning user to org: user_id=%s, organization_id=%s", user_id, organization_id)
 
         if not user_id or not organization_id:
             flash('Please select both user and organization.', 'error')
@@ -1599,13 +1661,13 @@ def assign_user_organization():
         supabase = get_supabase_client()
 
         # Verify user exists
-        user_check = supabase.table('users').select('*').eq('id', user_id).execute()
+        user_check = supabase.table('users').select('id').eq('id', user_id).limit(1).execute()
         if not user_check.data:
             flash('User not found.', 'error')
             return redirect(url_for('admin.user_management'))
 
         # Verify organization exists
-        org_check = supabase.table('organizations').select('*').eq('id', organization_id).execute()
+        org_check = supabase.table('organizations').select('id').eq('id', organization_id).limit(1).execute()
         if not org_check.data:
             flash('Organization not found.', 'error')
             return redirect(url_for('admin.user_management'))
@@ -1616,7 +1678,9 @@ def assign_user_organization():
         }).eq('id', user_id).execute()
 
         if result.data:
-            logger.info(f"Successfully assigned user {user_id} to organization {organization_id}")
+            logger.info("Successfully assigned user %s to organization %s", user_id, organization_id)
+            # The user may be a principal, which changes the mapping for a whole organization
+            invalidate_principal_cache()
 
             # Log the assignment for audit trail (with proper admin_id)
             admin_id = session.get('user_id')
@@ -1648,13 +1712,6 @@ def create_observer_child_mapping():
 
         supabase = get_supabase_client()
 
-        # Check if mapping already exists
-        existing = supabase.table('observer_child_mappings').select('id').eq('observer_id', observer_id).eq('child_id', child_id).execute()
-
-        if existing.data:
-            flash('This observer-child mapping already exists.', 'warning')
-            return redirect(url_for('admin.user_management'))
-
         # Create mapping
         mapping_data = {
             "id": str(uuid.uuid4()),
@@ -1663,14 +1720,17 @@ def create_observer_child_mapping():
             "created_at": datetime.now().isoformat()
         }
 
-        result = supabase.table('observer_child_mappings').insert(mapping_data).execute()
+        # INSERT ... ON CONFLICT DO NOTHING - only a newly inserted row comes back
+        result = supabase.table('observer_child_mappings').upsert(
+            mapping_data, on_conflict='observer_id,child_id', ignore_duplicates=True
+        ).execute()
 
         if result.data:
             # Log the mapping creation
             log_mapping_change(observer_id, child_id, 'observer_child', 'created')
             flash('Observer-Child mapping created successfully!', 'success')
         else:
-            flash('Error creating mapping. Please try again.', 'error')
+            flash('This observer-child mapping already exists.', 'warning')
 
     except Exception as e:
         logger.error(f'Error creating observer-child mapping: {str(e)}')
@@ -1717,31 +1777,22 @@ def create_parent_child_mapping():
 def download_csv_template(template_type):
     """Download CSV templates for bulk upload"""
     try:
-        if template_type == 'children':
-            csv_content = "name,birth_date,grade\nJohn Doe,2015-01-01,Grade 1\nJane Smith,2016-02-15,Grade 2"
-            filename = "children_template.csv"
-        elif template_type == 'parents':
-            csv_content = "name,email,password\nJohn Parent,john.parent@example.com,password123\nJane Parent,jane.parent@example.com,password456"
-            filename = "parents_template.csv"
-        elif template_type == 'observers':
-            csv_content = "name,email,password\nJohn Observer,john.observer@example.com,password123\nJane Observer,jane.observer@example.com,password456"
-            filename = "observers_template.csv"
-        elif template_type == 'principals':
-            csv_content = "name,email,password\nJohn Principal,john.principal@example.com,password123\nJane Principal,jane.principal@example.com,password456"
-            filename = "principals_template.csv"
-        else:
+        template = CSV_TEMPLATES.get(template_type)
+        if not template:
             flash('Invalid template type', 'error')
             return redirect(url_for('admin.user_management'))
 
-        output = io.StringIO()
-        output.write(csv_content)
-        output.seek(0)
-
-        return Response(
-            output.getvalue(),
+        csv_content, filename = template
+        # The body is a prebuilt bytes constant, so hand it to Response directly
+        response = Response(
+            csv_content,
             mimetype='text/csv',
-            headers={"Content-Disposition": f"attachment;filename={filename}"}
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
+        response.set_etag(CSV_TEMPLATE_ETAGS[template_type])
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+        return response.make_conditional(request)
 
     except Exception as e:
         flash(f'Error generating template: {str(e)}', 'error')
@@ -1754,21 +1805,34 @@ def principal_applications():
     """View and manage principal applications"""
     try:
         supabase = get_supabase_client()
-        # Get all principal applications with counts by status
-        applications_response = supabase.table('principal_applications').select('*').order('applied_at', desc=True).execute()
-        applications = applications_response.data if applications_response.data else []
-        # Get organizations for assignment
-        organizations_response = supabase.table('organizations').select('*').order('name').execute()
-        organizations = organizations_response.data if organizations_response.data else []
-        # Calculate statistics
-        pending_count = len([app for app in applications if app.get('status') == 'pending'])
-        approved_count = len([app for app in applications if app.get('status') == 'approved'])
-        rejected_count = len([app for app in applications if app.get('status') == 'rejected'])
+
+        def fetch_status_counts():
+            # Statistics over all applications, aggregated in Postgres
+            try:
+                return supabase.table('principal_application_status_counts').select('status, count').execute()
+            except Exception as e:
+                # View not deployed yet (see sql/principal_application_status_counts.sql)
+                logger.warning(f"Status count view unavailable, counting locally: {e}")
+                return None
+
+        results = parallel_fetch({
+            # Most recent principal applications for the table
+            'applications': lambda: supabase.table('principal_applications').select('*').order('applied_at', desc=True).range(0, PRINCIPAL_APPLICATIONS_PAGE_SIZE - 1).execute(),
+            # Organizations for assignment
+            'organizations': lambda: supabase.table('organizations').select('*').order('name').execute(),
+            'status_counts': fetch_status_counts
+        })
+        applications = results['applications'].data if results['applications'].data else []
+        organizations = results['organizations'].data if results['organizations'].data else []
+        if results['status_counts'] is not None:
+            status_counts = Counter({row['status']: row['count'] for row in results['status_counts'].data or []})
+        else:
+            status_counts = Counter(app.get('status') for app in applications)
         stats = {
-            'total': len(applications),
-            'pending': pending_count,
-            'approved': approved_count,
-            'rejected': rejected_count
+            'total': sum(status_counts.values()),
+            'pending': status_counts.get('pending', 0),
+            'approved': status_counts.get('approved', 0),
+            'rejected': status_counts.get('rejected', 0)
         }
         return render_template('admin/principal_applications.html',
                              applications=applications,
@@ -1795,11 +1859,7 @@ def review_principal_application(application_id):
         admin_comments = request.form.get('admin_comments', '')
         
         # CRITICAL FIX: Validate all UUIDs before database operations
-        try:
-            uuid.UUID(application_id)  # Validate application_id
-            if admin_id != 'admin':  # Check if admin_id is not the string "admin"
-                uuid.UUID(admin_id)  # Validate admin_id if it's not "admin"
-        except (ValueError, TypeError):
+        if not _is_uuid(application_id) or (admin_id != 'admin' and not _is_uuid(admin_id)):
             flash('Invalid ID format detected', 'error')
             return redirect(url_for('admin.principal_applications'))
         
@@ -1813,31 +1873,25 @@ def review_principal_application(application_id):
         
         app_data = application.data[0]
         
+        # CRITICAL FIX: Handle admin_id properly
+        if admin_id == 'admin':
+            # If admin_id is "admin", use the actual admin user ID from database
+            admin_uuid = _default_admin_uuid() or str(uuid.uuid4())  # Create new UUID if no admin found
+        else:
+            admin_uuid = admin_id
+        
         if action == 'approve':
             if not organization_id:
                 flash('Please select an organization for the principal', 'error')
                 return redirect(url_for('admin.principal_applications'))
             
             # CRITICAL FIX: Validate organization_id
-            try:
-                uuid.UUID(organization_id)
-            except (ValueError, TypeError):
+            if not _is_uuid(organization_id):
                 flash('Invalid organization ID format', 'error')
                 return redirect(url_for('admin.principal_applications'))
             
             temp_password = f"Principal{uuid.uuid4().hex[:8]}"
             
-            # CRITICAL FIX: Handle admin_id properly
-            if admin_id == 'admin':
-                # If admin_id is "admin", get the actual admin user ID from database
-                admin_user = supabase.table('users').select('id').eq('role', 'Admin').limit(1).execute()
-                if admin_user.data:
-                    admin_uuid = admin_user.data[0]['id']
-                else:
-                    admin_uuid = str(uuid.uuid4())  # Create new UUID if no admin found
-            else:
-                admin_uuid = admin_id
-            
             principal_data = {
                 'id': str(uuid.uuid4()),
                 'email': app_data['email'],
@@ -1854,6 +1908,7 @@ def review_principal_application(application_id):
             user_result = supabase.table('users').insert(principal_data).execute()
             
             if user_result.data:
+                invalidate_principal_cache()
                 supabase.table('principal_applications').update({
                     'status': 'approved',
                     'reviewed_at': datetime.now().isoformat(),
@@ -1863,7 +1918,8 @@ def review_principal_application(application_id):
                     'temp_password': temp_password
                 }).eq('id', application_id).execute()
                 
-                org_name = next((org['name'] for org in get_organizations() if org['id'] == organization_id), 'Unknown')
+                org_response = supabase.table('organizations').select('name').eq('id', organization_id).limit(1).execute()
+                org_name = org_response.data[0]['name'] if org_response.data else 'Unknown'
                 flash(f'Principal application approved! {app_data["applicant_name"]} has been created as a principal for {org_name}.', 'success')
             else:
                 flash('Error creating principal account', 'error')
@@ -1873,16 +1929,6 @@ def review_principal_application(application_id):
                 flash('Please provide a reason for rejection', 'error')
                 return redirect(url_for('admin.principal_applications'))
             
-            # CRITICAL FIX: Handle admin_id for rejection too
-            if admin_id == 'admin':
-                admin_user = supabase.table('users').select('id').eq('role', 'Admin').limit(1).execute()
-                if admin_user.data:
-                    admin_uuid = admin_user.data[0]['id']
-                else:
-                    admin_uuid = str(uuid.uuid4())
-            else:
-                admin_uuid = admin_id
-            
             supabase.table('principal_applications').update({
                 'status': 'rejected',
                 'reviewed_at': datetime.now().isoformat(),
@@ -1900,6 +1946,29 @@ def review_principal_application(application_id):
     return redirect(url_for('admin.principal_applications'))
 
 
+# Admin user id found by _default_admin_uuid. Only a found id is cached, so a lookup
+# that finds no Admin (or fails) is retried on the next call
+_default_admin_cache = TTLCache(maxsize=1, ttl=300)
+_default_admin_cache_lock = threading.Lock()
+
+
+def _default_admin_uuid():
+    """ID of an Admin user, used when the session holds the legacy 'admin' id (cached for 5 minutes)"""
+    with _default_admin_cache_lock:
+        admin_uuid = _default_admin_cache.get('id')
+    if admin_uuid is not None:
+        return admin_uuid
+
+    supabase = get_supabase_client()
+    admin_user = supabase.table('users').select('id').eq('role', 'Admin').limit(1).execute()
+    if not admin_user.data:
+        return None
+    admin_uuid = admin_user.data[0]['id']
+    with _default_admin_cache_lock:
+        _default_admin_cache['id'] = admin_uuid
+    return admin_uuid
+
+
 def send_principal_decision_notification(app_data, organization_id, org_name, approved, temp_password=None, admin_comments=None, rejection_reason=None):
     try:
         if approved:
@@ -1910,7 +1979,7 @@ def send_principal_decision_notification(app_data, organization_id, org_name, ap
             Please log in and change your password immediately.
             Admin Comments: {admin_comments or 'None'}
             """
-            logger.info(f"Principal application approved for {app_data['email']} - assigned to {org_name}")
+            logger.info("Principal application approved for %s - assigned to %s", app_data['email'], org_name)
         else:
             message = f"""
             We regret to inform you that your principal application has been rejected.
@@ -1918,7 +1987,7 @@ def send_principal_decision_notification(app_data, organization_id, org_name, ap
             Admin Comments: {admin_comments or 'None'}
             You may reapply in the future if circumstances change.
             """
-            logger.info(f"Principal application rejected for {app_data['email']} - reason: {rejection_reason}")
+            logger.info("Principal application rejected for %s - reason: %s", app_data['email'], rejection_reason)
         # TODO: Implement actual email sending here
     except Exception as e:
         logger.error(f"Error sending principal decision notification: {e}")
@@ -1926,15 +1995,14 @@ def send_principal_decision_notification(app_data, organization_id, org_name, ap
 
 def create_admin_audit_log(admin_id, action, description):
     try:
-        supabase = get_supabase_client()
         audit_data = {
             'id': str(uuid.uuid4()),
             'admin_id': admin_id,
             'action': action,
             'description': description,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }
-        supabase.table('admin_audit_log').insert(audit_data).execute()
+        enqueue_audit_log('admin_audit_log', audit_data)
     except Exception as e:
         logger.error(f"Error creating audit log: {e}")
 @admin_bp.route('/observer_report_counts')
@@ -1944,22 +2012,46 @@ def observer_report_counts():
         supabase = get_supabase_client()
         # Get all observers
         observers = supabase.table('users').select('id, name, email').eq('role', 'Observer').execute().data
-        # Count processed reports for each observer
+        # Count processed reports for every observer in one grouped query
+        report_counts = _observer_report_count_map(supabase)
         data = []
         for obs in observers:
-            processed_reports = supabase.table('observations').select('id').eq('username', obs['id']).eq('processed_by_admin', False).execute().data
-            admin_processed = supabase.table('observations').select('id').eq('username', obs['id']).eq('processed_by_admin', True).execute().data
+            if report_counts is not None:
+                observer_counts = report_counts.get(obs['id'], {})
+                count_observer = observer_counts.get(False, 0)
+                count_admin = observer_counts.get(True, 0)
+            else:
+                # Exact counts from Content-Range; limit(1) keeps the body to at most one id
+                processed_reports = supabase.table('observations').select('id', count='exact').eq('username', obs['id']).eq('processed_by_admin', False).limit(1).execute()
+                admin_processed = supabase.table('observations').select('id', count='exact').eq('username', obs['id']).eq('processed_by_admin', True).limit(1).execute()
+                count_observer = processed_reports.count or 0
+                count_admin = admin_processed.count or 0
             data.append({
                 'observer': obs,
-                'count_observer': len(processed_reports),
-                'count_admin': len(admin_processed),
-                'total': len(processed_reports) + len(admin_processed)
+                'count_observer': count_observer,
+                'count_admin': count_admin,
+                'total': count_observer + count_admin
             })
         return render_template('admin/observer_report_counts.html', data=data)
     except Exception as e:
         return render_template('admin/observer_report_counts.html', data=[], error=str(e))
 
 
+def _observer_report_count_map(supabase):
+    """Map observer id -> {processed_by_admin: count} via the observer_report_counts RPC, or None if unavailable"""
+    try:
+        rows = supabase.rpc('observer_report_counts', {}).execute().data or []
+    except Exception as e:
+        # Function not deployed yet (see sql/observer_report_counts.sql) - caller counts per observer
+        logger.warning(f"observer_report_counts RPC unavailable, counting per observer: {e}")
+        return None
+
+    counts = {}
+    for row in rows:
+        counts.setdefault(row['username'], {})[row['processed_by_admin']] = row['report_count']
+    return counts
+
+
 @admin_bp.route('/view_principal_application/<application_id>')
 @admin_required
 def view_principal_application(application_id):
@@ -1967,13 +2059,18 @@ def view_principal_application(application_id):
     try:
         supabase = get_supabase_client()
 
-        # Get application details
-        application = supabase.table('principal_applications').select('*').eq('id', application_id).execute()
+        # Application details and the organizations dropdown don't depend on each other
+        results = parallel_fetch({
+            'application': lambda: supabase.table('principal_applications').select('*').eq('id', application_id).execute(),
+            'organizations': lambda: supabase.table('organizations').select('*').order('name').execute()
+        })
+        application = results['application']
         if not application.data:
             flash('Application not found', 'error')
             return redirect(url_for('admin.principal_applications'))
 
         app_data = application.data[0]
+        organizations = results['organizations'].data if results['organizations'].data else []
 
         # Get reviewer info if reviewed
         reviewer_info = None
@@ -1981,15 +2078,12 @@ def view_principal_application(application_id):
             reviewer = supabase.table('users').select('name').eq('id', app_data['reviewed_by']).execute()
             reviewer_info = reviewer.data[0] if reviewer.data else None
 
-        # Get organization info if assigned
+        # Get organization info if assigned - already part of the dropdown list
         organization_info = None
         if app_data.get('organization_id'):
-            org = supabase.table('organizations').select('id', 'name').eq('id', app_data['organization_id']).execute()
-            organization_info = org.data[0] if org.data else None
-
-        # Get organizations for assignment dropdown
-        organizations_response = supabase.table('organizations').select('*').order('name').execute()
-        organizations = organizations_response.data if organizations_response.data else []
+            organization_info = next(
+                ({'id': org['id'], 'name': org['name']} for org in organizations if org['id'] == app_data['organization_id']),
+                None)
 
         return render_template(
             'admin/view_principal_application.html',
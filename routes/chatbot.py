@@ -1,130 +1,319 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, Response, stream_with_context
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+import numpy as np
+from cachetools import TTLCache
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import orjson
 import os
 import logging
+import queue
+import threading
+import time
 from config import Config
+from extensions import celery
+from utils.decorators import admin_required
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini AI using the same pattern as observation_extractor.py
-try:
-    # Use the same API key configuration as observation_extractor.py
-    gemini_api_key = Config.GOOGLE_API_KEY
-    if not gemini_api_key:
-        # Fallback to environment variable
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-
-    if gemini_api_key:
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        gemini_available = True
-        logger.info("✅ Gemini AI initialized successfully")
-    else:
-        gemini_available = False
-        logger.error("❌ Gemini API key not configured")
-except Exception as e:
-    gemini_available = False
-    logger.error(f"❌ Failed to initialize Gemini AI: {e}")
+GEMINI_API_ENDPOINT = "generativelanguage.googleapis.com"
+
+# Gemini is initialized lazily on the first chatbot request in each worker, so importing
+# the blueprint (and booting gunicorn workers) doesn't wait on client setup
+_model = None
+_model_lock = threading.Lock()
+_gemini_available = None  # None until the first initialization attempt
+
+
+def _gemini_api_key():
+    """Use the same API key configuration as observation_extractor.py"""
+    # Fallback to environment variable
+    return Config.GOOGLE_API_KEY or os.getenv("GEMINI_API_KEY")
+
+
+def _get_model():
+    """Chatbot Gemini model, initialized once on first use; None if Gemini is unavailable"""
+    global _model, _gemini_available
+    if _model is not None:
+        return _model
+
+    with _model_lock:
+        if _model is None and _gemini_available is not False:
+            try:
+                gemini_api_key = _gemini_api_key()
+                if gemini_api_key:
+                    # gRPC keeps one HTTP/2 channel per worker and multiplexes every generate_content
+                    # call over it; initializing on first use also keeps it after any gunicorn fork
+                    genai.configure(
+                        api_key=gemini_api_key,
+                        transport="grpc",
+                        client_options={"api_endpoint": GEMINI_API_ENDPOINT},
+                    )
+                    _model = genai.GenerativeModel(Config.CHATBOT_MODEL)
+                    _gemini_available = True
+                    logger.info("✅ Gemini AI initialized successfully")
+                else:
+                    _gemini_available = False
+                    logger.error("❌ Gemini API key not configured")
+            except Exception as e:
+                _gemini_available = False
+                logger.error("❌ Failed to initialize Gemini AI: %s", e)
+    return _model
+
 
 # Create blueprint
 chatbot_bp = Blueprint("chatbot", __name__)
 
+# Status can only be one of two payloads, so serialize both once
+STATUS_AVAILABLE_PAYLOAD = orjson.dumps(
+    {"status": "available", "gemini_configured": True, "message": "Chatbot service is running"}
+)
+STATUS_UNAVAILABLE_PAYLOAD = orjson.dumps(
+    {"status": "unavailable", "gemini_configured": False, "message": "Chatbot service is unavailable"}
+)
+
+
+def _json(payload):
+    """JSON response serialized with orjson"""
+    return Response(orjson.dumps(payload), mimetype="application/json")
+
+
+def _sse_event(payload):
+    """One server-sent event carrying payload as JSON"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+# Largest chatbot request body accepted; questions are short
+MAX_CHATBOT_BODY = 4096
+
+# Exact-match response cache: repeated questions (after case/whitespace folding) skip Gemini
+RESPONSE_CACHE = TTLCache(maxsize=1024, ttl=3600)
+RESPONSE_CACHE_LOCK = threading.RLock()
+cache_stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+
+def _response_cache_key(message):
+    """Cache key for a question, ignoring case and runs of whitespace"""
+    return hashlib.sha256(" ".join(message.lower().split()).encode()).hexdigest()
+
+
+# Semantic response cache: paraphrased FAQ questions reuse an earlier answer
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+SEMANTIC_CACHE_MAX = 1024
+SEMANTIC_CACHE_THRESHOLD = 0.87
+
+
+class SemanticResponseCache:
+    """In-process answer cache looked up by cosine similarity of normalized question embeddings"""
+
+    def __init__(self, max_entries, threshold):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._embeddings = None  # [N, dim] matrix of L2-normalized question embeddings
+        self._responses = []
+        self._last_used = []  # per-row use tick for LRU eviction
+        self._tick = 0
+
+    def lookup(self, query):
+        """Return the cached answer closest to query if it clears the threshold, else None"""
+        with self._lock:
+            if not self._responses:
+                return None
+            similarities = self._embeddings @ query
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            self._tick += 1
+            self._last_used[best] = self._tick
+            return self._responses[best]
+
+    def add(self, query, response):
+        """Store an answer, evicting the least recently used entry when full"""
+        with self._lock:
+            self._tick += 1
+            if self._embeddings is None:
+                self._embeddings = np.vstack([query])
+                self._responses.append(response)
+                self._last_used.append(self._tick)
+            elif len(self._responses) >= self.max_entries:
+                oldest = self._last_used.index(min(self._last_used))
+                self._embeddings[oldest] = query
+                self._responses[oldest] = response
+                self._last_used[oldest] = self._tick
+            else:
+                self._embeddings = np.vstack([self._embeddings, query])
+                self._responses.append(response)
+                self._last_used.append(self._tick)
+
+
+semantic_cache = SemanticResponseCache(SEMANTIC_CACHE_MAX, SEMANTIC_CACHE_THRESHOLD)
+
+
+def _embed_question(text):
+    """L2-normalized embedding of a chatbot question, or None if it can't be computed"""
+    try:
+        result = genai.embed_content(model=EMBEDDING_MODEL, content=text, task_type="semantic_similarity")
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    except Exception as e:
+        logger.warning("Question embedding failed, skipping semantic cache: %s", e)
+        return None
+
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+
+
+def _load_prompt(filename):
+    """Read a prompt shipped in prompts/ (read once at import)"""
+    with open(os.path.join(PROMPTS_DIR, filename), encoding="utf-8") as prompt_file:
+        return prompt_file.read()
+
+
 # Comprehensive application-specific prompt
-SANJAYA_PROMPT = """
-You are Sanjaya, the AI assistant for "Sanjaya – The Observer" application. You are named after Sanjaya from the Mahabharata, who was known for his ability to observe and report without bias.
-
-ABOUT THE APPLICATION:
-Sanjaya – The Observer is India's first structured daily observation program supervised by Legendary Principals. It's a unique educational initiative that helps parents understand their child's learning journey through ethical observation.
-
-CORE CONCEPT:
-- Children are paired with trained ethical observers
-- Observers conduct 5-minute daily sessions with children
-- Sessions are phone-based, no recordings, no digital traces
-- Observers document what children learned, felt, or experienced
-- Parents receive confidential daily reports
-- Everything is supervised by Legendary Principals from India's most respected institutions
-
-USER ROLES:
-
-1. PARENTS:
-- Receive daily confidential reports about their child's learning journey
-- Get insights into their child's emotional and academic development
-- Access monthly comprehensive reports
-- Can view their child's progress and patterns
-- Complete privacy - no recordings, no digital traces
-
-2. OBSERVERS:
-- Conduct 5-minute daily phone sessions with assigned children
-- Listen without judgment, advice, or analysis
-- Document observations in structured reports
-- Work under supervision of Legendary Principals
-- Must maintain complete confidentiality
-- Rotate assignments for child safety
-- Are NOT teachers, counselors, or therapists - just ethical listeners
-
-3. PRINCIPALS:
-- Supervise and approve observers in their region
-- Review reports and summaries from observers
-- Escalate or intervene if red flags are noticed
-- Maintain quality control and confidentiality
-- Promote trust in their educator network
-- Do NOT directly interact with students
-
-4. ADMINS:
-- Manage the entire system
-- Handle user registrations and applications
-- Monitor system health and analytics
-- Process reports and maintain data integrity
-
-KEY FEATURES:
-- 100% Private & Secure (no recordings, no digital traces)
-- Observer identity rotation for child safety
-- Phone-only communication (no monitoring tools)
-- Daily 5-minute sessions
-- Confidential reporting system
-- Supervised by Legendary Principals
-- Built by educators, for educators
-
-PRIVACY & SECURITY:
-- No recordings of any kind
-- No digital traces or monitoring
-- Observer identity is rotated regularly
-- Complete confidentiality maintained
-- Phone-based communication only
-- No data storage of conversations
-
-TESTIMONIALS (from real users):
-- "I can see a remarkable change in my child. She was an introvert but now she is opening up and is more confident." - Mr. Shah (Parent)
-- "Things which the children are reluctant to share with their parents, they share with ma'am because they have a patient listener." - Mr. Dey (Parent)
-- "I can see a vast difference for better in my daughter. She has become very regular in her work." - Mrs. Paliwal (Parent)
-- "This platform allows me to share my views and ideas freely. It helps me express positive thoughts and open up about negative ones." - Daivik (Student, 16 years)
-
-PHILOSOPHY:
-"Every child has a story to tell. My role is simply to listen, understand, and help parents see the beautiful complexity of their child's world." - Punam Jaiswal (Head of the Program)
-
-"No advice. No analysis. Just awareness. When someone truly listens, clarity follows. And children flourish."
-
-IMPORTANT GUIDELINES:
-- Always stay within the scope of this application
-- Be helpful and informative about the program
-- If asked about topics outside this application, politely redirect to Sanjaya-related topics
-- Emphasize the ethical, non-judgmental nature of the program
-- Highlight the privacy and security measures
-- Mention the supervision by Legendary Principals
-- Be warm, professional, and empathetic in your responses
-- If you don't know something specific about the application, say so honestly
-- Always maintain the educational and supportive tone
-
-RESPONSE STYLE:
-- Be conversational and friendly
-- Use emojis appropriately (but not excessively)
-- Keep responses concise but informative
-- Ask follow-up questions when appropriate
-- Always end with an offer to help with more questions
-
-Remember: You are representing a program that values listening, understanding, and supporting children's growth through ethical observation. Your responses should reflect this compassionate, educational mission.
-"""
+SANJAYA_PROMPT = _load_prompt("sanjaya.txt")
+
+# Static context sent as the identical leading part of every request so the
+# provider can reuse its cached prefix instead of re-encoding it
+SANJAYA_PROMPT_PART = {"text": SANJAYA_PROMPT}
+
+# Single-question prompt pieces, built once; only the question itself varies per request.
+# They follow SANJAYA_PROMPT_PART rather than embedding another copy of the prompt text.
+PROMPT_PREFIX_PART = {"text": "\n\nUser Question: "}
+PROMPT_SUFFIX_PART = {"text": "\n\nPlease provide a helpful, accurate response based on the information above. Keep your response conversational and informative, staying within the scope of the Sanjaya application."}
+
+
+def _question_contents(user_message):
+    """Gemini request contents for one question: static context and prefix, the question, static suffix"""
+    return [{"role": "user", "parts": [SANJAYA_PROMPT_PART, PROMPT_PREFIX_PART, {"text": user_message}, PROMPT_SUFFIX_PART]}]
+
+
+def _generate_answer(user_message):
+    """Ask Gemini to answer one question; returns the stripped text or None"""
+    model = _get_model()
+    if model is None:
+        return None
+
+    # Generate response using Gemini (same pattern as observation_extractor.py)
+    response = model.generate_content(_question_contents(user_message))
+
+    if not response or not response.text:
+        return None
+    return response.text.strip()
+
+
+# Request coalescing: concurrent cache misses for the same question (same cache key)
+# share one Gemini call. Different questions are never combined into one prompt, so
+# one user's text can't steer the answer another user gets or caches.
+BATCH_FLUSH_EVERY = 8
+BATCH_FLUSH_INTERVAL = 0.1  # seconds to wait for more questions before dispatching
+MAX_CONCURRENT_ANSWERS = 4
+ANSWER_TIMEOUT = 60  # seconds a request waits for its answer
+
+_batch_queue = queue.Queue()
+_batch_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ANSWERS, thread_name_prefix="chatbot-answer")
+_batch_slots = threading.Semaphore(MAX_CONCURRENT_ANSWERS)
+_batch_worker = None
+_batch_worker_lock = threading.Lock()
+
+
+def _answer_batched(user_message):
+    """Queue a question for the batch worker and wait for its answer"""
+    _ensure_batch_worker()
+    future = Future()
+    _batch_queue.put((user_message, future))
+    return future.result(timeout=ANSWER_TIMEOUT)
+
+
+def _ensure_batch_worker():
+    global _batch_worker
+    if _batch_worker is None or not _batch_worker.is_alive():
+        with _batch_worker_lock:
+            if _batch_worker is None or not _batch_worker.is_alive():
+                _batch_worker = threading.Thread(target=_run_batch_worker, name="chatbot-batcher", daemon=True)
+                _batch_worker.start()
+
+
+def _run_batch_worker():
+    while True:
+        batch = [_batch_queue.get()]
+        deadline = time.monotonic() + BATCH_FLUSH_INTERVAL
+
+        # Collect whatever else arrives within the flush window, up to BATCH_FLUSH_EVERY questions
+        while len(batch) < BATCH_FLUSH_EVERY:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_batch_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # One Gemini call per distinct question; repeats wait on the same answer
+        groups = {}
+        for message, future in batch:
+            groups.setdefault(_response_cache_key(message), (message, []))[1].append(future)
+        for message, futures in groups.values():
+            _batch_slots.acquire()
+            _batch_executor.submit(_answer_group, message, futures)
+
+
+def _answer_group(message, futures):
+    """Answer one question and resolve the futures of every request that asked it"""
+    try:
+        try:
+            answer = _generate_answer(message)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future in futures:
+            future.set_result(answer)
+    finally:
+        _batch_slots.release()
+
+
+if celery is not None:
+    @celery.task(bind=True, max_retries=3, default_retry_delay=2)
+    def generate_gemini_response(self, user_message, embedding=None):
+        """Generate a chatbot answer on a Celery worker, retrying while Gemini is unavailable.
+
+        ``embedding`` is the question's embedding from the web worker, handed back in the
+        result so chatbot_result can add the answer to the semantic cache.
+        """
+        try:
+            return {
+                "response": _generate_answer(user_message),
+                "cache_key": _response_cache_key(user_message),
+                "embedding": embedding,
+            }
+        except google_exceptions.ServiceUnavailable as e:
+            raise self.retry(exc=e)
+
+
+def _read_user_message():
+    """Parse the chatbot request body; returns (message, None) or (None, error response)"""
+    # Reject oversized bodies before reading or parsing them
+    if request.content_length is None:
+        return None, (_json({"error": "Content-Length required"}), 411)
+    if request.content_length > MAX_CHATBOT_BODY:
+        return None, (_json({"error": "Payload too large"}), 413)
+
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None, (_json({"error": "Invalid JSON"}), 400)
+
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+        return None, (_json({"error": "No message provided"}), 400)
+
+    user_message = data["message"].strip()
+    if not user_message:
+        return None, (_json({"error": "Empty message"}), 400)
+    return user_message, None
 
 
 @chatbot_bp.route("/api/chatbot", methods=["POST"])
@@ -133,35 +322,52 @@ def chatbot_response():
     Handle chatbot messages using Gemini AI with application-specific context
     """
     try:
-        if not gemini_available:
-            return jsonify(
+        if _get_model() is None:
+            return _json(
                 {
                     "error": "Chatbot service is temporarily unavailable",
                     "response": "I apologize, but the chatbot service is currently unavailable. Please try again later or contact our support team directly.",
                 }
             ), 503
 
-        data = request.get_json()
-        if not data or "message" not in data:
-            return jsonify({"error": "No message provided"}), 400
-
-        user_message = data["message"].strip()
-        if not user_message:
-            return jsonify({"error": "Empty message"}), 400
+        user_message, error_response = _read_user_message()
+        if error_response:
+            return error_response
 
         # Log the user message (without storing sensitive data)
-        logger.info(f"Chatbot query received: {user_message[:100]}...")
-
-        # Create the full prompt with context
-        full_prompt = f"{SANJAYA_PROMPT}\n\nUser Question: {user_message}\n\nPlease provide a helpful, accurate response based on the information above. Keep your response conversational and informative, staying within the scope of the Sanjaya application."
-
-        # Generate response using Gemini (same pattern as observation_extractor.py)
-        response = model.generate_content(
-            [{"role": "user", "parts": [{"text": full_prompt}]}]
-        )
-
-        if not response or not response.text:
-            return jsonify(
+        logger.info("Chatbot query received: %.100s...", user_message)
+
+        # The same question asked before is answered straight from memory
+        cache_key = _response_cache_key(user_message)
+        with RESPONSE_CACHE_LOCK:
+            cached_response = RESPONSE_CACHE.get(cache_key)
+            if cached_response is not None:
+                cache_stats["exact_hits"] += 1
+        if cached_response is not None:
+            return _json({"response": cached_response, "status": "success", "cache": "hit-exact"})
+
+        # A close paraphrase of an earlier question reuses its answer without a generation call
+        query_embedding = _embed_question(user_message)
+        if query_embedding is not None:
+            cached_response = semantic_cache.lookup(query_embedding)
+            if cached_response is not None:
+                with RESPONSE_CACHE_LOCK:
+                    cache_stats["semantic_hits"] += 1
+                    RESPONSE_CACHE[cache_key] = cached_response
+                return _json({"response": cached_response, "status": "success", "cache": "hit"})
+
+        with RESPONSE_CACHE_LOCK:
+            cache_stats["misses"] += 1
+
+        # With a broker configured, free this worker and let the client poll for the answer
+        if celery is not None:
+            embedding = query_embedding.tolist() if query_embedding is not None else None
+            task = generate_gemini_response.apply_async([user_message, embedding], expires=30)
+            return _json({"task_id": task.id, "status": "pending"}), 202
+
+        response_text = _answer_batched(user_message)
+        if not response_text:
+            return _json(
                 {
                     "error": "Failed to generate response",
                     "response": "I apologize, but I couldn't generate a response right now. Please try rephrasing your question or contact our support team.",
@@ -169,13 +375,18 @@ def chatbot_response():
             ), 500
 
         # Log successful response
-        logger.info(f"Chatbot response generated successfully")
+        logger.info("Chatbot response generated successfully")
+
+        with RESPONSE_CACHE_LOCK:
+            RESPONSE_CACHE[cache_key] = response_text
+        if query_embedding is not None:
+            semantic_cache.add(query_embedding, response_text)
 
-        return jsonify({"response": response.text.strip(), "status": "success"})
+        return _json({"response": response_text, "status": "success"})
 
     except Exception as e:
-        logger.error(f"Chatbot error: {str(e)}", exc_info=True)
-        return jsonify(
+        logger.error("Chatbot error: %s", e, exc_info=True)
+        return _json(
             {
                 "error": "Internal server error",
                 "response": "I apologize, but I encountered an error while processing your request. Please try again in a moment.",
@@ -183,17 +394,114 @@ def chatbot_response():
         ), 500
 
 
+@chatbot_bp.route("/api/chatbot/stream", methods=["POST"])
+def chatbot_stream():
+    """
+    Stream a chatbot answer as server-sent events while Gemini generates it
+    """
+    if _get_model() is None:
+        return _json({"error": "Chatbot service is temporarily unavailable"}), 503
+
+    user_message, error_response = _read_user_message()
+    if error_response:
+        return error_response
+
+    logger.info("Chatbot stream query received: %.100s...", user_message)
+
+    cache_key = _response_cache_key(user_message)
+    with RESPONSE_CACHE_LOCK:
+        cached_response = RESPONSE_CACHE.get(cache_key)
+    query_embedding = None
+    if cached_response is None:
+        query_embedding = _embed_question(user_message)
+        if query_embedding is not None:
+            cached_response = semantic_cache.lookup(query_embedding)
+
+    def generate():
+        if cached_response is not None:
+            yield _sse_event({'delta': cached_response})
+            yield _sse_event({'done': True, 'cache': 'hit'})
+            return
+
+        chunks = []
+        try:
+            for chunk in _get_model().generate_content(_question_contents(user_message), stream=True):
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield _sse_event({'delta': chunk.text})
+        except Exception as e:
+            logger.error("Chatbot stream error: %s", e, exc_info=True)
+            yield _sse_event({'error': 'Failed to generate response'})
+            return
+
+        # Cache the complete answer so the same or a similar question can be served without Gemini
+        response_text = "".join(chunks).strip()
+        if response_text:
+            with RESPONSE_CACHE_LOCK:
+                RESPONSE_CACHE[cache_key] = response_text
+            if query_embedding is not None:
+                semantic_cache.add(query_embedding, response_text)
+        yield _sse_event({'done': True})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@chatbot_bp.route("/api/chatbot/result/<task_id>", methods=["GET"])
+def chatbot_result(task_id):
+    """
+    Poll for a chatbot answer generated in the background
+    """
+    if celery is None:
+        return _json({"error": "Background generation is not enabled"}), 404
+
+    try:
+        result = celery.AsyncResult(task_id)
+        if result.state in ("PENDING", "STARTED", "RETRY"):
+            return _json({"task_id": task_id, "status": "pending"}), 202
+
+        if result.successful() and result.result and result.result.get("response"):
+            with RESPONSE_CACHE_LOCK:
+                RESPONSE_CACHE[result.result["cache_key"]] = result.result["response"]
+            if result.result.get("embedding"):
+                semantic_cache.add(
+                    np.asarray(result.result["embedding"], dtype=np.float32),
+                    result.result["response"],
+                )
+            return _json({"response": result.result["response"], "status": "success"})
+
+        logger.error("Chatbot task %s finished without a response: %s", task_id, result.state)
+    except Exception as e:
+        logger.error("Chatbot result error: %s", e, exc_info=True)
+
+    return _json(
+        {
+            "error": "Failed to generate response",
+            "response": "I apologize, but I couldn't generate a response right now. Please try rephrasing your question or contact our support team.",
+            "status": "failure",
+        }
+    ), 500
+
+
 @chatbot_bp.route("/api/chatbot/status", methods=["GET"])
 def chatbot_status():
     """
     Check chatbot service status
     """
-    return jsonify(
-        {
-            "status": "available" if gemini_available else "unavailable",
-            "gemini_configured": gemini_available,
-            "message": "Chatbot service is running"
-            if gemini_available
-            else "Chatbot service is unavailable",
-        }
-    )
+    # Answer without initializing Gemini: a configured key means available unless init already failed
+    available = _gemini_available is not False and bool(_gemini_api_key())
+    return Response(STATUS_AVAILABLE_PAYLOAD if available else STATUS_UNAVAILABLE_PAYLOAD, mimetype="application/json")
+
+
+@chatbot_bp.route("/api/chatbot/cache_stats", methods=["GET"])
+@admin_required
+def chatbot_cache_stats():
+    """
+    Report response cache hit/miss counters for this worker
+    """
+    with RESPONSE_CACHE_LOCK:
+        stats = dict(cache_stats, exact_entries=len(RESPONSE_CACHE))
+    return _json(stats)
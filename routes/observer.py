@@ -8,10 +8,13 @@ from flask import (
     jsonify,
     session,
     send_file,
+    Response,
+    stream_with_context,
 )
 from flask_login import login_required, current_user
 from models.database import (
     get_supabase_client,
+    get_service_client,
     get_observer_children,
     save_observation,
     get_observations_by_child,
@@ -28,6 +31,15 @@ from models.database import (
     log_report_processing,
     get_child_schedule_status,
     get_signed_audio_url,
+    get_signed_audio_urls,
+    get_stored_report_url,
+    store_report_file,
+    get_cached_principal_for_observer,
+    get_child_name_cached,
+    get_recently_reviewed_observation_ids,
+    record_peer_review,
+    get_observer_report_count,
+    invalidate_observer_report_count,
     # Multi-tenant functions
     get_observer_review_assignments,
     submit_observer_application,
@@ -36,21 +48,210 @@ from models.database import (
     get_observer_suggestion_data,
     get_child_learning_history,
 )
-from models.observation_extractor import ObservationExtractor
+from models.observation_extractor import get_observation_extractor
 from models.monthly_report_generator import MonthlyReportGenerator
-from utils.decorators import observer_required
+from utils.decorators import observer_required, rate_limited
+from utils.redis_client import get_redis
+from utils.downloads import new_document_spool, send_spooled_document
+import calendar
+import hashlib
 import json
-from datetime import datetime, timedelta
+import orjson
+from datetime import date, datetime, timedelta
 import uuid
 import io
+import os
 import re
+import shutil
+import string
+import tempfile
 import urllib.parse
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
+from cachetools import TTLCache
+from extensions import celery
 
 logger = logging.getLogger(__name__)
 
 observer_bp = Blueprint("observer", __name__)
 
+# AI reviews and principal notifications run after process_file has responded
+_finalize_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="observer-finalize")
+
+# Audio uploads to storage overlap with transcription of the same file
+_media_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="observer-media")
+
+# Largest accepted audio file, and the room allowed for other form fields when only
+# the whole request's Content-Length is known
+AUDIO_MAX_BYTES = 25 * 1024 * 1024
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Storage content types for the upload content types browsers send. Unknown types
+# fall back to a generic type in the right family, so they land in the right bucket.
+_IMAGE_MIME = {
+    "image/png": "image/png",
+    "image/jpeg": "image/jpeg",
+    "image/jpg": "image/jpeg",
+    "image/pjpeg": "image/jpeg",
+    "image/webp": "image/webp",
+    "image/gif": "image/gif",
+    "image/bmp": "image/bmp",
+    "image/tiff": "image/tiff",
+}
+_AUDIO_MIME = {
+    "audio/mpeg": "audio/mpeg",
+    "audio/mp3": "audio/mpeg",
+    "audio/wav": "audio/wav",
+    "audio/wave": "audio/wav",
+    "audio/x-wav": "audio/wav",
+    "audio/mp4": "audio/mp4",
+    "audio/m4a": "audio/mp4",
+    "audio/x-m4a": "audio/mp4",
+    "audio/ogg": "audio/ogg",
+    "audio/flac": "audio/flac",
+    "audio/x-flac": "audio/flac",
+}
+_DEFAULT_IMAGE_MIME = "application/octet-stream"
+_DEFAULT_AUDIO_MIME = "audio/mpeg"
+
+# Independent peer review page queries are issued side by side
+_peer_review_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="observer-peer-reviews")
+
+# Files in one bulk upload are processed side by side, each on its own thread
+BULK_MAX_FILES = 20
+_bulk_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="observer-bulk")
+
+# Chat messages sent through send_message_api are inserted after the route has
+# responded. Past MESSAGE_BACKLOG_LIMIT queued inserts, a send inserts synchronously
+# instead. Failed inserts are retried; a message that still can't be saved is kept
+# here, keyed by (sender_id, receiver_id), so get_messages_api shows it as undelivered.
+MESSAGE_BACKLOG_LIMIT = 100
+MESSAGE_INSERT_ATTEMPTS = 3
+_message_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="observer-messages")
+_message_backlog = threading.BoundedSemaphore(MESSAGE_BACKLOG_LIMIT)
+_failed_messages = TTLCache(maxsize=1024, ttl=3600)
+_failed_messages_lock = threading.Lock()
+
+# Generated monthly summaries for email_monthly_report. With Redis configured the
+# session only holds the summary's key, so the summary isn't written back to the session
+# store on every request; otherwise the summary is kept in the server-side session.
+MONTHLY_REPORT_TTL = 3600
+
+# Serialized monthly report charts. Keys digest the charts' complete inputs, so any
+# change to the month's observations, goals or goal alignments renders fresh charts.
+_monthly_chart_cache = TTLCache(maxsize=256, ttl=600)
+_monthly_chart_cache_lock = threading.Lock()
+
+# The child's name and both observation histories for topic suggestions are fetched
+# side by side
+_suggestion_data_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="observer-suggestion-data")
+
+# Topic suggestions from get_topic_suggestions. Keys hash the observation rows the
+# suggestions came from, so a new observation gets new suggestions; refresh_suggestions
+# always generates.
+_suggestions_cache = TTLCache(maxsize=512, ttl=1800)
+_suggestions_cache_lock = threading.Lock()
+
+# Fixed error bodies of the topic suggestion routes, serialized once at import
+_ERR_CHILD_ID_REQUIRED = orjson.dumps({"success": False, "error": "Child ID is required"})
+_ERR_SUGGESTIONS = orjson.dumps(
+    {"success": False, "error": "Failed to generate suggestions. Please try again."}
+)
+_ERR_REFRESH = orjson.dumps({"success": False, "error": "Failed to refresh suggestions"})
+_ERR_BACKGROUND_DISABLED = orjson.dumps(
+    {"success": False, "error": "Background generation is not enabled"}
+)
+_ERR_TASK_NOT_FOUND = orjson.dumps({"success": False, "error": "Task not found"})
+
+# Phrases transcription services return in place of a transcript, matched in one
+# case-insensitive pass so the transcript isn't copied by lower()
+TRANSCRIPT_ERROR_INDICATORS = (
+    "transcription failed",
+    "no audio detected",
+    "unable to process",
+    "error processing audio",
+)
+_TRANSCRIPT_ERROR_RE = re.compile(
+    "|".join(map(re.escape, TRANSCRIPT_ERROR_INDICATORS)), re.IGNORECASE
+)
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Upload file extensions, matched against the lowercased path of a file URL
+AUDIO_EXT = (".mp3", ".wav", ".m4a", ".ogg")
+IMG_EXT = (".jpg", ".jpeg", ".png", ".gif", ".bmp")
+
+# Most reviewed observation IDs sent in one not.in filter; more would make the
+# PostgREST URL too long
+MAX_NOT_IN_IDS = 200
+
+# Stored file URLs that are already percent-encoded, or need no encoding at all,
+# are used as-is instead of being quoted again
+_PERCENT_ESCAPE = re.compile(r"%[0-9A-Fa-f]{2}")
+_URL_SAFE = re.compile(r"[A-Za-z0-9_.~:/?#\[\]@!$&'()*+,;=-]*")
+
+# insert_peer_review_with_service_role outcomes
+REVIEW_INSERTED = "inserted"
+REVIEW_DUPLICATE = "duplicate"
+
+# Placeholder for the list columns audio observations leave empty
+_EMPTY_JSON_LIST = "[]"
+
+# 24-hour "HH:MM", as sent by the dashboard's time input
+_HHMM = re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d$")
+
+
+def _dumps(obj):
+    """Serialize observation JSON columns with orjson (compact output, as a str for PostgREST)"""
+    return orjson.dumps(obj).decode()
+
+
+def _formatted_report_from(full_data):
+    """formatted_report from an observation's full_data text, or None.
+
+    Rows whose text doesn't mention the key are skipped without parsing the
+    (often large) transcript and analysis blob.
+    """
+    if not full_data or '"formatted_report"' not in full_data:
+        return None
+    try:
+        return orjson.loads(full_data).get("formatted_report")
+    except (orjson.JSONDecodeError, AttributeError):
+        return None
+
+
+def _media_fields(obs):
+    """(file_type, file_basename) of an observation's uploaded file.
+
+    Rows carrying the generated file_type/file_basename columns are read as-is;
+    otherwise both are derived from file_url.
+    """
+    if "file_basename" in obs:
+        return obs.get("file_type"), obs.get("file_basename")
+    file_url = obs.get("file_url")
+    if not file_url:
+        return None, None
+    path = urllib.parse.urlsplit(file_url).path.lower()
+    if path.endswith(AUDIO_EXT):
+        file_type = "audio"
+    elif path.endswith(IMG_EXT):
+        file_type = "image"
+    else:
+        file_type = None
+    return file_type, file_url.rsplit("/", 1)[-1]
+
+
+def _new_uuid4():
+    """Random version-4 UUID string formatted straight from os.urandom, without a UUID object"""
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
 
 @observer_bp.route("/dashboard")
 @login_required
@@ -94,14 +295,7 @@ def set_schedule():
             return jsonify({"success": False, "error": "Missing required fields"})
 
         # Validate time format
-        try:
-            time_parts = scheduled_time.split(":")
-            if len(time_parts) != 2:
-                raise ValueError("Invalid time format")
-            hour, minute = int(time_parts[0]), int(time_parts[1])
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                raise ValueError("Invalid time values")
-        except ValueError:
+        if not _HHMM.match(scheduled_time):
             return jsonify(
                 {"success": False, "error": "Invalid time format. Use HH:MM"}
             )
@@ -132,22 +326,17 @@ def process_scheduled_report(child_id):
             return redirect(url_for("observer.dashboard"))
 
         # Get child details
-        supabase = get_supabase_client()
-        child_data = (
-            supabase.table("children").select("*").eq("id", child_id).execute().data
-        )
-        if not child_data:
+        child_name = get_child_name_cached(child_id)
+        if child_name is None:
             flash("Child not found", "error")
             return redirect(url_for("observer.dashboard"))
 
-        child = child_data[0]
-
         # Redirect to process observation with pre-filled data
         session["scheduled_child_id"] = child_id
-        session["scheduled_child_name"] = child["name"]
+        session["scheduled_child_name"] = child_name
         session.modified = True
 
-        flash(f"Processing scheduled report for {child['name']}", "info")
+        flash(f"Processing scheduled report for {child_name}", "info")
         return redirect(url_for("observer.process_observation"))
     except Exception as e:
         flash(f"Error processing scheduled report: {str(e)}", "error")
@@ -161,14 +350,7 @@ def get_schedule_status():
     """Get current schedule status for all children (AJAX endpoint)"""
     try:
         observer_id = session.get("user_id")
-        schedule_status = get_child_schedule_status(observer_id)
-
-        # Convert datetime objects to strings for JSON serialization
-        for status in schedule_status:
-            if status["next_scheduled_time"]:
-                status["next_scheduled_time"] = status[
-                    "next_scheduled_time"
-                ].isoformat()
+        schedule_status = get_child_schedule_status(observer_id, iso_times=True)
 
         return jsonify({"success": True, "data": schedule_status})
     except Exception as e:
@@ -182,14 +364,14 @@ def process_observation():
     observer_id = session.get("user_id")
     children = get_observer_children(observer_id)
 
-    # Get last processed report if available
-    last_report = session.get("last_report")
+    # Get last processed report if available; the session only keeps its id
     last_report_id = session.get("last_report_id")
+    last_report = (
+        _get_formatted_report(last_report_id, observer_id) if last_report_id else None
+    )
 
     # Get today's date for the form
-    from datetime import datetime
-
-    today_date = datetime.now().strftime("%Y-%m-%d")
+    today_date = date.today().isoformat()
 
     return render_template(
         "observer/process_observation.html",
@@ -200,6 +382,26 @@ def process_observation():
     )
 
 
+def _get_formatted_report(observation_id, observer_id):
+    """Load the formatted report of one of the observer's saved observations"""
+    try:
+        supabase = get_supabase_client()
+        result = (
+            supabase.table("observations")
+            .select("full_data")
+            .eq("id", observation_id)
+            .eq("username", observer_id)
+            .limit(1)
+            .execute()
+        )
+        if not result.data:
+            return None
+        return _formatted_report_from(result.data[0].get("full_data"))
+    except Exception as e:
+        logger.warning(f"Could not load last report {observation_id}: {e}")
+        return None
+
+
 @observer_bp.route("/process_file", methods=["POST"])
 @login_required
 @observer_required
@@ -207,736 +409,731 @@ def process_file():
     observer_id = session.get("user_id")
     child_id = request.form.get("child_id")
     processing_mode = request.form.get("processing_mode")
-    session_date = request.form.get("session_date")
-    session_start = request.form.get("session_start")
-    session_end = request.form.get("session_end")
-    student_name = request.form.get("student_name")
+    user_info = _observation_user_info(request.form)
 
-    user_info = {
-        "student_name": student_name,
-        "observer_name": session.get("name"),
-        "session_date": session_date,
-        "session_start": session_start,
-        "session_end": session_end,
-        "child_id": child_id,
-    }
-
-    extractor = ObservationExtractor()
+    extractor = get_observation_extractor()
 
     try:
-        if processing_mode == "ocr":
+        if processing_mode in ("ocr", "audio"):
             if "file" not in request.files:
                 return jsonify({"success": False, "error": "No file uploaded"})
 
+            # Check if this was a scheduled report
+            scheduled_child_id = session.get("scheduled_child_id")
+            report_type = "scheduled" if scheduled_child_id == child_id else "manual"
+            force_process = request.form.get("force_process", "false").lower() == "true"
+
             file = request.files["file"]
+            # The part's own length if the client sent one, else the whole body's
+            declared_size = file.content_length or request.content_length
+
+            result, saved = _process_single_file(
+                extractor,
+                processing_mode,
+                file,
+                user_info,
+                observer_id,
+                report_type,
+                force_process,
+                declared_size,
+            )
+            if saved is None:
+                return jsonify(result)
 
-            # Extract text and process
-            extracted_text = extractor.extract_text_with_ocr(file)
-            structured_data = extractor.process_with_groq(extracted_text)
-            observations_text = structured_data.get("observations", "")
+            _remember_last_report(saved)
+            result["download_urls"] = {
+                "word": url_for("observer.download_report"),
+                "pdf": url_for("observer.download_pdf"),
+            }
+            return jsonify(result)
 
-            # Upload file to storage (handle error gracefully)
-            file.seek(0)
-            try:
-                file_url = upload_file_to_storage(
-                    file.read(),
-                    file.filename,
-                    f"image/{file.content_type.split('/')[1]}",
-                )
-            except Exception as upload_error:
-                print(f"Error uploading file: {upload_error}")
-                file_url = None
-
-            # Generate formatted report
-            report = extractor.generate_report_from_text(observations_text, user_info)
-
-            # Save observation
-            observation_id = str(uuid.uuid4())
-            observation_data = {
-                "id": observation_id,
-                "student_id": child_id,
-                "username": observer_id,
-                "student_name": structured_data.get("studentName", student_name),
-                "observer_name": session.get("name"),
-                "class_name": structured_data.get("className", ""),
-                "date": structured_data.get("date", session_date),
-                "observations": observations_text,
-                "strengths": json.dumps(structured_data.get("strengths", [])),
-                "areas_of_development": json.dumps(
-                    structured_data.get("areasOfDevelopment", [])
-                ),
-                "recommendations": json.dumps(
-                    structured_data.get("recommendations", [])
-                ),
-                "timestamp": datetime.now().isoformat(),
-                "filename": file.filename,
-                "full_data": json.dumps(
-                    {**structured_data, "formatted_report": report}
-                ),
-                "theme_of_day": structured_data.get("themeOfDay", ""),
-                "curiosity_seed": structured_data.get("curiositySeed", ""),
-                "file_url": file_url,
-                # Initialize peer review fields
-                "peer_reviews_required": 1,
-                "peer_reviews_completed": 0,
-                "peer_review_status": "pending",
+    except Exception as e:
+        print(f"Error in process_file: {e}")
+        return jsonify(
+            {"success": False, "error": f"Error processing observation: {str(e)}"}
+        )
+
+
+@observer_bp.route("/process_files_bulk", methods=["POST"])
+@login_required
+@observer_required
+def process_files_bulk():
+    """Process several observation files for one child concurrently"""
+    observer_id = session.get("user_id")
+    processing_mode = request.form.get("processing_mode")
+    files = request.files.getlist("files")
+
+    if processing_mode not in ("ocr", "audio"):
+        return jsonify({"success": False, "error": "Invalid processing mode"})
+    if not files:
+        return jsonify({"success": False, "error": "No files uploaded"})
+    if len(files) > BULK_MAX_FILES:
+        return jsonify(
+            {
+                "success": False,
+                "error": f"Please upload at most {BULK_MAX_FILES} files at a time.",
             }
+        )
 
-            # Save to database
-            supabase = get_supabase_client()
-            supabase.table("observations").insert(observation_data).execute()
+    user_info = _observation_user_info(request.form)
+    force_process = request.form.get("force_process", "false").lower() == "true"
+    extractor = get_observation_extractor()
 
-            # Generate AI communication review automatically for OCR observations
-            try:
-                logger.info(
-                    f"Generating AI communication review for OCR observation {observation_id}"
-                )
-                # For OCR, we'll use the extracted text as the "transcript"
-                ai_review = extractor.generate_ai_communication_review(
-                    observations_text, user_info
-                )
+    def process_one(file):
+        try:
+            return _process_single_file(
+                extractor,
+                processing_mode,
+                file,
+                user_info,
+                observer_id,
+                "manual",
+                force_process,
+                file.content_length or None,
+            )
+        except Exception as e:
+            logger.error(f"Error processing {file.filename} in bulk upload: {e}")
+            return {"success": False, "error": f"Error processing observation: {str(e)}"}, None
 
-                # Update the observation with AI review
-                supabase.table("observations").update(
-                    {
-                        "full_data": json.dumps(
-                            {
-                                **structured_data,
-                                "formatted_report": report,
-                                "communication_review": ai_review,
-                                "ai_review_generated_at": datetime.now().isoformat(),
-                            }
-                        )
-                    }
-                ).eq("id", observation_id).execute()
+    results = []
+    last_saved = None
+    for file, (result, saved) in zip(files, _bulk_executor.map(process_one, files)):
+        result["filename"] = file.filename
+        results.append(result)
+        if saved is not None:
+            last_saved = saved
 
-                logger.info(
-                    f"AI communication review generated successfully for OCR observation {observation_id}"
-                )
+    if last_saved is not None:
+        _remember_last_report(last_saved)
 
-                # Send notification to principal about new AI review (OCR)
-                try:
-                    # Get the principal for this observer's organization
-                    observer_org = (
-                        supabase.table("users")
-                        .select("organization_id")
-                        .eq("id", observer_id)
-                        .single()
-                        .execute()
-                    )
-                    if observer_org.data:
-                        org_id = observer_org.data["organization_id"]
-                        principal = (
-                            supabase.table("users")
-                            .select("id,name")
-                            .eq("organization_id", org_id)
-                            .eq("role", "Principal")
-                            .single()
-                            .execute()
-                        )
-                        if principal.data:
-                            principal_id = principal.data["id"]
-                            principal_name = principal.data["name"]
-
-                            # Create notification
-                            notification_data = {
-                                "id": str(uuid.uuid4()),
-                                "recipient_id": principal_id,
-                                "sender_id": observer_id,
-                                "type": "ai_review_generated",
-                                "title": f"New AI Communication Review Available",
-                                "message": f"AI communication review has been generated for {student_name}'s observation by {session.get('name')}.",
-                                "data": {
-                                    "observation_id": observation_id,
-                                    "student_name": student_name,
-                                    "observer_name": session.get("name"),
-                                    "review_type": "ai_communication_review",
-                                },
-                                "created_at": datetime.now().isoformat(),
-                                "read": False,
-                            }
-
-                            supabase.table("notifications").insert(
-                                notification_data
-                            ).execute()
-                            logger.info(
-                                f"Sent AI review notification to principal {principal_name}"
-                            )
-                except Exception as notif_error:
-                    logger.warning(
-                        f"Failed to send AI review notification: {notif_error}"
-                    )
+    processed = sum(1 for result in results if result["success"])
+    return jsonify(
+        {
+            "success": processed > 0,
+            "message": f"Processed {processed} of {len(results)} files.",
+            "results": results,
+        }
+    )
 
-            except Exception as ai_error:
-                logger.error(
-                    f"Failed to generate AI communication review for OCR: {ai_error}"
-                )
-                # Continue without AI review - don't fail the entire process
 
-            # Check if this was a scheduled report and log it
-            scheduled_child_id = session.get("scheduled_child_id")
-            report_type = "scheduled" if scheduled_child_id == child_id else "manual"
+def _observation_user_info(form):
+    """Observation metadata shared by every file in an upload"""
+    return {
+        "student_name": form.get("student_name"),
+        "observer_name": session.get("name"),
+        "session_date": form.get("session_date"),
+        "session_start": form.get("session_start"),
+        "session_end": form.get("session_end"),
+        "child_id": form.get("child_id"),
+    }
 
-            # Log the processing
-            log_report_processing(child_id, observer_id, observation_id, report_type)
-
-            # Clear large session data and store only essentials
-            if "last_custom_report" in session:
-                del session["last_custom_report"]
-            if "scheduled_child_id" in session:
-                del session["scheduled_child_id"]
-            if "scheduled_child_name" in session:
-                del session["scheduled_child_name"]
-
-            # Store minimal session data
-            session["last_report"] = report[:1500]  # Truncate to save space
-            session["last_report_id"] = observation_id
-            session["last_student_name"] = structured_data.get(
-                "studentName", student_name
-            )
-            session["last_date"] = structured_data.get("date", session_date)
-            session.permanent = True
-            session.modified = True
 
-            return jsonify(
-                {
-                    "success": True,
-                    "message": "OCR observation processed and saved successfully!",
-                    "report": report,
-                    "download_urls": {
-                        "word": url_for("observer.download_report"),
-                        "pdf": url_for("observer.download_pdf"),
-                    },
-                }
-            )
+def _remember_last_report(saved):
+    """Point the session at the most recently saved observation for downloads"""
+    # Clear large session data and store only essentials
+    if "last_custom_report" in session:
+        del session["last_custom_report"]
+    if "scheduled_child_id" in session:
+        del session["scheduled_child_id"]
+    if "scheduled_child_name" in session:
+        del session["scheduled_child_name"]
+
+    # Store minimal session data; the report itself is read back by id
+    session.pop("last_report", None)
+    session["last_report_id"] = saved["observation_id"]
+    session["last_student_name"] = saved["student_name"]
+    session["last_date"] = saved["date"]
+    session.permanent = True
+    session.modified = True
 
-        elif processing_mode == "audio":
-            if "file" not in request.files:
-                return jsonify({"success": False, "error": "No file uploaded"})
 
-            file = request.files["file"]
+def _process_single_file(extractor, processing_mode, file, user_info, observer_id, report_type, force_process=False, declared_size=None):
+    """Process one uploaded observation file.
 
-            # Validate audio file
-            if not file.filename.lower().endswith(
-                (".mp3", ".wav", ".m4a", ".ogg", ".flac")
-            ):
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": "Invalid audio format. Please upload MP3, WAV, M4A, OGG, or FLAC files.",
-                    }
-                )
+    Returns (response payload, saved observation details), with None for the
+    details when the file was rejected or failed.
+    """
+    if processing_mode == "ocr":
+        return _process_ocr_file(extractor, file, user_info, observer_id, report_type)
+    return _process_audio_file(
+        extractor, file, user_info, observer_id, report_type, force_process, declared_size
+    )
 
-            # Check file size (limit to 25MB for audio)
-            file.seek(0, 2)  # Seek to end
-            file_size = file.tell()
-            file.seek(0)  # Reset to beginning
 
-            if file_size > 25 * 1024 * 1024:  # 25MB limit
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": "Audio file too large. Please upload files smaller than 25MB.",
-                    }
-                )
+def _process_ocr_file(extractor, file, user_info, observer_id, report_type):
+    """Extract, report on and save a handwritten observation image"""
+    child_id = user_info["child_id"]
+    student_name = user_info["student_name"]
+    session_date = user_info["session_date"]
+
+    # Extract text and process
+    extracted_text = extractor.extract_text_with_ocr(file)
+    structured_data = extractor.process_with_groq(extracted_text)
+    observations_text = structured_data.get("observations", "")
+
+    # Upload file to storage (handle error gracefully)
+    file.seek(0)
+    try:
+        file_url = upload_file_to_storage(
+            file.read(),
+            file.filename,
+            _IMAGE_MIME.get(file.content_type, _DEFAULT_IMAGE_MIME),
+        )
+    except Exception as upload_error:
+        print(f"Error uploading file: {upload_error}")
+        file_url = None
+
+    # Generate formatted report
+    report = extractor.generate_report_from_text(observations_text, user_info)
+
+    # Save observation
+    observation_id = _new_uuid4()
+    ocr_full_data = {**structured_data, "formatted_report": report}
+    observation_data = {
+        "id": observation_id,
+        "student_id": child_id,
+        "username": observer_id,
+        "student_name": structured_data.get("studentName", student_name),
+        "observer_name": user_info["observer_name"],
+        "class_name": structured_data.get("className", ""),
+        "date": structured_data.get("date", session_date),
+        "observations": observations_text,
+        "strengths": _dumps(structured_data.get("strengths", [])),
+        "areas_of_development": _dumps(
+            structured_data.get("areasOfDevelopment", [])
+        ),
+        "recommendations": _dumps(structured_data.get("recommendations", [])),
+        "timestamp": datetime.now().isoformat(),
+        "filename": file.filename,
+        "full_data": _dumps(ocr_full_data),
+        "theme_of_day": structured_data.get("themeOfDay", ""),
+        "curiosity_seed": structured_data.get("curiositySeed", ""),
+        "file_url": file_url,
+        # Initialize peer review fields
+        "peer_reviews_required": 1,
+        "peer_reviews_completed": 0,
+        "peer_review_status": "pending",
+    }
+
+    # Save to database
+    supabase = get_supabase_client()
+    supabase.table("observations").insert(observation_data).execute()
+    invalidate_observer_report_count(observer_id)
+
+    # Generate the AI communication review in the background; for OCR the
+    # extracted text stands in for the transcript
+    _schedule_finalize(
+        observation_id,
+        observations_text,
+        ocr_full_data,
+        user_info,
+        observer_id,
+    )
+
+    # Log the processing
+    log_report_processing(child_id, observer_id, observation_id, report_type)
 
-            # Upload file to storage first
-            file.seek(0)
+    result = {
+        "success": True,
+        "message": "OCR observation processed and saved successfully!",
+        "report": report,
+        "observation_id": observation_id,
+        "ai_review_pending": True,
+    }
+    saved = {
+        "observation_id": observation_id,
+        "report": report,
+        "student_name": structured_data.get("studentName", student_name),
+        "date": structured_data.get("date", session_date),
+    }
+    return result, saved
+
+
+def _process_audio_file(extractor, file, user_info, observer_id, report_type, force_process=False, declared_size=None):
+    """Transcribe, report on and save an audio observation.
+
+    declared_size is the upload size from Content-Length headers, if known; it lets
+    oversized files be rejected before they are copied anywhere.
+    """
+    child_id = user_info["child_id"]
+    student_name = user_info["student_name"]
+    session_date = user_info["session_date"]
+
+    # Validate audio file
+    if not file.filename.lower().endswith((".mp3", ".wav", ".m4a", ".ogg", ".flac")):
+        return {
+            "success": False,
+            "error": "Invalid audio format. Please upload MP3, WAV, M4A, OGG, or FLAC files.",
+        }, None
+
+    too_large = {
+        "success": False,
+        "error": "Audio file too large. Please upload files smaller than 25MB.",
+    }
+
+    # Check file size (limit to 25MB for audio) from the headers before spooling
+    if declared_size and declared_size > AUDIO_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        return too_large, None
+
+    # Spool the upload to disk once; storage and transcription each stream it
+    # from their own handle, so the audio never sits in a Python bytes object.
+    # The spooled size is exact and needs no seek/tell over the request stream.
+    audio_path = _spool_upload(file)
+    file_size = os.path.getsize(audio_path)
+    if file_size > AUDIO_MAX_BYTES:
+        os.remove(audio_path)
+        return too_large, None
+
+    audio_mime = _AUDIO_MIME.get(file.content_type, _DEFAULT_AUDIO_MIME)
+
+    # Student-specific audio processing adjustments
+    min_length = 5  # Default minimum length
+    preprocess_child_id = None
+    if child_id == "08cd0c39-62b1-4931-a9bb-1106a5206a39":  # Daivik's ID
+        logger.info("Applying student-specific audio processing settings")
+        min_length = 3  # More lenient for this student
+        preprocess_child_id = child_id
+
+    # Add detailed logging before transcription
+    logger.info(f"Starting transcription for student {child_id}: {file.filename}")
+    logger.info(f"File size: {file_size} bytes")
+
+    # Upload to storage while the audio is being transcribed
+    upload_future = _media_executor.submit(
+        _upload_spooled_file, audio_path, file.filename, audio_mime
+    )
+    transcribe_future = _media_executor.submit(
+        _transcribe_audio, extractor, audio_path, preprocess_child_id
+    )
+    _remove_when_done(audio_path, [upload_future, transcribe_future])
+
+    file_url = None
+    transcript = None
+    transcription_service = "unknown"
+    for future in as_completed([upload_future, transcribe_future]):
+        if future is upload_future:
             try:
-                file_url = upload_file_to_storage(
-                    file.read(),
-                    file.filename,
-                    f"audio/{file.content_type.split('/')[1] if '/' in file.content_type else 'mp3'}",
-                )
+                file_url = future.result()
             except Exception as upload_error:
                 logger.error(f"Error uploading file: {upload_error}")
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": f"Failed to upload audio file: {str(upload_error)}",
-                    }
-                )
+                return {
+                    "success": False,
+                    "error": f"Failed to upload audio file: {str(upload_error)}",
+                }, None
+        else:
+            try:
+                transcript, transcription_service = future.result()
+            except Exception as e:
+                logger.error(f"All transcription methods failed: {e}")
+                return {
+                    "success": False,
+                    "error": f"All transcription services failed. {str(e)}",
+                }, None
+
+    logger.info(
+        f"Transcription completed. Length: {len(transcript) if transcript else 0}"
+    )
+    logger.info(f"Transcript preview: {transcript[:100] if transcript else 'None'}")
+
+    # Check if transcription was successful
+    if not transcript or transcript.strip() == "":
+        logger.error("Empty transcript returned from transcription service")
+        return {
+            "success": False,
+            "error": "Audio transcription returned empty result. Please ensure the audio is clear and contains speech.",
+        }, None
+
+    # More specific error detection
+    if _TRANSCRIPT_ERROR_RE.search(transcript):
+        logger.error(f"Transcription service returned error: {transcript}")
+        return {
+            "success": False,
+            "error": "Audio transcription service reported an error. Please try again with clearer audio.",
+        }, None
+
+    # Check for minimum length with more flexibility
+    if force_process and transcript and len(transcript.strip()) > 0:
+        logger.info("Force processing enabled, skipping length validation")
+    elif len(transcript.strip()) < min_length:
+        logger.warning(f"Short transcript ({len(transcript)} chars): {transcript}")
+        return {
+            "success": False,
+            "error": f"Audio transcription too short ({len(transcript)} characters). Please ensure the audio contains sufficient speech content.",
+            "debug_info": {
+                "transcript_length": len(transcript),
+                "transcript_preview": transcript[:50] if transcript else None,
+                "file_size": file_size,
+                "service_used": transcription_service,
+            },
+        }, None
 
-            # Reset file pointer for transcription
-            file.seek(0)
+    # Generate formatted report from transcript with validation
+    try:
+        if transcript and (force_process or len(transcript.strip()) >= min_length):
+            report = extractor.generate_report_from_text(transcript, user_info)
+        else:
+            return {
+                "success": False,
+                "error": "Insufficient audio content for report generation.",
+            }, None
+    except Exception as report_error:
+        logger.error(f"Report generation error: {report_error}")
+        return {
+            "success": False,
+            "error": f"Failed to generate report: {str(report_error)}",
+        }, None
+
+    # Save observation only if everything succeeded
+    observation_id = _new_uuid4()
+    audio_full_data = {
+        "transcript": transcript,
+        "report": report,
+        "formatted_report": report,
+        "file_size": file_size,
+        "transcription_length": len(transcript),
+        "transcription_service": transcription_service,
+        "processing_timestamp": datetime.now().isoformat(),
+    }
+    observation_data = {
+        "id": observation_id,
+        "student_id": child_id,
+        "username": observer_id,
+        "student_name": student_name,
+        "observer_name": user_info["observer_name"],
+        "class_name": "",
+        "date": session_date,
+        "observations": transcript,
+        "strengths": _EMPTY_JSON_LIST,
+        "areas_of_development": _EMPTY_JSON_LIST,
+        "recommendations": _EMPTY_JSON_LIST,
+        "timestamp": datetime.now().isoformat(),
+        "filename": file.filename,
+        "full_data": _dumps(audio_full_data),
+        "theme_of_day": "",
+        "curiosity_seed": "",
+        "file_url": file_url,
+        # Initialize peer review fields
+        "peer_reviews_required": 1,
+        "peer_reviews_completed": 0,
+        "peer_review_status": "pending",
+    }
 
-            # Student-specific audio processing adjustments
-            min_length = 5  # Default minimum length
-            if child_id == "08cd0c39-62b1-4931-a9bb-1106a5206a39":  # Daivik's ID
-                logger.info("Applying student-specific audio processing settings")
-                min_length = 3  # More lenient for this student
-                try:
-                    file = extractor.preprocess_audio_for_student(file, child_id)
-                except Exception as preproc_err:
-                    logger.warning(f"Audio preprocessing failed: {preproc_err}")
+    # Save to database
+    supabase = get_supabase_client()
+    supabase.table("observations").insert(observation_data).execute()
+    invalidate_observer_report_count(observer_id)
+
+    # Generate the AI communication review in the background
+    _schedule_finalize(
+        observation_id,
+        transcript,
+        audio_full_data,
+        user_info,
+        observer_id,
+    )
 
-            # Add detailed logging before transcription
-            logger.info(
-                f"Starting transcription for student {child_id}: {file.filename}"
-            )
-            logger.info(f"File size: {file_size} bytes")
+    # Log processing
+    log_report_processing(child_id, observer_id, observation_id, report_type)
 
-            # Try multiple transcription services
-            transcript = None
-            transcription_service = "unknown"
-            try:
-                transcript = extractor.transcribe_with_assemblyai(file)
-                transcription_service = "assemblyai"
-                logger.info(
-                    f"AssemblyAI transcription successful: {len(transcript) if transcript else 0} chars"
-                )
-            except Exception as e:
-                logger.warning(f"AssemblyAI failed: {e}, trying fallback methods")
-                try:
-                    file.seek(0)
-                    transcript = extractor.transcribe_with_whisper_fallback(file)
-                    transcription_service = "whisper_fallback"
-                    logger.info(
-                        f"Fallback transcription successful: {len(transcript) if transcript else 0} chars"
-                    )
-                except Exception as e2:
-                    logger.error(f"All transcription methods failed: {e2}")
-                    return jsonify(
-                        {
-                            "success": False,
-                            "error": f"All transcription services failed. Primary: {str(e)}, Fallback: {str(e2)}",
-                        }
-                    )
+    result = {
+        "success": True,
+        "message": "Audio observation processed and saved successfully!",
+        "report": report,
+        "observation_id": observation_id,
+        "ai_review_pending": True,
+        "transcript_length": len(transcript),
+    }
+    saved = {
+        "observation_id": observation_id,
+        "report": report,
+        "student_name": student_name,
+        "date": session_date,
+    }
+    return result, saved
 
-            logger.info(
-                f"Transcription completed. Length: {len(transcript) if transcript else 0}"
-            )
-            logger.info(
-                f"Transcript preview: {transcript[:100] if transcript else 'None'}"
-            )
 
-            # Add force process option
-            force_process = request.form.get("force_process", "false").lower() == "true"
+def _spool_upload(file):
+    """Copy an uploaded file to a named temp file in 1MB chunks and return its path"""
+    suffix = os.path.splitext(file.filename or "")[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+        file.stream.seek(0)
+        shutil.copyfileobj(file.stream, spool, length=1 << 20)
+    return spool.name
 
-            # Check if transcription was successful
-            if not transcript or transcript.strip() == "":
-                logger.error("Empty transcript returned from transcription service")
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": "Audio transcription returned empty result. Please ensure the audio is clear and contains speech.",
-                    }
-                )
 
-            # More specific error detection
-            error_indicators = [
-                "transcription failed",
-                "no audio detected",
-                "unable to process",
-                "error processing audio",
-            ]
-            if any(indicator in transcript.lower() for indicator in error_indicators):
-                logger.error(f"Transcription service returned error: {transcript}")
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": "Audio transcription service reported an error. Please try again with clearer audio.",
-                    }
-                )
+def _remove_when_done(path, futures):
+    """Delete a spooled file once every future reading it has finished"""
+    remaining = [len(futures)]
+    lock = threading.Lock()
 
-            # Check for minimum length with more flexibility
-            if force_process and transcript and len(transcript.strip()) > 0:
-                logger.info("Force processing enabled, skipping length validation")
-            elif len(transcript.strip()) < min_length:
-                logger.warning(
-                    f"Short transcript ({len(transcript)} chars): {transcript}"
-                )
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": f"Audio transcription too short ({len(transcript)} characters). Please ensure the audio contains sufficient speech content.",
-                        "debug_info": {
-                            "transcript_length": len(transcript),
-                            "transcript_preview": transcript[:50]
-                            if transcript
-                            else None,
-                            "file_size": file_size,
-                            "service_used": transcription_service,
-                        },
-                    }
-                )
+    def _done(_future):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove spooled upload {path}: {e}")
 
-            # Generate formatted report from transcript with validation
-            try:
-                if transcript and (
-                    force_process or len(transcript.strip()) >= min_length
-                ):
-                    report = extractor.generate_report_from_text(transcript, user_info)
-                else:
-                    return jsonify(
-                        {
-                            "success": False,
-                            "error": "Insufficient audio content for report generation.",
-                        }
-                    )
-            except Exception as report_error:
-                logger.error(f"Report generation error: {report_error}")
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": f"Failed to generate report: {str(report_error)}",
-                    }
-                )
+    for future in futures:
+        future.add_done_callback(_done)
 
-            # Save observation only if everything succeeded
-            observation_id = str(uuid.uuid4())
-            observation_data = {
-                "id": observation_id,
-                "student_id": child_id,
-                "username": observer_id,
-                "student_name": student_name,
-                "observer_name": session.get("name"),
-                "class_name": "",
-                "date": session_date,
-                "observations": transcript,
-                "strengths": json.dumps([]),
-                "areas_of_development": json.dumps([]),
-                "recommendations": json.dumps([]),
-                "timestamp": datetime.now().isoformat(),
-                "filename": file.filename,
-                "full_data": json.dumps(
-                    {
-                        "transcript": transcript,
-                        "report": report,
-                        "formatted_report": report,
-                        "file_size": file_size,
-                        "transcription_length": len(transcript),
-                        "transcription_service": transcription_service,
-                        "processing_timestamp": datetime.now().isoformat(),
-                    }
-                ),
-                "theme_of_day": "",
-                "curiosity_seed": "",
-                "file_url": file_url,
-                # Initialize peer review fields
-                "peer_reviews_required": 1,
-                "peer_reviews_completed": 0,
-                "peer_review_status": "pending",
-            }
 
-            # Save to database
-            supabase = get_supabase_client()
-            supabase.table("observations").insert(observation_data).execute()
+def _upload_spooled_file(path, file_name, file_type):
+    """Stream a spooled file to storage from its own read handle"""
+    with open(path, "rb") as handle:
+        return upload_file_to_storage(handle, file_name, file_type)
+
 
-            # Generate AI communication review automatically
+def _transcribe_audio(extractor, audio_path, preprocess_child_id=None):
+    """Transcribe with AssemblyAI, falling back to the secondary service; returns (transcript, service)"""
+    with open(audio_path, "rb") as audio_file:
+        if preprocess_child_id:
             try:
-                logger.info(
-                    f"Generating AI communication review for observation {observation_id}"
-                )
-                ai_review = extractor.generate_ai_communication_review(
-                    transcript, user_info
+                audio_file = extractor.preprocess_audio_for_student(
+                    audio_file, preprocess_child_id
                 )
+            except Exception as preproc_err:
+                logger.warning(f"Audio preprocessing failed: {preproc_err}")
 
-                # Update the observation with AI review
-                supabase.table("observations").update(
-                    {
-                        "full_data": json.dumps(
-                            {
-                                "transcript": transcript,
-                                "report": report,
-                                "formatted_report": report,
-                                "file_size": file_size,
-                                "transcription_length": len(transcript),
-                                "transcription_service": transcription_service,
-                                "processing_timestamp": datetime.now().isoformat(),
-                                "communication_review": ai_review,
-                                "ai_review_generated_at": datetime.now().isoformat(),
-                            }
-                        )
-                    }
-                ).eq("id", observation_id).execute()
-
+        try:
+            transcript = extractor.transcribe_with_assemblyai(audio_file)
+            logger.info(
+                f"AssemblyAI transcription successful: {len(transcript) if transcript else 0} chars"
+            )
+            return transcript, "assemblyai"
+        except Exception as e:
+            logger.warning(f"AssemblyAI failed: {e}, trying fallback methods")
+            try:
+                audio_file.seek(0)
+                transcript = extractor.transcribe_with_whisper_fallback(audio_file)
                 logger.info(
-                    f"AI communication review generated successfully for observation {observation_id}"
+                    f"Fallback transcription successful: {len(transcript) if transcript else 0} chars"
                 )
+                return transcript, "whisper_fallback"
+            except Exception as e2:
+                raise RuntimeError(f"Primary: {str(e)}, Fallback: {str(e2)}") from e2
 
-                # Send notification to principal about new AI review
-                try:
-                    # Get the principal for this observer's organization
-                    observer_org = (
-                        supabase.table("users")
-                        .select("organization_id")
-                        .eq("id", observer_id)
-                        .single()
-                        .execute()
-                    )
-                    if observer_org.data:
-                        org_id = observer_org.data["organization_id"]
-                        principal = (
-                            supabase.table("users")
-                            .select("id,name")
-                            .eq("organization_id", org_id)
-                            .eq("role", "Principal")
-                            .single()
-                            .execute()
-                        )
-                        if principal.data:
-                            principal_id = principal.data["id"]
-                            principal_name = principal.data["name"]
-
-                            # Create notification
-                            notification_data = {
-                                "id": str(uuid.uuid4()),
-                                "recipient_id": principal_id,
-                                "sender_id": observer_id,
-                                "type": "ai_review_generated",
-                                "title": f"New AI Communication Review Available",
-                                "message": f"AI communication review has been generated for {student_name}'s observation by {session.get('name')}.",
-                                "data": {
-                                    "observation_id": observation_id,
-                                    "student_name": student_name,
-                                    "observer_name": session.get("name"),
-                                    "review_type": "ai_communication_review",
-                                },
-                                "created_at": datetime.now().isoformat(),
-                                "read": False,
-                            }
-
-                            supabase.table("notifications").insert(
-                                notification_data
-                            ).execute()
-                            logger.info(
-                                f"Sent AI review notification to principal {principal_name}"
-                            )
-                except Exception as notif_error:
-                    logger.warning(
-                        f"Failed to send AI review notification: {notif_error}"
-                    )
 
-            except Exception as ai_error:
-                logger.error(f"Failed to generate AI communication review: {ai_error}")
-                # Continue without AI review - don't fail the entire process
+def finalize_observation(observation_id, review_text, full_data, user_info, observer_id):
+    """Generate the AI communication review for a saved observation and notify the principal"""
+    try:
+        logger.info(f"Generating AI communication review for observation {observation_id}")
+        ai_review = get_observation_extractor().generate_ai_communication_review(
+            review_text, user_info
+        )
+    except Exception as ai_error:
+        logger.error(f"Failed to generate AI communication review: {ai_error}")
+        return
 
-            # Log processing and update session
-            scheduled_child_id = session.get("scheduled_child_id")
-            report_type = "scheduled" if scheduled_child_id == child_id else "manual"
-            log_report_processing(child_id, observer_id, observation_id, report_type)
-
-            # Clear session data
-            if "last_custom_report" in session:
-                del session["last_custom_report"]
-            if "scheduled_child_id" in session:
-                del session["scheduled_child_id"]
-            if "scheduled_child_name" in session:
-                del session["scheduled_child_name"]
-
-            # Store minimal session data
-            session["last_report"] = report[:1500]
-            session["last_report_id"] = observation_id
-            session["last_student_name"] = student_name
-            session["last_date"] = session_date
-            session.permanent = True
-            session.modified = True
+    review_patch = {
+        "communication_review": ai_review,
+        "ai_review_generated_at": datetime.now().isoformat(),
+    }
+    notification = _ai_review_notification(
+        observer_id,
+        observation_id,
+        user_info.get("student_name"),
+        user_info.get("observer_name"),
+    )
 
-            return jsonify(
-                {
-                    "success": True,
-                    "message": "Audio observation processed and saved successfully!",
-                    "report": report,
-                    "transcript_length": len(transcript),
-                    "download_urls": {
-                        "word": url_for("observer.download_report"),
-                        "pdf": url_for("observer.download_pdf"),
-                    },
-                }
-            )
+    # Merge the review keys into full_data and notify the principal in one round-trip
+    supabase = get_supabase_client()
+    try:
+        supabase.rpc(
+            "save_observation_review",
+            {
+                "obs_id": observation_id,
+                "jsonb_patch": review_patch,
+                "notification": notification,
+            },
+        ).execute()
+    except Exception as rpc_error:
+        logger.warning(
+            f"save_observation_review RPC unavailable, writing separately: {rpc_error}"
+        )
+        try:
+            full_data.update(review_patch)
+            supabase.table("observations").update(
+                {"full_data": _dumps(full_data)}
+            ).eq("id", observation_id).execute()
+        except Exception as update_error:
+            logger.error(f"Failed to save AI communication review: {update_error}")
+            return
+
+        if notification:
+            try:
+                supabase.table("notifications").insert(notification).execute()
+            except Exception as notif_error:
+                logger.warning(f"Failed to send AI review notification: {notif_error}")
+                notification = None
 
-    except Exception as e:
-        print(f"Error in process_file: {e}")
-        return jsonify(
-            {"success": False, "error": f"Error processing observation: {str(e)}"}
+    logger.info(
+        f"AI communication review generated successfully for observation {observation_id}"
+    )
+    if notification:
+        logger.info(
+            f"Sent AI review notification to principal {notification['recipient_id']}"
         )
 
 
-# Cross-Organization Peer Review Routes - FIXED
+def _ai_review_notification(observer_id, observation_id, student_name, observer_name):
+    """Build the principal's "AI review available" notification, or None without a principal"""
+    try:
+        # Get the principal for this observer's organization
+        principal = get_cached_principal_for_observer(observer_id)
+    except Exception as lookup_error:
+        logger.warning(f"Failed to look up principal for AI review notification: {lookup_error}")
+        return None
+    if not principal:
+        return None
+
+    return {
+        "id": _new_uuid4(),
+        "recipient_id": principal["id"],
+        "sender_id": observer_id,
+        "type": "ai_review_generated",
+        "title": "New AI Communication Review Available",
+        "message": f"AI communication review has been generated for {student_name}'s observation by {observer_name}.",
+        "data": {
+            "observation_id": observation_id,
+            "student_name": student_name,
+            "observer_name": observer_name,
+            "review_type": "ai_communication_review",
+        },
+        "created_at": datetime.now().isoformat(),
+        "read": False,
+    }
 
 
-@observer_bp.route("/peer_reviews")
+if celery is not None:
+    @celery.task
+    def finalize_observation_task(observation_id, review_text, full_data, user_info, observer_id):
+        """Run finalize_observation on a Celery worker"""
+        finalize_observation(observation_id, review_text, full_data, user_info, observer_id)
+
+
+def _schedule_finalize(observation_id, review_text, full_data, user_info, observer_id):
+    """Queue finalize_observation on Celery when configured, otherwise on a local thread"""
+    args = (observation_id, review_text, full_data, user_info, observer_id)
+    if celery is not None:
+        try:
+            finalize_observation_task.delay(*args)
+            return
+        except Exception as e:
+            logger.warning(f"Could not queue AI review task, running it locally: {e}")
+    _finalize_executor.submit(finalize_observation, *args)
+
+
+@observer_bp.route("/observations/<observation_id>/ai_review")
 @login_required
 @observer_required
-def peer_reviews():
-    """View peer review assignments - Limited to observer's own report count, 24hrs old, and unreviewd"""
+def observation_ai_review(observation_id):
+    """Report whether the background AI review for an observation has been saved"""
     try:
-        observer_id = session.get("user_id")
-
         supabase = get_supabase_client()
-
-        # First, get count of observations this observer has made
-        observer_reports_count = (
+        result = (
             supabase.table("observations")
-            .select("id", count="exact")
-            .eq("username", observer_id)
+            .select("full_data")
+            .eq("id", observation_id)
+            .eq("username", session.get("user_id"))
+            .limit(1)
             .execute()
         )
-        max_reviews_allowed = (
-            observer_reports_count.count if observer_reports_count.count else 0
-        )
+        if not result.data:
+            return jsonify({"success": False, "error": "Observation not found"}), 404
 
-        logger.info(
-            f"Observer {observer_id} has made {max_reviews_allowed} observations"
+        full_data = json.loads(result.data[0].get("full_data") or "{}")
+        return jsonify(
+            {
+                "success": True,
+                "ready": bool(full_data.get("communication_review")),
+                "generated_at": full_data.get("ai_review_generated_at"),
+            }
         )
+    except Exception as e:
+        logger.error(f"Error checking AI review for {observation_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
-        # Calculate 24 hours ago and 7 days ago for more flexible filtering
-        twenty_four_hours_ago = (datetime.now() - timedelta(hours=24)).isoformat()
-        seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-
-        logger.info(f"Looking for observations from {twenty_four_hours_ago} to now")
-
-        # Get ALL observations from OTHER observers (any organization) for review
-        # Try timestamp first, then fallback to date field
-        observations_response = (
-            supabase.table("observations")
-            .select("""
-            id, student_name, observer_name, date, timestamp, filename,
-            file_url, full_data, username, observations, processed_by_admin
-        """)
-            .neq("username", observer_id)
-            .order("timestamp", desc=True)
-            .execute()
-        )
 
-        all_observations = (
-            observations_response.data if observations_response.data else []
-        )
+# Cross-Organization Peer Review Routes - FIXED
 
-        logger.info(
-            f"Found {len(all_observations)} total observations from other observers"
-        )
 
-        # Filter by date more flexibly - include observations from last 7 days
-        recent_observations = []
-        for obs in all_observations:
-            obs_date = obs.get("date")
-            obs_timestamp = obs.get("timestamp")
+@observer_bp.route("/peer_reviews")
+@login_required
+@observer_required
+def peer_reviews():
+    """View peer review assignments - Limited to observer's own report count, 24hrs old, and unreviewd"""
+    try:
+        observer_id = session.get("user_id")
 
-            # Try to parse the date
-            try:
-                if obs_date:
-                    # If date is in YYYY-MM-DD format, convert to datetime
-                    if isinstance(obs_date, str) and len(obs_date) == 10:
-                        obs_datetime = datetime.strptime(obs_date, "%Y-%m-%d")
-                    else:
-                        obs_datetime = datetime.fromisoformat(
-                            obs_date.replace("Z", "+00:00")
-                        )
-
-                    # Check if observation is from last 7 days
-                    if obs_datetime >= datetime.now() - timedelta(days=7):
-                        recent_observations.append(obs)
-                elif obs_timestamp:
-                    # Use timestamp if available
-                    obs_datetime = datetime.fromisoformat(
-                        obs_timestamp.replace("Z", "+00:00")
-                    )
-                    if obs_datetime >= datetime.now() - timedelta(days=7):
-                        recent_observations.append(obs)
-            except Exception as e:
-                logger.warning(
-                    f"Could not parse date/timestamp for observation {obs.get('id')}: {e}"
-                )
-                # Include observation if we can't parse the date (better to show than hide)
-                recent_observations.append(obs)
+        supabase = get_supabase_client()
 
-        logger.info(f"Found {len(recent_observations)} observations from last 7 days")
+        # Only observations from the last 7 days are offered for review. Timestamps
+        # are stored as naive local ISO strings, so the cutoff is built the same way.
+        cutoff = datetime.now() - timedelta(days=7)
 
-        # Get all observation IDs that have already been reviewed by ANY observer
-        reviewed_observations = (
-            supabase.table("peer_reviews").select("observation_id").execute()
+        # The observer's own report count (cached) and the observer's completed
+        # reviews don't depend on each other; fetch them together
+        count_future = _peer_review_executor.submit(
+            get_observer_report_count, observer_id
         )
-        reviewed_observation_ids = (
-            [review["observation_id"] for review in reviewed_observations.data]
-            if reviewed_observations.data
-            else []
+        completed_future = _peer_review_executor.submit(
+            supabase.table("peer_reviews")
+            .select("""
+                *, observations(student_name, observer_name, date)
+            """)
+            .eq("reviewer_id", observer_id)
+            .order("created_at", desc=True)
+            .execute
         )
 
+        # First, get count of observations this observer has made
+        max_reviews_allowed = count_future.result()
+
         logger.info(
-            f"Found {len(reviewed_observation_ids)} already reviewed observations"
+            f"Observer {observer_id} has made {max_reviews_allowed} observations"
         )
 
-        # Filter out observations that have already been reviewed by anyone
-        unreviewed_observations = [
-            obs
-            for obs in recent_observations
-            if obs["id"] not in reviewed_observation_ids
-        ]
+        # Recent, unreviewed observations from OTHER observers (any organization)
+        unreviewed_observations = []
+        if max_reviews_allowed:
+            unreviewed_observations = _unreviewed_observations_for(
+                supabase, observer_id, cutoff, max_reviews_allowed
+            )
 
         logger.info(f"Found {len(unreviewed_observations)} unreviewed observations")
 
         # Process observations similar to admin dashboard
-        processed_observations = []
-        for obs in unreviewed_observations:
-            processed_obs = {
+        processed_observations = [
+            {
                 "id": obs.get("id"),
                 "student_name": obs.get("student_name", "N/A"),
                 "observer_name": obs.get("observer_name", "N/A"),
                 "date": obs.get("date", "N/A"),
                 "timestamp": obs.get("timestamp", "N/A"),
                 "filename": obs.get("filename", "N/A"),
-                "file_url": obs.get("file_url"),
                 "processed_by_admin": obs.get("processed_by_admin", False),
-                "has_formatted_report": False,
-                "formatted_report": None,
-                "file_type": None,
-                "signed_url": None,
+                **_attach_media(obs),
+                **_attach_report(obs),
             }
-
-            # Process file URL for audio/media
-            if processed_obs["file_url"]:
-                processed_obs["file_url"] = urllib.parse.quote(
-                    processed_obs["file_url"], safe=":/?#[]@!$&'()*+,;="
-                )
-
-                # Determine file type from URL or filename
-                file_url_lower = processed_obs["file_url"].lower()
-                if any(
-                    ext in file_url_lower for ext in [".mp3", ".wav", ".m4a", ".ogg"]
-                ):
-                    processed_obs["file_type"] = "audio"
-                    # Create signed URL for audio files for better compatibility
-                    filename = processed_obs["file_url"].split("/")[-1]
-                    signed_url = get_signed_audio_url(filename)
-                    if signed_url:
-                        processed_obs["signed_url"] = signed_url
-                elif any(
-                    ext in file_url_lower
-                    for ext in [".jpg", ".jpeg", ".png", ".gif", ".bmp"]
-                ):
-                    processed_obs["file_type"] = "image"
-
-            # Extract formatted report from full_data
-            if obs.get("full_data"):
-                try:
-                    full_data = json.loads(obs["full_data"])
-                    if full_data.get("formatted_report"):
-                        processed_obs["has_formatted_report"] = True
-                        processed_obs["formatted_report"] = full_data[
-                            "formatted_report"
-                        ]
-                except:
-                    pass
-
-            processed_observations.append(processed_obs)
+            for obs in unreviewed_observations
+        ]
 
         # Limit to the number of reports this observer has made
         pending_reviews = processed_observations[:max_reviews_allowed]
 
+        # Signed URLs for audio files (better compatibility), all in one storage request
+        audio_reviews = [p for p in pending_reviews if p["file_type"] == "audio"]
+        signed_urls = get_signed_audio_urls(p["file_basename"] for p in audio_reviews)
+        for processed_obs in audio_reviews:
+            processed_obs["signed_url"] = signed_urls.get(processed_obs["file_basename"])
+
         # Get completed reviews by this observer
         completed_reviews = []
         try:
-            completed_reviews_response = (
-                supabase.table("peer_reviews")
-                .select("""
-                *, observations(student_name, observer_name, date)
-            """)
-                .eq("reviewer_id", observer_id)
-                .order("created_at", desc=True)
-                .execute()
-            )
+            completed_reviews_response = completed_future.result()
             completed_reviews = (
                 completed_reviews_response.data
                 if completed_reviews_response.data
@@ -971,64 +1168,148 @@ def peer_reviews():
         )
 
 
+def _quote_file_url(file_url):
+    """Percent-encode a stored file URL for the page, leaving already-encoded URLs alone"""
+    if _PERCENT_ESCAPE.search(file_url) or _URL_SAFE.fullmatch(file_url):
+        return file_url
+    return urllib.parse.quote(file_url, safe=":/?#[]@!$&'()*+,;=")
+
+
+def _attach_media(obs):
+    """Peer review row fields for an observation's uploaded file"""
+    file_type, file_basename = _media_fields(obs)
+    file_url = obs.get("file_url")
+    if file_url:
+        file_url = _quote_file_url(file_url)
+    return {
+        "file_url": file_url,
+        "file_type": file_type,
+        "file_basename": file_basename,
+        "signed_url": None,
+    }
+
+
+def _attach_report(obs):
+    """Peer review row fields for an observation's formatted report"""
+    formatted_report = _formatted_report_from(obs.get("full_data"))
+    return {
+        "has_formatted_report": bool(formatted_report),
+        "formatted_report": formatted_report or None,
+    }
+
+
+def _unreviewed_observations_for(supabase, observer_id, since, max_rows):
+    """Newest observations by other observers since `since` that nobody has reviewed"""
+    try:
+        # The RPC reads past RLS, so only the service role may execute it; without a
+        # service key it fails and the separate queries below are used
+        result = (get_service_client() or supabase).rpc(
+            "unreviewed_observations_for",
+            {
+                "observer_id": observer_id,
+                "since": since.isoformat(),
+                "max_rows": max_rows,
+            },
+        ).execute()
+        return result.data or []
+    except Exception as e:
+        logger.warning(
+            f"unreviewed_observations_for RPC unavailable, filtering with separate queries: {e}"
+        )
+
+    # Observation IDs that have already been reviewed by ANY observer. A review
+    # can't predate its observation, so only recent reviews (with a day of slack
+    # for created_at being stored in UTC) can exclude a recent observation.
+    reviewed_observation_ids = get_recently_reviewed_observation_ids()
+
+    logger.info(
+        f"Found {len(reviewed_observation_ids)} recently reviewed observations"
+    )
+
+    query = (
+        supabase.table("observations")
+        .select("""
+        id, student_name, observer_name, date, timestamp, filename,
+        file_url, full_data, processed_by_admin
+    """)
+        .neq("username", observer_id)
+        .gte("timestamp", since.isoformat())
+    )
+    if len(reviewed_observation_ids) <= MAX_NOT_IN_IDS:
+        if reviewed_observation_ids:
+            query = query.not_.in_("id", list(reviewed_observation_ids))
+        result = query.order("timestamp", desc=True).limit(max_rows).execute()
+        return result.data or []
+
+    # Too many IDs for the query string: fetch enough rows to cover every reviewed
+    # one and drop those with set lookups
+    result = (
+        query.order("timestamp", desc=True)
+        .limit(max_rows + len(reviewed_observation_ids))
+        .execute()
+    )
+    unreviewed = [
+        obs for obs in result.data or [] if obs["id"] not in reviewed_observation_ids
+    ]
+    return unreviewed[:max_rows]
+
+
 @observer_bp.route("/debug_peer_review_data")
 @login_required
 @observer_required
 def debug_peer_review_data():
-    """Debug route to check peer review data"""
-    try:
-        observer_id = session.get("user_id")
-        supabase = get_supabase_client()
+    """Debug route to check peer review data, streamed as JSON lines (one per section)"""
+    observer_id = session.get("user_id")
 
-        # Get observer's own reports
-        own_reports = (
+    def sections(supabase):
+        # Get observer's own reports (count plus the first 5 rows)
+        yield "own_reports", (
             supabase.table("observations")
-            .select("id, student_name, date, timestamp")
+            .select("id, student_name, date, timestamp", count="exact")
             .eq("username", observer_id)
+            .limit(5)
             .execute()
         )
 
-        # Get all observations from other observers
-        other_observations = (
+        # Get observations from other observers (count plus the first 5 rows)
+        yield "other_observations", (
             supabase.table("observations")
-            .select("id, student_name, observer_name, date, timestamp, username")
+            .select(
+                "id, student_name, observer_name, date, timestamp, username",
+                count="exact",
+            )
             .neq("username", observer_id)
+            .limit(5)
             .execute()
         )
 
-        # Get all peer reviews
-        all_reviews = supabase.table("peer_reviews").select("*").execute()
+        # Count all peer reviews
+        yield "all_reviews", (
+            supabase.table("peer_reviews").select("id", count="exact").limit(1).execute()
+        )
 
-        # Get completed reviews by this observer
-        my_reviews = (
+        # Get completed reviews by this observer (count plus the first 5 rows)
+        yield "my_reviews", (
             supabase.table("peer_reviews")
-            .select("*")
+            .select("*", count="exact")
             .eq("reviewer_id", observer_id)
+            .limit(5)
             .execute()
         )
 
-        debug_data = {
-            "observer_id": observer_id,
-            "own_reports_count": len(own_reports.data) if own_reports.data else 0,
-            "own_reports": own_reports.data[:5]
-            if own_reports.data
-            else [],  # Show first 5
-            "other_observations_count": len(other_observations.data)
-            if other_observations.data
-            else 0,
-            "other_observations": other_observations.data[:5]
-            if other_observations.data
-            else [],  # Show first 5
-            "all_reviews_count": len(all_reviews.data) if all_reviews.data else 0,
-            "my_reviews_count": len(my_reviews.data) if my_reviews.data else 0,
-            "my_reviews": my_reviews.data[:5]
-            if my_reviews.data
-            else [],  # Show first 5
-        }
+    def generate():
+        yield orjson.dumps({"observer_id": observer_id}) + b"\n"
+        try:
+            # Each section is sent as soon as its query returns
+            for name, result in sections(get_supabase_client()):
+                rows = [] if name == "all_reviews" else result.data or []
+                yield orjson.dumps(
+                    {"section": name, "count": result.count or 0, "rows": rows}
+                ) + b"\n"
+        except Exception as e:
+            yield orjson.dumps({"error": str(e)}) + b"\n"
 
-        return jsonify(debug_data)
-    except Exception as e:
-        return jsonify({"error": str(e)})
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 
 @observer_bp.route("/review_observation/<observation_id>")
@@ -1069,6 +1350,7 @@ def review_observation(observation_id):
                 .select("id")
                 .eq("observation_id", observation_id)
                 .eq("reviewer_id", observer_id)
+                .limit(1)
                 .execute()
             )
             if existing_review.data:
@@ -1078,29 +1360,18 @@ def review_observation(observation_id):
             logger.warning(f"Could not check existing review: {e}")
 
         # Process file URL for audio/media
+        file_type, file_basename = _media_fields(observation)
         if observation.get("file_url"):
-            observation["file_url"] = urllib.parse.quote(
-                observation["file_url"], safe=":/?#[]@!$&'()*+,;="
-            )
+            observation["file_url"] = _quote_file_url(observation["file_url"])
 
             # Create signed URL for audio files
-            if any(
-                ext in observation["file_url"].lower()
-                for ext in [".mp3", ".wav", ".m4a", ".ogg"]
-            ):
-                filename = observation["file_url"].split("/")[-1]
-                signed_url = get_signed_audio_url(filename)
+            if file_type == "audio":
+                signed_url = get_signed_audio_url(file_basename)
                 if signed_url:
                     observation["signed_url"] = signed_url
 
         # Extract formatted report from full_data
-        formatted_report = None
-        if observation.get("full_data"):
-            try:
-                full_data = json.loads(observation["full_data"])
-                formatted_report = full_data.get("formatted_report")
-            except:
-                pass
+        formatted_report = _formatted_report_from(observation.get("full_data"))
 
         return render_template(
             "observer/review_observation.html",
@@ -1115,37 +1386,46 @@ def review_observation(observation_id):
 
 # FIXED: Use service role client to bypass RLS completely
 def insert_peer_review_with_service_role(review_data):
-    """Insert peer review using service role client to bypass RLS completely"""
-    try:
-        from supabase import create_client
-        from config import Config
+    """Insert peer review using service role client to bypass RLS completely.
 
-        # Use service role key to bypass RLS completely
-        service_key = getattr(Config, "SUPABASE_SERVICE_KEY", None)
+    Returns REVIEW_INSERTED, REVIEW_DUPLICATE when the reviewer already reviewed
+    the observation, or None on failure.
+    """
+    try:
+        # Use service role client to bypass RLS completely
+        service_client = get_service_client()
 
-        if service_key:
-            service_client = create_client(Config.SUPABASE_URL, service_key)
-            # Use returning='minimal' to prevent automatic SELECT after INSERT
+        if service_client:
+            # INSERT ... ON CONFLICT DO NOTHING - only a newly inserted row comes back
             result = (
                 service_client.table("peer_reviews")
-                .insert(review_data, returning="minimal")
+                .upsert(
+                    review_data,
+                    on_conflict="observation_id,reviewer_id",
+                    ignore_duplicates=True,
+                )
                 .execute()
             )
-            # Check status code instead of data (since data will be empty with minimal)
-            return result.status_code == 201
+            status = REVIEW_INSERTED if result.data else REVIEW_DUPLICATE
         else:
-            # Fallback: try with regular client and returning='minimal'
+            # Fallback: regular client with returning='minimal', since RLS may not
+            # allow reading the row back. A plain INSERT, so a duplicate fails on the
+            # unique constraint (23505) instead of being skipped unnoticed
             supabase = get_supabase_client()
-            result = (
-                supabase.table("peer_reviews")
-                .insert(review_data, returning="minimal")
-                .execute()
-            )
-            return result.status_code == 201
+            supabase.table("peer_reviews").insert(
+                review_data, returning="minimal"
+            ).execute()
+            status = REVIEW_INSERTED
 
     except Exception as e:
+        if "duplicate key" in str(e) or "23505" in str(e):
+            return REVIEW_DUPLICATE
         logger.error(f"Service role insert failed: {e}")
-        return False
+        return None
+
+    if status == REVIEW_INSERTED:
+        record_peer_review(review_data.get("observation_id"))
+    return status
 
 
 @observer_bp.route("/submit_peer_review/<observation_id>", methods=["POST"])
@@ -1211,9 +1491,9 @@ def submit_peer_review_route(observation_id):
         }
 
         # FIXED: Use service role client to completely bypass RLS
-        success = insert_peer_review_with_service_role(review_data)
+        status = insert_peer_review_with_service_role(review_data)
 
-        if success:
+        if status == REVIEW_INSERTED:
             # Send notification to the CORRECT principal
             if observed_user_org_id:
                 send_peer_review_notification_to_principal(
@@ -1228,6 +1508,8 @@ def submit_peer_review_route(observation_id):
                 "Peer review submitted successfully! This observation has been removed from all review lists.",
                 "success",
             )
+        elif status == REVIEW_DUPLICATE:
+            flash("You have already reviewed this observation", "warning")
         else:
             flash("Error submitting peer review. Please try again.", "error")
 
@@ -1245,37 +1527,36 @@ def send_peer_review_notification_to_principal(
     try:
         supabase = get_supabase_client()
 
-        # Get principal for the OBSERVED USER's organization
-        principal = (
-            supabase.table("users")
-            .select("id, name")
-            .eq("organization_id", observed_user_org_id)
-            .eq("role", "Principal")
-            .execute()
-        )
-
-        # Get reviewer details
-        reviewer = (
+        # Reviewer, observed user and the principal of the OBSERVED USER's
+        # organization, in one query
+        users = (
             supabase.table("users")
-            .select("name, organization_id")
-            .eq("id", reviewer_id)
+            .select("id, name, organization_id, role")
+            .or_(
+                f"id.in.({reviewer_id},{observed_by}),"
+                f"and(organization_id.eq.{observed_user_org_id},role.eq.Principal)"
+            )
             .execute()
-        )
-        reviewer_name = (
-            reviewer.data[0]["name"] if reviewer.data else "Unknown Reviewer"
+        ).data or []
+        users_by_id = {user["id"]: user for user in users}
+        principal = next(
+            (
+                user
+                for user in users
+                if user.get("role") == "Principal"
+                and user.get("organization_id") == observed_user_org_id
+            ),
+            None,
         )
 
-        # Get observed user details
-        observed_user = (
-            supabase.table("users").select("name").eq("id", observed_by).execute()
-        )
+        reviewer_name = users_by_id.get(reviewer_id, {}).get("name") or "Unknown Reviewer"
         observed_user_name = (
-            observed_user.data[0]["name"] if observed_user.data else "Unknown Observer"
+            users_by_id.get(observed_by, {}).get("name") or "Unknown Observer"
         )
 
-        if principal.data:
-            principal_id = principal.data[0]["id"]
-            principal_name = principal.data[0]["name"]
+        if principal:
+            principal_id = principal["id"]
+            principal_name = principal["name"]
 
             # Create notification record
             notification_data = {
@@ -1342,6 +1623,19 @@ def get_principal_feedback_for_observer(observer_id):
 # ALL EXISTING ROUTES BELOW REMAIN UNCHANGED
 
 
+def _report_download_name(report, extension):
+    """Download filename for an observation report, named after the student and date"""
+    student_name = report["student_name"]
+    if student_name:
+        clean_name = re.sub(r"[^\w\s-]", "", student_name).strip()
+        clean_name = re.sub(r"[-\s]+", "_", clean_name)
+    else:
+        clean_name = "Student"
+
+    date = report["date"] if report["date"] else datetime.now().strftime("%Y-%m-%d")
+    return f"observation_report_{clean_name}_{date}.{extension}"
+
+
 @observer_bp.route("/download_report")
 @login_required
 @observer_required
@@ -1357,7 +1651,7 @@ def download_report():
         supabase = get_supabase_client()
         report_data = (
             supabase.table("observations")
-            .select("*")
+            .select("student_name, date")
             .eq("id", report_id)
             .execute()
             .data
@@ -1367,41 +1661,42 @@ def download_report():
             flash("Report not found", "error")
             return redirect(url_for("observer.process_observation"))
 
-        report = report_data[0]
+        filename = _report_download_name(report_data[0], "docx")
+
+        # Documents built by an earlier download are served straight from storage
+        storage_path = f"{report_id}.docx"
+        stored_url = get_stored_report_url(storage_path, filename)
+        if stored_url:
+            return redirect(stored_url)
 
         # Get formatted report from full_data
-        formatted_report = None
-        if report.get("full_data"):
-            try:
-                full_data = json.loads(report["full_data"])
-                formatted_report = full_data.get("formatted_report")
-            except Exception as e:
-                pass
+        full_data = (
+            supabase.table("observations")
+            .select("full_data")
+            .eq("id", report_id)
+            .execute()
+            .data
+        )
+        formatted_report = _formatted_report_from(
+            full_data[0].get("full_data") if full_data else None
+        )
 
         if not formatted_report:
             flash("No formatted report available", "error")
             return redirect(url_for("observer.process_observation"))
 
         # Create Word document with emoji support
-        extractor = ObservationExtractor()
+        extractor = get_observation_extractor()
         doc_buffer = extractor.create_word_document_with_emojis(formatted_report)
-
-        # Create proper filename with student name
-        student_name = report["student_name"]
-        if student_name:
-            clean_name = re.sub(r"[^\w\s-]", "", student_name).strip()
-            clean_name = re.sub(r"[-\s]+", "_", clean_name)
-        else:
-            clean_name = "Student"
-
-        date = report["date"] if report["date"] else datetime.now().strftime("%Y-%m-%d")
-        filename = f"observation_report_{clean_name}_{date}.docx"
+        _media_executor.submit(
+            store_report_file, storage_path, doc_buffer.getvalue(), DOCX_MIMETYPE
+        )
 
         return send_file(
             doc_buffer,
             as_attachment=True,
             download_name=filename,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            mimetype=DOCX_MIMETYPE,
         )
 
     except Exception as e:
@@ -1424,7 +1719,7 @@ def download_pdf():
         supabase = get_supabase_client()
         report_data = (
             supabase.table("observations")
-            .select("*")
+            .select("student_name, date")
             .eq("id", report_id)
             .execute()
             .data
@@ -1434,35 +1729,36 @@ def download_pdf():
             flash("Report not found", "error")
             return redirect(url_for("observer.process_observation"))
 
-        report = report_data[0]
+        filename = _report_download_name(report_data[0], "pdf")
+
+        # Documents built by an earlier download are served straight from storage
+        storage_path = f"{report_id}.pdf"
+        stored_url = get_stored_report_url(storage_path, filename)
+        if stored_url:
+            return redirect(stored_url)
 
         # Get formatted report
-        formatted_report = None
-        if report.get("full_data"):
-            try:
-                full_data = json.loads(report["full_data"])
-                formatted_report = full_data.get("formatted_report")
-            except:
-                pass
+        full_data = (
+            supabase.table("observations")
+            .select("full_data")
+            .eq("id", report_id)
+            .execute()
+            .data
+        )
+        formatted_report = _formatted_report_from(
+            full_data[0].get("full_data") if full_data else None
+        )
 
         if not formatted_report:
             flash("No formatted report available", "error")
             return redirect(url_for("observer.process_observation"))
 
         # Use alternative PDF creation method without WeasyPrint
-        extractor = ObservationExtractor()
+        extractor = get_observation_extractor()
         pdf_buffer = extractor.create_pdf_alternative(formatted_report)
-
-        # Create proper filename with student name
-        student_name = report["student_name"]
-        if student_name:
-            clean_name = re.sub(r"[^\w\s-]", "", student_name).strip()
-            clean_name = re.sub(r"[-\s]+", "_", clean_name)
-        else:
-            clean_name = "Student"
-
-        date = report["date"] if report["date"] else datetime.now().strftime("%Y-%m-%d")
-        filename = f"observation_report_{clean_name}_{date}.pdf"
+        _media_executor.submit(
+            store_report_file, storage_path, pdf_buffer.getvalue(), "application/pdf"
+        )
 
         return send_file(
             pdf_buffer,
@@ -1491,7 +1787,7 @@ def email_report():
         supabase = get_supabase_client()
         report_data = (
             supabase.table("observations")
-            .select("*")
+            .select("student_name, date, full_data")
             .eq("id", report_id)
             .execute()
             .data
@@ -1515,7 +1811,7 @@ def email_report():
             return jsonify({"success": False, "error": "No formatted report available"})
 
         # Send email
-        extractor = ObservationExtractor()
+        extractor = get_observation_extractor()
         subject = f"Observation Report for {report['student_name']} - {report['date']}"
         success, message = extractor.send_email(
             recipient_email, subject, formatted_report
@@ -1534,7 +1830,7 @@ def custom_report():
     child_id = request.form.get("child_id")
     prompt = request.form.get("prompt")
 
-    extractor = ObservationExtractor()
+    extractor = get_observation_extractor()
     try:
         report = extractor.generate_custom_report_from_prompt(prompt, child_id)
 
@@ -1548,73 +1844,124 @@ def custom_report():
         return jsonify({"success": False, "error": str(e)})
 
 
-@observer_bp.route("/download_custom_report")
-@login_required
-@observer_required
-def download_custom_report():
-    try:
-        custom_report = session.get("last_custom_report")
-        if not custom_report:
-            flash("No custom report available for download", "error")
-            return redirect(url_for("observer.process_observation"))
-
-        # Check if the report is in JSON format and needs formatting
-        formatted_report = custom_report
-        if (
-            custom_report.strip().startswith("📋 Daily Insights")
-            and "```json" in custom_report
-        ):
-            # This is the problematic format - extract and format the JSON
-            try:
-                import json
-
-                # Extract JSON from the markdown
-                start_idx = custom_report.find("```json") + 7
-                end_idx = custom_report.find("```", start_idx)
-                if start_idx > 6 and end_idx > start_idx:
-                    json_text = custom_report[start_idx:end_idx].strip()
-                    json_data = json.loads(json_text)
-
-                    # Format it properly
-                    formatted_report = f"""
-📋 Custom Report: {json_data.get("className", "Custom Analysis Report")}
+# Layout of a custom report whose AI output came back as fenced JSON
+_CUSTOM_REPORT_TMPL = string.Template(
+    """📋 Custom Report: $className
 
-🧒 Student Name: {json_data.get("studentName", "Student")}
-📅 Date: {json_data.get("date", datetime.now().strftime("%Y-%m-%d"))}
+🧒 Student Name: $studentName
+📅 Date: $date
 📝 Report Type: Custom Analysis
 
 📊 Observations Summary:
-{json_data.get("observations", "No observations available")}
+$observations
 
 ⭐ Strengths Identified:
-{chr(10).join([f"• {strength}" for strength in json_data.get("strengths", [])])}
+$strengths
 
 📈 Areas for Development:
-{chr(10).join([f"• {area}" for area in json_data.get("areasOfDevelopment", [])])}
+$areasOfDevelopment
 
 💡 Recommendations:
-{chr(10).join([f"• {rec}" for rec in json_data.get("recommendations", [])])}
+$recommendations
+
+📋 Report Generated: $generated"""
+)
+
+
+def _bullets(items):
+    """One "• item" line per item"""
+    return "\n".join(f"• {item}" for item in items)
+
+
+# Markdown fences around the JSON some generated custom reports embed
+JSON_FENCE = "```json"
+CODE_FENCE = "```"
+
+
+def _extract_fenced_json(text):
+    """Contents of the first ```json fenced block in text, or None if there is none"""
+    _, fence, rest = text.partition(JSON_FENCE)
+    if not fence:
+        return None
+    body, closing, _ = rest.partition(CODE_FENCE)
+    return body.strip() if closing else None
+
+
+def _get_formatted_custom_report(custom_report, now):
+    """Formatted version of the session's custom report, shared by both downloads.
+
+    The result is kept in the session next to the raw report, keyed by a digest of
+    it, so a new report invalidates it and repeat downloads skip the JSON parse.
+    `now` is the download's request time, used for the report's default date and
+    generated-at stamp.
+    """
+    digest = hashlib.blake2b(custom_report.encode(), digest_size=16).hexdigest()
+    cached = session.get("last_custom_report_fmt")
+    if cached and cached.get("digest") == digest:
+        return cached["report"]
+
+    # Check if the report is in JSON format and needs formatting
+    formatted_report = custom_report
+    json_text = _extract_fenced_json(custom_report)
+    if json_text:
+        # This is the problematic format - format the embedded JSON
+        try:
+            json_data = orjson.loads(json_text)
+
+            # Format it properly
+            formatted_report = _CUSTOM_REPORT_TMPL.substitute(
+                className=json_data.get("className", "Custom Analysis Report"),
+                studentName=json_data.get("studentName", "Student"),
+                date=json_data.get("date", now.strftime("%Y-%m-%d")),
+                observations=json_data.get(
+                    "observations", "No observations available"
+                ),
+                strengths=_bullets(json_data.get("strengths", ())),
+                areasOfDevelopment=_bullets(
+                    json_data.get("areasOfDevelopment", ())
+                ),
+                recommendations=_bullets(json_data.get("recommendations", ())),
+                generated=now.strftime("%Y-%m-%d %H:%M:%S"),
+            )
+        except Exception as format_error:
+            # If formatting fails, use the original report
+            formatted_report = custom_report
+
+    session["last_custom_report_fmt"] = {"digest": digest, "report": formatted_report}
+    return formatted_report
+
+
+def _load_custom_report_or_redirect():
+    """(report, None) for the session's custom report, or (None, redirect) if there is none"""
+    custom_report = session.get("last_custom_report")
+    if not custom_report:
+        flash("No custom report available for download", "error")
+        return None, redirect(url_for("observer.process_observation"))
+    return custom_report, None
+
+
+@observer_bp.route("/download_custom_report")
+@login_required
+@observer_required
+def download_custom_report():
+    try:
+        custom_report, redirect_response = _load_custom_report_or_redirect()
+        if redirect_response:
+            return redirect_response
 
-📋 Report Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-                    """.strip()
-            except Exception as format_error:
-                # If formatting fails, use the original report
-                formatted_report = custom_report
+        now = datetime.now()
+        formatted_report = _get_formatted_custom_report(custom_report, now)
 
         # Create Word document
-        extractor = ObservationExtractor()
-        doc_buffer = extractor.create_word_document_with_emojis(formatted_report)
+        extractor = get_observation_extractor()
+        doc_buffer = new_document_spool()
+        extractor.create_word_document_with_emojis(formatted_report, output=doc_buffer)
 
         # Create filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"custom_report_{timestamp}.docx"
 
-        return send_file(
-            doc_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        )
+        return send_spooled_document(doc_buffer, filename, DOCX_MIMETYPE)
 
     except Exception as e:
         flash(f"Error downloading custom report: {str(e)}", "error")
@@ -1626,68 +1973,23 @@ def download_custom_report():
 @observer_required
 def download_custom_pdf():
     try:
-        custom_report = session.get("last_custom_report")
-        if not custom_report:
-            flash("No custom report available for download", "error")
-            return redirect(url_for("observer.process_observation"))
-
-        # Check if the report is in JSON format and needs formatting
-        formatted_report = custom_report
-        if (
-            custom_report.strip().startswith("📋 Daily Insights")
-            and "```json" in custom_report
-        ):
-            # This is the problematic format - extract and format the JSON
-            try:
-                import json
-
-                # Extract JSON from the markdown
-                start_idx = custom_report.find("```json") + 7
-                end_idx = custom_report.find("```", start_idx)
-                if start_idx > 6 and end_idx > start_idx:
-                    json_text = custom_report[start_idx:end_idx].strip()
-                    json_data = json.loads(json_text)
-
-                    # Format it properly
-                    formatted_report = f"""
-📋 Custom Report: {json_data.get("className", "Custom Analysis Report")}
-
-🧒 Student Name: {json_data.get("studentName", "Student")}
-📅 Date: {json_data.get("date", datetime.now().strftime("%Y-%m-%d"))}
-📝 Report Type: Custom Analysis
-
-📊 Observations Summary:
-{json_data.get("observations", "No observations available")}
-
-⭐ Strengths Identified:
-{chr(10).join([f"• {strength}" for strength in json_data.get("strengths", [])])}
-
-📈 Areas for Development:
-{chr(10).join([f"• {area}" for area in json_data.get("areasOfDevelopment", [])])}
+        custom_report, redirect_response = _load_custom_report_or_redirect()
+        if redirect_response:
+            return redirect_response
 
-💡 Recommendations:
-{chr(10).join([f"• {rec}" for rec in json_data.get("recommendations", [])])}
-
-📋 Report Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-                    """.strip()
-            except Exception as format_error:
-                # If formatting fails, use the original report
-                formatted_report = custom_report
+        now = datetime.now()
+        formatted_report = _get_formatted_custom_report(custom_report, now)
 
         # Create PDF using alternative method
-        extractor = ObservationExtractor()
-        pdf_buffer = extractor.create_pdf_alternative(formatted_report)
+        extractor = get_observation_extractor()
+        pdf_buffer = new_document_spool()
+        extractor.create_pdf_alternative(formatted_report, output=pdf_buffer)
 
         # Create filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"custom_report_{timestamp}.pdf"
 
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype="application/pdf",
-        )
+        return send_spooled_document(pdf_buffer, filename, "application/pdf")
 
     except Exception as e:
         flash(f"Error downloading custom PDF: {str(e)}", "error")
@@ -1706,7 +2008,7 @@ def email_custom_report():
             return jsonify({"success": False, "error": "Missing report or email"})
 
         # Send email
-        extractor = ObservationExtractor()
+        extractor = get_observation_extractor()
         subject = f"Custom Observation Report - {datetime.now().strftime('%Y-%m-%d')}"
         success, message = extractor.send_email(recipient_email, subject, custom_report)
 
@@ -1763,33 +2065,12 @@ def add_goal():
     return redirect(url_for("observer.goals"))
 
 
-@observer_bp.route("/messages")
-@login_required
-@observer_required
-def messages():
-    observer_id = session.get("user_id")
-    children = get_observer_children(observer_id)
-    supabase = get_supabase_client()
-
-    # Get parents for observer's children
-    parents = []
-    for child in children:
-        try:
-            parent_data = (
-                supabase.table("users")
-                .select("*")
-                .eq("child_id", child["id"])
-                .eq("role", "Parent")
-                .execute()
-                .data
-            )
-            if parent_data:
-                parents.extend(parent_data)
-        except Exception as e:
-            logger.error(f"Error fetching parents for child {child['id']}: {str(e)}")
-
-    # Get parent feedback for observer's reports
+def _parent_feedback_for(supabase, observer_id, children):
+    """Parent feedback on the observer's reports (newest first) and the parents of their children"""
+    # Get parent feedback for observer's reports, with the feedback for every report
+    # and the responses to every feedback fetched in one query each
     feedback_data = []
+    feedback_child_ids = set()
     try:
         reports = (
             supabase.table("observations")
@@ -1798,53 +2079,80 @@ def messages():
             .execute()
             .data
         )
+        reports_by_id = {report["id"]: report for report in reports}
+
+        feedback_data = _select_in(
+            lambda: supabase.table("parent_feedback").select(
+                "id, report_id, feedback_text, rating, timestamp"
+            ),
+            "report_id",
+            list(reports_by_id),
+        )
 
-        for report in reports:
-            try:
-                feedback = (
-                    supabase.table("parent_feedback")
-                    .select("*")
-                    .eq("report_id", report["id"])
-                    .execute()
-                    .data
-                )
-                for fb in feedback:
-                    # Get parent info
-                    parent_info = (
-                        supabase.table("users")
-                        .select("name, email")
-                        .eq("child_id", report["student_id"])
-                        .eq("role", "Parent")
-                        .execute()
-                        .data
-                    )
-                    fb["parent_info"] = (
-                        parent_info[0]
-                        if parent_info
-                        else {"name": "Unknown Parent", "email": ""}
-                    )
-                    fb["report_info"] = report
-
-                    # Check for observer response
-                    response = (
-                        supabase.table("feedback_responses")
-                        .select("*")
-                        .eq("feedback_id", fb["id"])
-                        .execute()
-                        .data
-                    )
-                    fb["observer_response"] = response[0] if response else None
-
-                    feedback_data.append(fb)
-            except Exception as e:
-                logger.error(
-                    f"Error processing feedback for report {report['id']}: {str(e)}"
-                )
+        responses_by_feedback = {}
+        for response in _select_in(
+            lambda: supabase.table("feedback_responses").select(
+                "id, feedback_id, response_text, timestamp"
+            ),
+            "feedback_id",
+            [fb["id"] for fb in feedback_data],
+        ):
+            responses_by_feedback.setdefault(response["feedback_id"], response)
 
-        # Sort by timestamp (newest first)
-        feedback_data.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        for fb in feedback_data:
+            fb["report_info"] = reports_by_id[fb["report_id"]]
+            fb["observer_response"] = responses_by_feedback.get(fb["id"])
+            feedback_child_ids.add(fb["report_info"]["student_id"])
     except Exception as e:
         logger.error(f"Error loading reports: {str(e)}")
+        feedback_data = []
+
+    # Parents of the observer's children and of the children feedback was left on
+    child_ids = [child["id"] for child in children]
+    parents_by_child = {}
+    try:
+        for parent in _select_in(
+            lambda: supabase.table("users")
+            .select("id, name, email, child_id")
+            .eq("role", "Parent"),
+            "child_id",
+            list(set(child_ids) | feedback_child_ids),
+        ):
+            parents_by_child.setdefault(parent["child_id"], []).append(parent)
+    except Exception as e:
+        logger.error(f"Error fetching parents for observer {observer_id}: {str(e)}")
+
+    parents = [
+        parent for child_id in child_ids for parent in parents_by_child.get(child_id, [])
+    ]
+
+    for fb in feedback_data:
+        child_parents = parents_by_child.get(fb["report_info"]["student_id"])
+        fb["parent_info"] = (
+            {"name": child_parents[0]["name"], "email": child_parents[0]["email"]}
+            if child_parents
+            else {"name": "Unknown Parent", "email": ""}
+        )
+
+    # Sort by timestamp (newest first)
+    feedback_data.sort(key=itemgetter("timestamp"), reverse=True)
+    return feedback_data, parents
+
+
+@observer_bp.route("/messages")
+@login_required
+@observer_required
+def messages():
+    observer_id = session.get("user_id")
+    children = get_observer_children(observer_id)
+    supabase = get_supabase_client()
+
+    # Feedback is only left on reports about the observer's children, so a new
+    # observer with none skips the report, feedback and parent lookups
+    if children:
+        feedback_data, parents = _parent_feedback_for(supabase, observer_id, children)
+    else:
+        feedback_data, parents = [], []
 
     # ===== PRINCIPAL FEEDBACK SECTION =====
     principal_feedback = []
@@ -1861,19 +2169,17 @@ def messages():
             principal_feedback_response.data if principal_feedback_response.data else []
         )
 
-        # Enrich with principal names
-        for fb in principal_feedback:
-            principal_info = (
-                supabase.table("users")
-                .select("name")
-                .eq("id", fb["principal_id"])
-                .single()
-                .execute()
-                .data
-            )
-            fb["principal_name"] = (
-                principal_info["name"] if principal_info else "Unknown Principal"
+        # Enrich with principal names, looked up together
+        name_by_id = {
+            user["id"]: user["name"]
+            for user in _select_in(
+                lambda: supabase.table("users").select("id, name"),
+                "id",
+                [fb["principal_id"] for fb in principal_feedback],
             )
+        }
+        for fb in principal_feedback:
+            fb["principal_name"] = name_by_id.get(fb["principal_id"], "Unknown Principal")
     except Exception as e:
         logger.error(f"Error loading principal feedback: {str(e)}")
 
@@ -1886,6 +2192,24 @@ def messages():
     )  # Pass to template
 
 
+# Longest value list sent in one PostgREST in.() filter
+IN_FILTER_CHUNK = 100
+
+
+def _select_in(make_query, column, values):
+    """Rows whose `column` is in `values`, for the query built by make_query().
+
+    Values are sent IN_FILTER_CHUNK at a time so long ID lists don't overflow
+    the request URL; no query is made when there are no values.
+    """
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    rows = []
+    for start in range(0, len(values), IN_FILTER_CHUNK):
+        chunk = values[start : start + IN_FILTER_CHUNK]
+        rows.extend(make_query().in_(column, chunk).execute().data or [])
+    return rows
+
+
 @observer_bp.route("/respond_to_feedback", methods=["POST"])
 @login_required
 @observer_required
@@ -1947,6 +2271,46 @@ def get_messages(parent_id):
     return jsonify(messages)
 
 
+def _insert_queued_message(message_data):
+    """Insert a message queued by _queue_message, freeing its backlog slot.
+
+    Retries are idempotent: a row already written by an attempt that timed out is
+    skipped as a duplicate id. After the last failed attempt the message is recorded
+    in _failed_messages.
+    """
+    try:
+        for attempt in range(1, MESSAGE_INSERT_ATTEMPTS + 1):
+            try:
+                get_supabase_client().table("messages").upsert(
+                    message_data, ignore_duplicates=True
+                ).execute()
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Error saving message {message_data['id']} (attempt {attempt}): {str(e)}"
+                )
+                if attempt < MESSAGE_INSERT_ATTEMPTS:
+                    time.sleep(attempt)
+
+        logger.error(f"Giving up on message {message_data['id']}")
+        conversation = (message_data["sender_id"], message_data["receiver_id"])
+        with _failed_messages_lock:
+            _failed_messages.setdefault(conversation, []).append(
+                {**message_data, "failed": True}
+            )
+    finally:
+        _message_backlog.release()
+
+
+def _queue_message(message_data):
+    """Insert a message in the background; True if queued, False if inserted inline"""
+    if _message_backlog.acquire(blocking=False):
+        _message_executor.submit(_insert_queued_message, message_data)
+        return True
+    get_supabase_client().table("messages").insert(message_data).execute()
+    return False
+
+
 @observer_bp.route("/send_message", methods=["POST"])
 @login_required
 @observer_required
@@ -1965,8 +2329,8 @@ def send_message():
     }
 
     try:
-        supabase = get_supabase_client()
-        supabase.table("messages").insert(message_data).execute()
+        # The form post redirects afterwards, so nothing is gained by deferring the insert
+        get_supabase_client().table("messages").insert(message_data).execute()
         flash("Message sent successfully!", "success")
     except Exception as e:
         flash(f"Error sending message: {str(e)}", "error")
@@ -1979,39 +2343,13 @@ def send_message():
 @observer_required
 def get_messages_api(parent_id):
     observer_id = session.get("user_id")
-    try:
-        supabase = get_supabase_client()
-
-        # Get messages in both directions using separate queries
-        messages1 = (
-            supabase.table("messages")
-            .select("*")
-            .eq("sender_id", observer_id)
-            .eq("receiver_id", parent_id)
-            .order("timestamp", desc=False)
-            .execute()
-            .data
-        )
-
-        messages2 = (
-            supabase.table("messages")
-            .select("*")
-            .eq("sender_id", parent_id)
-            .eq("receiver_id", observer_id)
-            .order("timestamp", desc=False)
-            .execute()
-            .data
-        )
-
-        # Combine and sort messages
-        messages = sorted(
-            (messages1 or []) + (messages2 or []), key=lambda m: m["timestamp"]
-        )
-
-        return jsonify(messages)
-    except Exception as e:
-        print(f"Error getting messages: {str(e)}")
-        return jsonify([])
+    # One or_() query covers both directions, already ordered by timestamp
+    messages = get_messages_between_users(observer_id, parent_id)
+    with _failed_messages_lock:
+        failed = list(_failed_messages.get((observer_id, parent_id), ()))
+    if failed:
+        messages = sorted(messages + failed, key=itemgetter("timestamp"))
+    return jsonify(messages)
 
 
 @observer_bp.route("/send_message_api", methods=["POST"])
@@ -2026,7 +2364,6 @@ def send_message_api():
         return jsonify({"success": False, "error": "Missing data"})
 
     try:
-        supabase = get_supabase_client()
         message_data = {
             "id": str(uuid.uuid4()),
             "sender_id": observer_id,
@@ -2036,8 +2373,9 @@ def send_message_api():
             "read": False,
         }
 
-        supabase.table("messages").insert(message_data).execute()
-        return jsonify({"success": True})
+        if _queue_message(message_data):
+            return jsonify({"success": True, "id": message_data["id"]}), 202
+        return jsonify({"success": True, "id": message_data["id"]})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -2052,6 +2390,78 @@ def monthly_reports():
     return render_template("observer/monthly_reports.html", children=children)
 
 
+def _monthly_charts(
+    report_generator,
+    observations,
+    goal_progress,
+    strength_counts,
+    development_counts,
+):
+    """The monthly report's charts as plotly JSON, reused while their inputs are unchanged"""
+    cache_key = hashlib.blake2b(
+        orjson.dumps(
+            [observations, goal_progress, strength_counts, development_counts],
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        ),
+        digest_size=16,
+    ).hexdigest()
+    with _monthly_chart_cache_lock:
+        charts = _monthly_chart_cache.get(cache_key)
+    if charts is not None:
+        return charts
+
+    figures = {
+        "observations": report_generator.generate_observation_frequency_chart(
+            observations
+        ),
+        "strengths": report_generator.generate_strengths_chart(strength_counts),
+        "development": report_generator.generate_development_areas_chart(
+            development_counts
+        ),
+        "goals": report_generator.generate_goal_progress_chart(goal_progress),
+    }
+    charts = {name: fig.to_json() if fig else None for name, fig in figures.items()}
+    with _monthly_chart_cache_lock:
+        _monthly_chart_cache[cache_key] = charts
+    return charts
+
+
+def _store_monthly_report(report_key, summary):
+    """Keep the last generated monthly summary for email_monthly_report"""
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(report_key, orjson.dumps(summary), ex=MONTHLY_REPORT_TTL)
+            session["last_monthly_report_key"] = report_key
+            session.pop("last_monthly_report", None)
+            return
+        except Exception as e:
+            logger.warning(f"Could not store monthly report in Redis, using the session: {e}")
+    session["last_monthly_report"] = summary
+    session.pop("last_monthly_report_key", None)
+
+
+def _has_monthly_report():
+    return "last_monthly_report_key" in session or "last_monthly_report" in session
+
+
+def _load_monthly_report():
+    """The summary saved by _store_monthly_report, or None if it has expired"""
+    report_key = session.get("last_monthly_report_key")
+    if report_key is None:
+        return session.get("last_monthly_report")
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        stored = client.get(report_key)
+    except Exception as e:
+        logger.warning(f"Could not read monthly report from Redis: {e}")
+        return None
+    return orjson.loads(stored) if stored else None
+
+
 @observer_bp.route("/generate_monthly_report", methods=["POST"])
 @login_required
 @observer_required
@@ -2081,15 +2491,17 @@ def generate_monthly_report():
     # Generate traditional charts for backward compatibility
     strength_counts = report_generator.get_strength_areas(observations)
     development_counts = report_generator.get_development_areas(observations)
-    obs_chart = report_generator.generate_observation_frequency_chart(observations)
-    strengths_chart = report_generator.generate_strengths_chart(strength_counts)
-    development_chart = report_generator.generate_development_areas_chart(
-        development_counts
+    charts = _monthly_charts(
+        report_generator,
+        observations,
+        goal_progress,
+        strength_counts,
+        development_counts,
     )
-    goals_chart = report_generator.generate_goal_progress_chart(goal_progress)
 
-    # Store in session for downloads
-    session["last_monthly_report"] = json_summary
+    # Keep for emailing; the session just remembers which report was generated last
+    report_key = f"mr:{session.get('user_id')}:{child_id}:{year}:{month}"
+    _store_monthly_report(report_key, json_summary)
     session.permanent = True
     session.modified = True
 
@@ -2097,14 +2509,7 @@ def generate_monthly_report():
         {
             "success": True,
             "summary": json_summary,
-            "charts": {
-                "observations": obs_chart.to_json() if obs_chart else None,
-                "strengths": strengths_chart.to_json() if strengths_chart else None,
-                "development": development_chart.to_json()
-                if development_chart
-                else None,
-                "goals": goals_chart.to_json() if goals_chart else None,
-            },
+            "charts": charts,
             "data": {
                 "observations_count": len(observations),
                 "goals_count": len(goal_progress),
@@ -2121,8 +2526,9 @@ def generate_monthly_report():
 def download_monthly_report():
     observer_id = session.get("user_id")
     child_id = request.args.get("child_id") or session.get("child_id")
-    year = request.args.get("year", datetime.now().year, type=int)
-    month = request.args.get("month", datetime.now().month, type=int)
+    now = datetime.now()
+    year = request.args.get("year", now.year, type=int)
+    month = request.args.get("month", now.month, type=int)
     filetype = request.args.get("filetype", "docx")  # 'docx' or 'pdf'
 
     if not child_id:
@@ -2149,10 +2555,8 @@ def download_monthly_report():
         )
 
         if isinstance(summary_json, str):
-            import json as _json
-
             try:
-                summary_json = _json.loads(summary_json)
+                summary_json = orjson.loads(summary_json)
             except Exception as e:
                 flash(
                     "Could not generate a valid summary for this report. Please check if there are enough daily reports for the selected month.",
@@ -2160,8 +2564,6 @@ def download_monthly_report():
                 )
                 return redirect(url_for("observer.monthly_reports"))
 
-        import calendar
-
         month_name = calendar.month_name[month]
         filename_base = f"{child_name}_Progress_Report_{month_name}_{year}"
 
@@ -2241,14 +2643,21 @@ def download_monthly_pdf():
 @observer_required
 def email_monthly_report():
     try:
-        monthly_report = session.get("last_monthly_report")
         recipient_email = request.form.get("recipient_email")
-
-        if not monthly_report or not recipient_email:
+        if not _has_monthly_report() or not recipient_email:
             return jsonify({"success": False, "error": "Missing report or email"})
 
+        monthly_report = _load_monthly_report()
+        if not monthly_report:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Report has expired, please generate it again",
+                }
+            )
+
         # Send email
-        extractor = ObservationExtractor()
+        extractor = get_observation_extractor()
         subject = f"Monthly Observation Report - {datetime.now().strftime('%Y-%m')}"
         success, message = extractor.send_email(
             recipient_email, subject, monthly_report
@@ -2344,38 +2753,19 @@ def apply():
                 "applied_at": datetime.now().isoformat(),
             }
 
-            # FIXED: Use service role client to bypass RLS
-            from supabase import create_client
-            from config import Config
-
-            service_key = getattr(Config, "SUPABASE_SERVICE_KEY", None)
+            # FIXED: Use service role client to bypass RLS; fall back to the
+            # regular client when no service key is configured. A failed
+            # insert raises and is handled below.
+            client = get_service_client() or get_supabase_client()
+            client.table("observer_applications").insert(
+                application_data, returning="minimal"
+            ).execute()
 
-            if service_key:
-                service_client = create_client(Config.SUPABASE_URL, service_key)
-                result = (
-                    service_client.table("observer_applications")
-                    .insert(application_data, returning="minimal")
-                    .execute()
-                )
-                success = result.status_code == 201
-            else:
-                # Fallback: try with regular client and returning='minimal'
-                supabase = get_supabase_client()
-                result = (
-                    supabase.table("observer_applications")
-                    .insert(application_data, returning="minimal")
-                    .execute()
-                )
-                success = result.status_code == 201
-
-            if success:
-                flash(
-                    "Observer application submitted successfully! You will be notified once reviewed.",
-                    "success",
-                )
-                return redirect(url_for("landing"))
-            else:
-                flash("Error submitting application. Please try again.", "error")
+            flash(
+                "Observer application submitted successfully! You will be notified once reviewed.",
+                "success",
+            )
+            return redirect(url_for("landing"))
 
         except Exception as e:
             logger.error(f"Error submitting observer application: {e}")
@@ -2390,6 +2780,122 @@ def apply():
     return render_template("observer/apply.html", organizations=organizations)
 
 
+def _suggestion_inputs(observer_id, child_id, observer_child_id, observer_limit, history_limit):
+    """(child_name, observer_data, child_history) for topic suggestions, fetched concurrently"""
+    name_future = _suggestion_data_executor.submit(get_child_name_cached, child_id)
+    observer_future = _suggestion_data_executor.submit(
+        get_observer_suggestion_data, observer_id, observer_child_id, observer_limit
+    )
+    child_history = get_child_learning_history(child_id, limit=history_limit)
+    return name_future.result() or "Student", observer_future.result(), child_history
+
+
+def _json_body(body, status):
+    """Response for an already-serialized JSON body"""
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _suggestions_cache_key(observer_id, child_id, observer_data, child_history):
+    """Cache key for suggestions generated from exactly these observation rows"""
+    row_ids = ",".join(str(row["id"]) for row in (*observer_data, *child_history))
+    return hashlib.blake2b(
+        f"{observer_id}:{child_id}:{row_ids}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def _cache_suggestions(cache_key, body):
+    """Remember a suggestions response body under cache_key (no-op without a key)"""
+    if cache_key:
+        with _suggestions_cache_lock:
+            _suggestions_cache[cache_key] = body
+
+
+def _generate_suggestions_payload(observer_data, child_history, child_name, payload):
+    """The suggestions response body and whether the AI generated it.
+
+    The second value is False when the extractor fell back to its canned suggestions,
+    which aren't worth caching.
+    """
+    suggestions, generated = get_observation_extractor().generate_topic_suggestions(
+        observer_data, child_history, child_name
+    )
+    return {**payload, "suggestions": suggestions}, generated
+
+
+if celery is not None:
+    @celery.task
+    def generate_suggestions_task(
+        observer_id, observer_data, child_history, child_name, payload, cache_key=None
+    ):
+        """Run _generate_suggestions_payload on a Celery worker"""
+        body, generated = _generate_suggestions_payload(
+            observer_data, child_history, child_name, payload
+        )
+        return {
+            "observer_id": observer_id,
+            "response": body,
+            "cache_key": cache_key if generated else None,
+        }
+
+
+def _suggestions_response(
+    observer_data, child_history, child_name, payload, cache_key=None
+):
+    """Generate topic suggestions, on a Celery worker when one is configured.
+
+    With a broker the request returns a task_id straight away and the page polls
+    topic_suggestions_result for the suggestions instead of holding this worker.
+    Generated suggestions are cached under cache_key when one is given.
+    """
+    if celery is not None:
+        try:
+            task = generate_suggestions_task.apply_async(
+                [
+                    session.get("user_id"),
+                    observer_data,
+                    child_history,
+                    child_name,
+                    payload,
+                    cache_key,
+                ],
+                expires=120,
+            )
+            return jsonify({"task_id": task.id, "status": "pending"}), 202
+        except Exception as e:
+            logger.warning(f"Could not queue topic suggestions, generating inline: {e}")
+    body, generated = _generate_suggestions_payload(
+        observer_data, child_history, child_name, payload
+    )
+    if generated:
+        _cache_suggestions(cache_key, body)
+    return jsonify(body)
+
+
+@observer_bp.route("/topic_suggestions/result/<task_id>")
+@login_required
+@observer_required
+def topic_suggestions_result(task_id):
+    """Poll for topic suggestions generated in the background"""
+    if celery is None:
+        return _json_body(_ERR_BACKGROUND_DISABLED, 404)
+
+    try:
+        result = celery.AsyncResult(task_id)
+        if result.state in ("PENDING", "STARTED", "RETRY"):
+            return jsonify({"task_id": task_id, "status": "pending"}), 202
+        if result.successful() and result.result:
+            # Only the observer who queued the task gets its suggestions
+            if result.result.get("observer_id") != session.get("user_id"):
+                return _json_body(_ERR_TASK_NOT_FOUND, 404)
+            _cache_suggestions(result.result["cache_key"], result.result["response"])
+            return jsonify(result.result["response"])
+        logger.error(f"Topic suggestion task {task_id} failed: {result.state}")
+    except Exception as e:
+        logger.error(f"Error reading topic suggestion task {task_id}: {str(e)}")
+
+    return _json_body(_ERR_SUGGESTIONS, 500)
+
+
 @observer_bp.route("/get_topic_suggestions", methods=["POST"])
 @login_required
 @observer_required
@@ -2400,50 +2906,47 @@ def get_topic_suggestions():
         child_id = request.json.get("child_id")
 
         if not child_id:
-            return jsonify({"success": False, "error": "Child ID is required"})
+            return _json_body(_ERR_CHILD_ID_REQUIRED, 400)
 
-        # Get child name
-        supabase = get_supabase_client()
-        child_data = (
-            supabase.table("children").select("name").eq("id", child_id).execute()
+        # Get child name and observation history for suggestions
+        child_name, observer_data, child_history = _suggestion_inputs(
+            observer_id, child_id, child_id, observer_limit=8, history_limit=12
         )
-        child_name = child_data.data[0]["name"] if child_data.data else "Student"
-
-        # Get observation history for suggestions
-        observer_data = get_observer_suggestion_data(observer_id, child_id, limit=8)
-        child_history = get_child_learning_history(child_id, limit=12)
 
-        # Generate suggestions using AI
-        extractor = ObservationExtractor()
-        suggestions = extractor.generate_topic_suggestions(
-            observer_data, child_history, child_name
+        # Suggestions already generated from the same observations are reused
+        cache_key = _suggestions_cache_key(
+            observer_id, child_id, observer_data, child_history
         )
+        with _suggestions_cache_lock:
+            cached = _suggestions_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
 
-        return jsonify(
+        # Generate suggestions using AI
+        return _suggestions_response(
+            observer_data,
+            child_history,
+            child_name,
             {
                 "success": True,
-                "suggestions": suggestions,
                 "child_name": child_name,
                 "data_points": {
                     "observer_observations": len(observer_data),
                     "child_history_count": len(child_history),
                 },
-            }
+            },
+            cache_key,
         )
 
     except Exception as e:
         logger.error(f"Error generating suggestions: {str(e)}")
-        return jsonify(
-            {
-                "success": False,
-                "error": "Failed to generate suggestions. Please try again.",
-            }
-        )
+        return _json_body(_ERR_SUGGESTIONS, 500)
 
 
 @observer_bp.route("/refresh_suggestions", methods=["POST"])
 @login_required
 @observer_required
+@rate_limited(5)
 def refresh_suggestions():
     """Refresh topic suggestions with different perspective"""
     try:
@@ -2451,28 +2954,21 @@ def refresh_suggestions():
         child_id = request.json.get("child_id")
 
         if not child_id:
-            return jsonify({"success": False, "error": "Child ID required"})
+            return _json_body(_ERR_CHILD_ID_REQUIRED, 400)
 
-        # Get more comprehensive data for refreshed suggestions
-        supabase = get_supabase_client()
-        child_data = (
-            supabase.table("children").select("name").eq("id", child_id).execute()
+        # Get more comprehensive data for refreshed suggestions: the observer's
+        # observations across all children
+        child_name, observer_data, child_history = _suggestion_inputs(
+            observer_id, child_id, None, observer_limit=15, history_limit=20
         )
-        child_name = child_data.data[0]["name"] if child_data.data else "Student"
 
-        # Get broader observation data
-        observer_data = get_observer_suggestion_data(
-            observer_id, None, limit=15
-        )  # All children
-        child_history = get_child_learning_history(child_id, limit=20)
-
-        extractor = ObservationExtractor()
-        suggestions = extractor.generate_topic_suggestions(
-            observer_data, child_history, child_name
+        return _suggestions_response(
+            observer_data,
+            child_history,
+            child_name,
+            {"success": True, "refreshed": True},
         )
 
-        return jsonify({"success": True, "suggestions": suggestions, "refreshed": True})
-
     except Exception as e:
         logger.error(f"Error refreshing suggestions: {str(e)}")
-        return jsonify({"success": False, "error": "Failed to refresh suggestions"})
+        return _json_body(_ERR_REFRESH, 500)
@@ -6,7 +6,8 @@ from models.database import (
     # Multi-tenant functions
     get_organizations, get_pending_observer_applications, review_observer_application,
     get_users_by_organization, get_children_by_organization, get_observer_child_mappings_by_organization,
-    create_principal_feedback, get_peer_reviews_for_organization, auto_assign_parent_to_organization
+    create_principal_feedback, get_peer_reviews_for_organization, auto_assign_parent_to_organization,
+    invalidate_child
 )
 from models.observation_extractor import ObservationExtractor
 from utils.decorators import principal_required
@@ -895,6 +896,7 @@ def delete_child(child_id):
             return redirect(url_for('principal.user_management'))
 
         supabase.table('children').delete().eq('id', child_id).execute()
+        invalidate_child(child_id)
         flash('Child deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting child: {str(e)}', 'error')
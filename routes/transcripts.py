@@ -1,21 +1,24 @@
 # routes/transcripts.py
 
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
 from flask_login import login_required
 import logging
+import orjson
+from extensions import celery
+from utils.decorators import rate_limited
 
 # 1. Import your ObservationExtractor class
 #    You must adjust this import path to match your project structure.
 #    I'm guessing its location, it might be in 'models' or 'services'
 try:
-    from models.observation_extractor import ObservationExtractor
+    from models.observation_extractor import get_observation_extractor
 except ImportError:
     # If the above fails, you might need to adjust the path
     # This is a common way to import from a parallel 'models' folder
     import sys
     import os
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from models.observation_extractor import ObservationExtractor
+    from models.observation_extractor import get_observation_extractor
 
 
 # Get a logger
@@ -24,22 +27,81 @@ logger = logging.getLogger(__name__)
 # 2. Create a new Blueprint
 transcripts_bp = Blueprint('transcripts', __name__)
 
+# Longest observation text accepted; anything longer would overrun the prompt budget
+# only after the LLM call had already been paid for
+MAX_RAW_CHARS = 60_000
 
-# 3. Add the route to process and save a new transcript
-@transcripts_bp.route('/process_and_save', methods=['POST'])
-@login_required
-def process_and_save_observation():
+# Transcript listings carry metadata only; /get_transcript/<id> returns the full text
+TRANSCRIPT_LIST_COLUMNS = 'id, session_date, student_name, observer_name'
+TRANSCRIPT_PAGE_SIZE = 20
+TRANSCRIPT_PAGE_MAX = 50
+
+# Fixed error bodies, serialized once at import
+ERR_NOT_JSON_OBJECT = orjson.dumps({"error": "Request body must be a JSON object."})
+ERR_USER_INFO_NOT_OBJECT = orjson.dumps({"error": "user_info must be an object."})
+ERR_MISSING_DATA = orjson.dumps({"error": "Missing required data: raw_text, child_id, or user session."})
+ERR_RAW_TEXT_NOT_STRING = orjson.dumps({"error": "raw_text must be a string."})
+ERR_RAW_TEXT_TOO_LONG = orjson.dumps({"error": "raw_text too long", "max": MAX_RAW_CHARS})
+ERR_MISSING_STUDENT_NAME = orjson.dumps({"error": "Missing required data: user_info.student_name."})
+ERR_BACKGROUND_DISABLED = orjson.dumps({"error": "Background generation is not enabled"})
+ERR_REPORTS_FAILED = orjson.dumps({"error": "Failed to generate reports."})
+ERR_BAD_PAGING = orjson.dumps({"error": "limit must be positive and offset non-negative"})
+ERR_TRANSCRIPT_NOT_FOUND = orjson.dumps({"error": "Transcript not found"})
+ERR_TASK_NOT_FOUND = orjson.dumps({"error": "Task not found"})
+
+
+def generate_observation_reports(raw_text, user_info, observer_id=None):
     """
-    This route takes raw text and generates all necessary reports.
+    Generate the conversational transcript and daily report for raw observation text
+    and save both in one transcripts row, so they are written in a single insert.
     """
-    
+    from models.database import save_transcript
+
+    extractor = get_observation_extractor()
+    conversational_transcript, daily_report = extractor.generate_transcript_and_report(raw_text, user_info)
+
+    saved = save_transcript({
+        "child_id": user_info.get('child_id'),
+        "observer_id": observer_id,
+        "session_date": user_info.get('session_date'),
+        "student_name": user_info.get('student_name'),
+        "observer_name": user_info.get('observer_name'),
+        "raw_text": raw_text,
+        "conversational_transcript": conversational_transcript,
+        "daily_report": daily_report,
+    })
+    return {
+        "success": True,
+        "daily_report": daily_report,
+        "conversational_transcript": conversational_transcript,
+        "transcript_id": saved.get('id') if saved else None,
+        "message": "Reports generated successfully." if saved else "Reports generated, but could not be saved."
+    }
+
+
+def _json_error(body, status):
+    """Error response for one of the pre-serialized ERR_ bodies"""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _sse_event(payload):
+    """One server-sent event carrying payload as JSON"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _read_observation_request():
+    """Parse a process_and_save body; returns (raw_text, user_info, None) or (None, None, error response)"""
     # 1. Get data from the frontend JSON request
-    data = request.json
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, None, _json_error(ERR_NOT_JSON_OBJECT, 400)
     raw_text = data.get('raw_text')
     child_id = data.get('child_id')
     
     # Get the user_info dict (student_name, observer_name, session_date, etc.)
     user_info = data.get('user_info', {}) 
+    if not isinstance(user_info, dict):
+        return None, None, _json_error(ERR_USER_INFO_NOT_OBJECT, 400)
     if 'child_id' not in user_info and child_id:
         user_info['child_id'] = child_id
     
@@ -47,58 +109,178 @@ def process_and_save_observation():
     observer_id = session.get('user_id') 
     
     if not all([raw_text, child_id, observer_id]):
-        return jsonify({"error": "Missing required data: raw_text, child_id, or user session."}), 400
-        
+        return None, None, _json_error(ERR_MISSING_DATA, 400)
+    if not isinstance(raw_text, str):
+        return None, None, _json_error(ERR_RAW_TEXT_NOT_STRING, 400)
+    if len(raw_text) > MAX_RAW_CHARS:
+        return None, None, _json_error(ERR_RAW_TEXT_TOO_LONG, 413)
+    # The report prompt addresses the student by this name
+    if not user_info.get('student_name'):
+        return None, None, _json_error(ERR_MISSING_STUDENT_NAME, 400)
+    return raw_text, user_info, None
+
+
+if celery is not None:
+    @celery.task
+    def generate_observation_reports_task(raw_text, user_info, observer_id=None):
+        """Run generate_observation_reports on a Celery worker.
+
+        The result carries observer_id so process_and_save_result only hands the
+        reports back to the observer who asked for them.
+        """
+        return {
+            "observer_id": observer_id,
+            "response": generate_observation_reports(raw_text, user_info, observer_id),
+        }
+
+
+# 3. Add the route to process and save a new transcript
+@transcripts_bp.route('/process_and_save', methods=['POST'])
+@login_required
+@rate_limited(20)
+def process_and_save_observation():
+    """
+    This route takes raw text, generates all necessary reports and saves them.
+    """
+    raw_text, user_info, error_response = _read_observation_request()
+    if error_response is not None:
+        return error_response
+    observer_id = session.get('user_id')
+
+    # 3. With a broker configured, free this worker and let the client poll for the report
+    if celery is not None:
+        try:
+            task = generate_observation_reports_task.apply_async([raw_text, user_info, observer_id])
+            return jsonify({"task_id": task.id, "status": "pending"}), 202
+        except Exception as e:
+            logger.warning(f"Could not queue observation reports, generating inline: {e}")
+
     try:
-        # 3. Initialize your extractor
-        extractor = ObservationExtractor()
-        
-        # 4. GENERATE the reports
-        
-        # --- Generate Conversational Transcript ---
-        conversational_transcript = extractor.generate_conversational_transcript(raw_text)
-        
-        # --- Generate Daily Insights Report ---
-        daily_report = extractor.generate_report_from_text(raw_text, user_info)
-        
-        
-        
-        # 6. Return the main report to the frontend to display
-        return jsonify({
-            "success": True,
-            "daily_report": daily_report, # Send back the main report
-            "message": "Reports generated successfully."
-        })
+        # 4. GENERATE and SAVE the reports, then return the main report to the frontend to display
+        return jsonify(generate_observation_reports(raw_text, user_info, observer_id))
     
     except Exception as e:
         logger.error(f"Error processing observation: {str(e)}")
         return jsonify({"error": f"An internal error occurred: {str(e)}"}), 500
 
 
+@transcripts_bp.route('/process_and_save/stream', methods=['POST'])
+@login_required
+@rate_limited(20)
+def process_and_save_stream():
+    """
+    Stream the daily report as server-sent events while Gemini generates it.
+
+    Each event carries {"delta": text}; the stream ends with {"done": true}, or
+    {"error": ...} if generation fails part way.
+    """
+    raw_text, user_info, error_response = _read_observation_request()
+    if error_response is not None:
+        return error_response
+
+    def generate():
+        try:
+            for delta in get_observation_extractor().stream_report_from_text(raw_text, user_info):
+                yield _sse_event({'delta': delta})
+        except Exception as e:
+            logger.error(f"Error streaming observation report: {str(e)}")
+            yield _sse_event({'error': 'Failed to generate report'})
+            return
+        yield _sse_event({'done': True})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@transcripts_bp.route('/process_and_save/result/<task_id>', methods=['GET'])
+@login_required
+def process_and_save_result(task_id):
+    """
+    Poll for reports generated in the background by process_and_save.
+    """
+    if celery is None:
+        return _json_error(ERR_BACKGROUND_DISABLED, 404)
+
+    try:
+        result = celery.AsyncResult(task_id)
+        if result.state in ("PENDING", "STARTED", "RETRY"):
+            return jsonify({"task_id": task_id, "status": "pending"}), 202
+        if result.successful() and result.result:
+            if result.result.get("observer_id") != session.get('user_id'):
+                return _json_error(ERR_TASK_NOT_FOUND, 404)
+            return jsonify(result.result["response"])
+        logger.error(f"Observation report task {task_id} failed: {result.state}")
+    except Exception as e:
+        logger.error(f"Error reading observation report task {task_id}: {str(e)}")
+
+    return _json_error(ERR_REPORTS_FAILED, 500)
+
+
 # 4. Add a route to GET all transcripts for a child
 @transcripts_bp.route('/get_transcripts/<child_id>', methods=['GET'])
 @login_required
 def get_transcripts_for_child(child_id):
     """
-    An example route to fetch all saved transcripts for a specific child.
+    An example route to list the logged-in observer's saved transcripts for a specific child, newest first.
+
+    Paged with ?limit= (at most TRANSCRIPT_PAGE_MAX) and ?offset=; next_offset is
+    null on the last page.
     """
+    limit = request.args.get('limit', TRANSCRIPT_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return _json_error(ERR_BAD_PAGING, 400)
+    limit = min(limit, TRANSCRIPT_PAGE_MAX)
+
     try:
         from models.database import get_supabase_client
         supabase = get_supabase_client()
         
-        # Get the logged-in user's ID
-        # user_id = session.get('user_id')
-        
-        # Fetch transcripts related to this child
-        # TODO: Add RLS or a .eq('observer_id', user_id) check
-        #       to ensure the user has permission to see them
-        response = supabase.table('transcripts').select('*') \
+        # Fetch this child's transcripts saved by the logged-in observer
+        response = supabase.table('transcripts').select(TRANSCRIPT_LIST_COLUMNS) \
             .eq('child_id', child_id) \
+            .eq('observer_id', session.get('user_id')) \
             .order('session_date', desc=True) \
+            .range(offset, offset + limit - 1) \
             .execute()
-            
-        return jsonify(response.data)
+
+        transcripts = response.data or []
+        return jsonify({
+            "data": transcripts,
+            "next_offset": offset + limit if len(transcripts) == limit else None
+        })
             
     except Exception as e:
         logger.error(f"Error fetching transcripts: {str(e)}")
+        return jsonify({"error": f"An internal error occurred: {str(e)}"}), 500
+
+
+# 5. Add a route to GET one transcript with its full text
+@transcripts_bp.route('/get_transcript/<transcript_id>', methods=['GET'])
+@login_required
+def get_transcript(transcript_id):
+    """
+    Fetch a single transcript saved by the logged-in observer, including the raw and
+    conversational text.
+    """
+    try:
+        from models.database import get_supabase_client
+        supabase = get_supabase_client()
+
+        # Only the observer who saved the transcript can read it
+        response = supabase.table('transcripts').select('*') \
+            .eq('id', transcript_id) \
+            .eq('observer_id', session.get('user_id')) \
+            .limit(1) \
+            .execute()
+
+        if not response.data:
+            return _json_error(ERR_TRANSCRIPT_NOT_FOUND, 404)
+        return jsonify(response.data[0])
+
+    except Exception as e:
+        logger.error(f"Error fetching transcript {transcript_id}: {str(e)}")
         return jsonify({"error": f"An internal error occurred: {str(e)}"}), 500
\ No newline at end of file
@@ -0,0 +1,42 @@
+-- Approve an observer application in one transaction: create the observer
+-- account and mark the application approved. Returns the new user id and the
+-- organization name so the admin route needs no follow-up lookup.
+CREATE OR REPLACE FUNCTION approve_observer_application(
+    app_id uuid,
+    org_id uuid,
+    temp_pw text,
+    admin_id uuid,
+    comments text
+)
+RETURNS TABLE (user_id uuid, org_name text)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    app observer_applications%ROWTYPE;
+    new_user_id uuid := gen_random_uuid();
+BEGIN
+    SELECT * INTO app FROM observer_applications WHERE id = app_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Observer application % not found', app_id;
+    END IF;
+
+    INSERT INTO users (id, email, name, password, role, organization_id, phone, created_at, created_by)
+    VALUES (new_user_id, app.applicant_email, app.applicant_name, temp_pw, 'Observer',
+            org_id, app.applicant_phone, now(), admin_id);
+
+    UPDATE observer_applications
+    SET application_status = 'approved',
+        status = 'approved',
+        reviewed_at = now(),
+        reviewed_by = admin_id,
+        organization_id = org_id,
+        temp_password = temp_pw,
+        admin_comments = comments,
+        review_notes = comments
+    WHERE id = app_id;
+
+    RETURN QUERY
+    SELECT new_user_id,
+           COALESCE((SELECT name FROM organizations WHERE id = org_id), 'Unknown Organization');
+END;
+$$;
@@ -0,0 +1,32 @@
+-- Bulk child -> organization assignment in one transaction: move the children,
+-- move their parents with them, and write the audit rows. Returns the number
+-- of children updated. Audit rows are skipped when acting_admin is NULL.
+CREATE OR REPLACE FUNCTION bulk_assign_children(pairs jsonb, acting_admin uuid DEFAULT NULL)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count int;
+BEGIN
+    WITH assigned AS (
+        UPDATE children c
+        SET organization_id = p.organization_id
+        FROM jsonb_to_recordset(pairs) AS p(child_id uuid, organization_id uuid)
+        WHERE c.id = p.child_id
+        RETURNING c.id, c.organization_id
+    ), parents AS (
+        UPDATE users u
+        SET organization_id = a.organization_id
+        FROM assigned a
+        WHERE u.child_id = a.id AND u.role = 'Parent'
+    ), logged AS (
+        INSERT INTO organization_audit_log (entity_id, entity_type, organization_id, action, admin_id, created_at)
+        SELECT a.id, 'child', a.organization_id, 'bulk_assigned', acting_admin, now()
+        FROM assigned a
+        WHERE acting_admin IS NOT NULL
+    )
+    SELECT count(*) INTO updated_count FROM assigned;
+
+    RETURN updated_count;
+END;
+$$;
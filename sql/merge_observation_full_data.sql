@@ -0,0 +1,10 @@
+-- Merge keys into an observation's full_data without resending the whole document.
+-- full_data holds serialized JSON text, so it is parsed, merged and written back.
+CREATE OR REPLACE FUNCTION merge_observation_full_data(obs_id uuid, jsonb_patch jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE observations
+    SET full_data = (COALESCE(NULLIF(full_data, ''), '{}')::jsonb || jsonb_patch)::text
+    WHERE id = obs_id;
+$$;
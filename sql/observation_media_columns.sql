@@ -0,0 +1,15 @@
+-- Media details of an observation's uploaded file, derived from file_url once when the
+-- row is written instead of on every peer review page render. Generated columns are
+-- filled in for existing rows when they are added, so no separate backfill is needed.
+ALTER TABLE observations
+    ADD COLUMN IF NOT EXISTS file_basename text
+        GENERATED ALWAYS AS (regexp_replace(file_url, '^.*/', '')) STORED;
+
+ALTER TABLE observations
+    ADD COLUMN IF NOT EXISTS file_type text
+        GENERATED ALWAYS AS (
+            CASE
+                WHEN lower(file_url) ~ '\.(mp3|wav|m4a|ogg)(\?|#|$)' THEN 'audio'
+                WHEN lower(file_url) ~ '\.(jpe?g|png|gif|bmp)(\?|#|$)' THEN 'image'
+            END
+        ) STORED;
@@ -0,0 +1,7 @@
+-- Aggregated observer application counts per status.
+-- Used by the admin observer applications page so stats are computed in Postgres
+-- instead of shipping every application row to the app just to count them.
+CREATE OR REPLACE VIEW observer_application_status_counts AS
+SELECT application_status, count(*)::int AS count
+FROM observer_applications
+GROUP BY application_status;
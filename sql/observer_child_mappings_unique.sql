@@ -0,0 +1,19 @@
+-- One mapping per observer/child pair. Lets create_observer_child_mapping insert with
+-- ON CONFLICT DO NOTHING instead of a separate existence check.
+-- The old check-then-insert path could store the same pair twice, so duplicates are
+-- removed first, keeping the first-written row of each pair. The table is locked
+-- against writes until the constraint is in place.
+BEGIN;
+
+LOCK TABLE observer_child_mappings IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM observer_child_mappings m
+USING observer_child_mappings keep
+WHERE m.observer_id = keep.observer_id
+  AND m.child_id = keep.child_id
+  AND m.ctid > keep.ctid;
+
+ALTER TABLE observer_child_mappings
+    ADD CONSTRAINT observer_child_mappings_observer_child_key UNIQUE (observer_id, child_id);
+
+COMMIT;
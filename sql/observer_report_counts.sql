@@ -0,0 +1,11 @@
+-- Per-observer observation counts split by processed_by_admin, in one grouped query.
+-- Used by the admin observer report counts page instead of two queries per observer.
+CREATE OR REPLACE FUNCTION observer_report_counts()
+RETURNS TABLE (username text, processed_by_admin boolean, report_count bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT o.username::text, o.processed_by_admin, count(*)
+    FROM observations o
+    GROUP BY o.username, o.processed_by_admin;
+$$;
@@ -0,0 +1,5 @@
+-- Let Postgres generate organization_audit_log ids so the app doesn't send one per row.
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+ALTER TABLE organization_audit_log
+    ALTER COLUMN id SET DEFAULT gen_random_uuid();
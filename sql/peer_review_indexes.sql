@@ -0,0 +1,9 @@
+-- Indexes behind the observer peer review page:
+--   observations by username, newest first: candidate observations and report counts
+--   peer_reviews by observation_id: the NOT EXISTS / reviewed-ID exclusion
+--   peer_reviews by reviewer, newest first: the observer's completed reviews
+-- Check plans before and after with
+--   EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM unreviewed_observations_for('<observer id>', now()::timestamp - interval '7 days', 20);
+CREATE INDEX IF NOT EXISTS obs_username_ts_desc ON observations (username, "timestamp" DESC);
+CREATE INDEX IF NOT EXISTS peer_reviews_observation_id_idx ON peer_reviews (observation_id);
+CREATE INDEX IF NOT EXISTS peer_reviews_reviewer_created_idx ON peer_reviews (reviewer_id, created_at DESC);
@@ -0,0 +1,25 @@
+-- One review per reviewer per observation. Lets insert_peer_review_with_service_role
+-- insert with ON CONFLICT DO NOTHING instead of a separate existence check.
+-- The old non-atomic path could record the same review twice, so duplicates are
+-- removed first, keeping each pair's oldest review. The table is locked against
+-- writes until the constraint is in place.
+BEGIN;
+
+LOCK TABLE peer_reviews IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM peer_reviews r
+USING (
+    SELECT ctid,
+           row_number() OVER (
+               PARTITION BY observation_id, reviewer_id
+               ORDER BY created_at, ctid
+           ) AS n
+    FROM peer_reviews
+) ranked
+WHERE r.ctid = ranked.ctid
+  AND ranked.n > 1;
+
+ALTER TABLE peer_reviews
+    ADD CONSTRAINT peer_reviews_obs_reviewer_uniq UNIQUE (observation_id, reviewer_id);
+
+COMMIT;
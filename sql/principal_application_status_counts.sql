@@ -0,0 +1,6 @@
+-- Aggregated principal application counts per status.
+-- Used by the admin principal applications page so stats don't require loading every row.
+CREATE OR REPLACE VIEW principal_application_status_counts AS
+SELECT status, count(*)::int AS count
+FROM principal_applications
+GROUP BY status;
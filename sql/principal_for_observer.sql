@@ -0,0 +1,13 @@
+-- Resolve the principal of an observer's organization in one round-trip.
+-- Used when notifying the principal about new AI reviews after an upload.
+CREATE OR REPLACE FUNCTION principal_for_observer(observer_id uuid)
+RETURNS TABLE (id uuid, name text, organization_id uuid)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT p.id, p.name::text, p.organization_id
+    FROM users o
+    JOIN users p ON p.organization_id = o.organization_id AND p.role = 'Principal'
+    WHERE o.id = principal_for_observer.observer_id
+    LIMIT 1;
+$$;
@@ -0,0 +1,17 @@
+-- Store an observation's AI review and the principal's notification in one call.
+-- Both writes share the function's transaction; notification may be NULL when
+-- the organization has no principal.
+CREATE OR REPLACE FUNCTION save_observation_review(obs_id uuid, jsonb_patch jsonb, notification jsonb DEFAULT NULL)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM merge_observation_full_data(obs_id, jsonb_patch);
+
+    IF notification IS NOT NULL THEN
+        INSERT INTO notifications (id, recipient_id, sender_id, type, title, message, data, created_at, read)
+        SELECT n.id, n.recipient_id, n.sender_id, n.type, n.title, n.message, n.data, n.created_at, n.read
+        FROM jsonb_populate_record(NULL::notifications, notification) AS n;
+    END IF;
+END;
+$$;
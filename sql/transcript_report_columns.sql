@@ -0,0 +1,8 @@
+-- Columns for saving a processed observation as one transcripts row: the raw text,
+-- the conversational transcript and the daily report are written in a single insert
+-- by process_and_save, so there is no second write to keep consistent.
+ALTER TABLE transcripts
+    ADD COLUMN IF NOT EXISTS observer_id uuid,
+    ADD COLUMN IF NOT EXISTS raw_text text,
+    ADD COLUMN IF NOT EXISTS conversational_transcript text,
+    ADD COLUMN IF NOT EXISTS daily_report text;
@@ -0,0 +1,10 @@
+-- Indexes behind the transcript listing and topic suggestions:
+--   transcripts by child, newest session first: the get_transcripts listing
+--   observations by observer, newest first: get_observer_suggestion_data
+--   observations by child, newest first: get_child_learning_history and the
+--   observer + child filter in get_observer_suggestion_data
+-- On a busy table, run each statement on its own as CREATE INDEX CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes while it builds.
+CREATE INDEX IF NOT EXISTS idx_transcripts_child_date ON transcripts (child_id, session_date DESC);
+CREATE INDEX IF NOT EXISTS idx_observations_observer_date ON observations (username, date DESC);
+CREATE INDEX IF NOT EXISTS idx_observations_student_date ON observations (student_id, date DESC);
@@ -0,0 +1,44 @@
+-- Recent observations by other observers that nobody has peer-reviewed yet, newest first.
+-- Used by the observer peer review page instead of fetching reviewed IDs and filtering
+-- client side. `since` is passed by the app so it matches the naive local timestamps
+-- the app writes. Supporting indexes are in peer_review_indexes.sql; file_type and
+-- file_basename come from observation_media_columns.sql.
+-- Returns only the columns the peer review page renders (full_data carries the
+-- formatted report). The function is SECURITY DEFINER, so it bypasses RLS on
+-- observations: only the service role may execute it, and the app calls it with the
+-- service-role client.
+DROP FUNCTION IF EXISTS unreviewed_observations_for(text, timestamp, int);
+
+CREATE FUNCTION unreviewed_observations_for(observer_id text, since timestamp, max_rows int)
+RETURNS TABLE (
+    id observations.id%TYPE,
+    student_name observations.student_name%TYPE,
+    observer_name observations.observer_name%TYPE,
+    date observations.date%TYPE,
+    "timestamp" observations."timestamp"%TYPE,
+    filename observations.filename%TYPE,
+    file_url observations.file_url%TYPE,
+    file_type observations.file_type%TYPE,
+    file_basename observations.file_basename%TYPE,
+    full_data observations.full_data%TYPE,
+    processed_by_admin observations.processed_by_admin%TYPE
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT o.id, o.student_name, o.observer_name, o.date, o."timestamp", o.filename,
+           o.file_url, o.file_type, o.file_basename, o.full_data, o.processed_by_admin
+    FROM observations o
+    WHERE o.username::text <> unreviewed_observations_for.observer_id
+      AND o."timestamp" >= unreviewed_observations_for.since
+      AND NOT EXISTS (
+          SELECT 1 FROM peer_reviews r WHERE r.observation_id = o.id
+      )
+    ORDER BY o."timestamp" DESC
+    LIMIT unreviewed_observations_for.max_rows;
+$$;
+
+REVOKE EXECUTE ON FUNCTION unreviewed_observations_for(text, timestamp, int) FROM public, anon, authenticated;
+GRANT EXECUTE ON FUNCTION unreviewed_observations_for(text, timestamp, int) TO service_role;
@@ -104,7 +104,12 @@ class SanjayaChatbot {
                 throw new Error('Network response was not ok');
             }
 
-            const data = await response.json();
+            let data = await response.json();
+
+            // 202 means the answer is being generated in the background
+            if (response.status === 202 && data.task_id) {
+                data = await this.pollResult(data.task_id);
+            }
             
             // Add bot response
             const botMessage = {
@@ -129,6 +134,19 @@ class SanjayaChatbot {
         }
     }
 
+    async pollResult(taskId) {
+        for (let attempt = 0; attempt < 60; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const response = await fetch(`/api/chatbot/result/${taskId}`);
+            if (response.status === 202) continue;
+            if (!response.ok) {
+                throw new Error('Chatbot task failed');
+            }
+            return response.json();
+        }
+        throw new Error('Chatbot response timed out');
+    }
+
     renderMessage(messageObj) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `chatbot-message chatbot-message-${messageObj.type}`;
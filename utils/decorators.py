@@ -1,6 +1,9 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash
+from flask import session, redirect, url_for, flash, jsonify
+from cachetools import TTLCache
+from utils.redis_client import get_redis
 import logging
+import threading
 
 # Set up logging to avoid console encoding issues
 logger = logging.getLogger(__name__)
@@ -313,3 +316,59 @@ def get_accessible_organizations(user_role, user_org_id):
     else:
         # Other users can only access their own organization
         return [user_org_id] if user_org_id else []
+
+
+def rate_limited(limit, period=60):
+    """Allow each logged-in user at most `limit` calls to the view per `period` seconds.
+
+    Calls over the limit get a 429 JSON error. With REDIS_URL configured the counts
+    are shared by all worker processes; otherwise (or if Redis can't be reached) each
+    process counts on its own, so the effective limit is multiplied by the number of
+    gunicorn workers (WEB_CONCURRENCY).
+    """
+    # user_id -> [calls]; the list is updated in place so the entry still expires
+    # `period` seconds after the user's first call in the window
+    calls = TTLCache(maxsize=4096, ttl=period)
+    lock = threading.Lock()
+
+    def count_locally(user_id):
+        with lock:
+            count = calls.get(user_id)
+            if count is None:
+                count = calls[user_id] = [0]
+            count[0] += 1
+            return count[0]
+
+    def decorator(f):
+        key_prefix = f"ratelimit:{f.__module__}.{f.__name__}:"
+
+        def count_call(user_id):
+            client = get_redis()
+            if client is not None:
+                try:
+                    # The window starts with the first call: SET NX gives the key its
+                    # expiry, and INCR never clears it
+                    pipe = client.pipeline()
+                    pipe.set(f"{key_prefix}{user_id}", 0, ex=period, nx=True)
+                    pipe.incr(f"{key_prefix}{user_id}")
+                    return pipe.execute()[1]
+                except Exception as e:
+                    logger.warning(f"Redis rate limit counter unavailable, counting in-process: {e}")
+            return count_locally(user_id)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = session.get('user_id')
+            if count_call(user_id) > limit:
+                logger.warning(f"Rate limit exceeded for {f.__name__}")
+                response = jsonify({
+                    "success": False,
+                    "error": "Too many requests. Please wait a minute and try again."
+                })
+                response.headers['Retry-After'] = str(period)
+                return response, 429
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
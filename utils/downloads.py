@@ -0,0 +1,35 @@
+"""
+Helpers for sending generated documents as downloads.
+
+Documents are written into a SpooledTemporaryFile, so small files stay in memory
+and large ones spill to disk instead of being held as one in-memory buffer.
+"""
+
+import io
+import tempfile
+
+from flask import request, send_file
+
+# Generated documents stay in memory up to this size, then spill to a temp file
+DOCUMENT_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+
+def new_document_spool():
+    """A spooled temp file to generate a document into"""
+    return tempfile.SpooledTemporaryFile(max_size=DOCUMENT_SPOOL_MAX_SIZE)
+
+
+def send_spooled_document(spool, filename, mimetype):
+    """Stream a generated document from a spooled temp file with Content-Length and range support"""
+    size = spool.seek(0, io.SEEK_END)
+    spool.seek(0)
+    response = send_file(
+        spool,
+        as_attachment=True,
+        download_name=filename,
+        mimetype=mimetype,
+        conditional=False
+    )
+    # send_file can only size BytesIO/paths itself, so supply the length for 206 range responses
+    response.content_length = size
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
@@ -0,0 +1,39 @@
+"""
+orjson-backed JSON provider for the Flask app.
+
+jsonify() and the tojson template filter go through app.json; this provider
+serializes with orjson (compact, unsorted keys) instead of the stdlib json module.
+Calls that pass json.dumps-specific options (indent, separators, ...) still use
+Flask's default implementation. datetimes serialize as ISO 8601 strings rather
+than the HTTP date format used by Flask's default provider.
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(
+                obj,
+                default=self.default,
+                option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE,
+            ),
+            mimetype=self.mimetype,
+        )
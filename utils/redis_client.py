@@ -0,0 +1,35 @@
+"""
+Shared Redis client for cross-process state (rate limit counters, generated reports).
+
+Built once on first use from Config.REDIS_URL; get_redis() returns None when Redis
+isn't configured or the redis package isn't installed, and callers fall back to
+per-process or session storage.
+"""
+
+import logging
+import threading
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# False until first use, then the client or None
+_redis = False
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """The shared Redis client, or None when REDIS_URL isn't configured"""
+    global _redis
+    if _redis is False:
+        with _redis_lock:
+            if _redis is False:
+                client = None
+                if Config.REDIS_URL:
+                    try:
+                        import redis
+                        client = redis.from_url(Config.REDIS_URL)
+                    except ImportError as e:
+                        logger.warning(f"redis package not available: {e}")
+                _redis = client
+    return _redis